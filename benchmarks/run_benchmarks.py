@@ -0,0 +1,308 @@
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import textwrap
+import time
+import tracemalloc
+
+from collections.abc import Callable
+from pathlib import Path
+
+PROJECT_ROOT:Path = Path(__file__).resolve().parent.parent
+# the benchmarks import the modules from src the same way webwalker.py does
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from directory_asset import DirectoryAsset
+from search_index import SearchIndex
+from tree_generator import TreeGenerator
+from webwalker import parse_directory_list
+
+
+# How many single operations the add_child, lookup and remove_child benchmarks time, so they stay fast on large trees.
+OPERATION_COUNT:int = 1000
+# The name of the file the create_output_file benchmark writes inside of the data folder. It is deleted afterwards.
+OUTPUT_FILE_NAME:str = "benchmark_output.txt"
+# Benchmarks that took less than this many seconds in the baseline are too noisy to count as time regressions.
+MIN_COMPARED_SECONDS:float = 0.01
+# The queries the search benchmark runs: common tokens, a prefix, a substring and misspellings that need fuzzy matching.
+SEARCH_QUERIES:list[str] = ["a", "https", "host1", "admin", "adm", "ogin", "example com", "dashbaord", "lgoin", "setings", "prodcuts", "acount", "chekout", "usres"]
+# The most seconds a search of SEARCH_QUERIES may take on average, so searching as you type keeps up with every keystroke.
+SEARCH_TARGET_SECONDS:float = 0.01
+
+
+class Benchmark():
+    def __init__(self, name:str, setup:Callable[[], object], run:Callable[[object], None], operation_count:int=1, target_seconds:float=None) -> None:
+        """One operation that is timed on trees of every size.
+
+        :param name: The name shown in the results, like "populate_directories".
+        :type name: str
+        :param setup: Called before every run to build what the run needs. Not timed.
+        :type setup: Callable[[], object]
+        :param run: The timed operation, called with what setup returned.
+        :type run: Callable[[object], None]
+        :param operation_count: How many operations one run does, to compare the time of one of them to target_seconds. DEFAULTS to 1.
+        :type operation_count: int
+        :param target_seconds: The most seconds one operation may take, on every tree size. DEFAULTS to no target.
+        :type target_seconds: float
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.operation_count = operation_count
+        self.target_seconds = target_seconds
+
+    def misses_target(self, result:dict[str, float]) -> bool:
+        """Return True if one operation took longer than target_seconds in result."""
+        return self.target_seconds is not None and result["seconds"] / self.operation_count > self.target_seconds
+
+    def measure(self, repeat:int, measure_memory:bool) -> dict[str, float]:
+        """Time the benchmark repeat times and keep the fastest, then, if measure_memory is set, run it once more under tracemalloc for its peak memory.
+
+        The fastest run is the one least disturbed by the rest of the machine. tracemalloc slows everything down,
+        which is why the time comes from separate runs.
+
+        :param repeat: How many times the benchmark is timed.
+        :type repeat: int
+        :param measure_memory: If the peak memory should be measured too.
+        :type measure_memory: bool
+        :returns: The seconds taken, and the peak memory in MB if it was measured.
+        :rtype: dict[str, float]
+        """
+        result:dict[str, float] = {}
+
+        for _ in range(repeat):
+            state = self.setup()
+            gc.collect()
+            start_time = time.perf_counter()
+            self.run(state)
+            seconds = time.perf_counter() - start_time
+            result["seconds"] = min(seconds, result.get("seconds", seconds))
+            del state
+            DirectoryAsset.nuke_directory()
+
+        if measure_memory:
+            state = self.setup()
+            gc.collect()
+            tracemalloc.start()
+            self.run(state)
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+            del state
+            DirectoryAsset.nuke_directory()
+
+        return result
+
+
+def create_benchmarks(dump_path:Path, tree_path:Path) -> list[Benchmark]:
+    """Return the benchmarks for one tree size.
+
+    :param dump_path: A walkman.js dump written by TreeGenerator.write_dump().
+    :type dump_path: Path
+    :param tree_path: A tree file written by TreeGenerator.write_tree().
+    :type tree_path: Path
+    :returns: The benchmarks.
+    :rtype: list[Benchmark]
+    """
+    def load_tree() -> DirectoryAsset:
+        DirectoryAsset.nuke_directory()
+        with open(tree_path, "r") as file:
+            return parse_directory_list(file)
+
+    def populate(_) -> None:
+        root = DirectoryAsset("/")
+        with open(dump_path, "r") as file:
+            root.populate_directories(file)
+
+    def parse(_) -> None:
+        with open(tree_path, "r") as file:
+            parse_directory_list(file)
+
+    def add_children_one_by_one(root:DirectoryAsset) -> None:
+        # the first host has the most children of any directory, so this is the worst case for keeping them sorted
+        parent = next(iter(root.children.values()))
+        for index in range(OPERATION_COUNT):
+            parent.add_child(DirectoryAsset(name=f"{parent.name}/benchmark{index}", parent=parent))
+
+    def serialize(root:DirectoryAsset) -> None:
+        root.get_asset_list_string()
+
+    def write_output_file(root:DirectoryAsset) -> None:
+        try:
+            root.create_output_file(OUTPUT_FILE_NAME)
+        finally:
+            (PROJECT_ROOT / "data" / OUTPUT_FILE_NAME).unlink(missing_ok=True)
+
+    def get_lookup_names(root:DirectoryAsset) -> list[str]:
+        # every directory_count // OPERATION_COUNT-th name, plus as many names that do not exist
+        names = [directory.name for directory in DirectoryAsset.master_list]
+        step = max(1, len(names) // OPERATION_COUNT)
+        return names[::step][:OPERATION_COUNT] + [f"missing{index}" for index in range(OPERATION_COUNT)]
+
+    def look_up(names:list[str]) -> None:
+        get = DirectoryAsset.master_list.get
+        for name in names:
+            get(name)
+
+    def get_removals(root:DirectoryAsset) -> list[tuple[DirectoryAsset, str]]:
+        # the children of the root's children, which are whole subtrees, up to OPERATION_COUNT of them
+        removals = [(host, child_name) for host in root.children.values() for child_name in host.children]
+        return removals[:OPERATION_COUNT]
+
+    def remove_children(removals:list[tuple[DirectoryAsset, str]]) -> None:
+        for parent, child_name in removals:
+            parent.remove_child(child_name)
+
+    def build_search_index() -> SearchIndex:
+        load_tree()
+        search_index = SearchIndex(directory.name for directory in DirectoryAsset.master_list)
+        # the first search sorts the tokens, which is part of building the index rather than of searching
+        search_index.search("a")
+        return search_index
+
+    def search(search_index:SearchIndex) -> None:
+        for query in SEARCH_QUERIES:
+            search_index.search(query)
+
+    return [
+        Benchmark("populate_directories", lambda: DirectoryAsset.nuke_directory(), populate),
+        Benchmark("parse_directory_list", lambda: DirectoryAsset.nuke_directory(), parse),
+        Benchmark(f"add_child x{OPERATION_COUNT}", load_tree, add_children_one_by_one),
+        Benchmark("get_asset_list_string", load_tree, serialize),
+        Benchmark("create_output_file", load_tree, write_output_file),
+        Benchmark(f"lookup by name x{OPERATION_COUNT * 2}", lambda: get_lookup_names(load_tree()), look_up),
+        Benchmark(f"remove_child x{OPERATION_COUNT}", lambda: get_removals(load_tree()), remove_children),
+        Benchmark(f"search x{len(SEARCH_QUERIES)}", build_search_index, search, len(SEARCH_QUERIES), SEARCH_TARGET_SECONDS),
+        ]
+
+
+def run_benchmarks(sizes:list[int], generator_options:dict, repeat:int=3, measure_memory:bool=True) -> tuple[dict[str, dict[str, dict[str, float]]], list[str]]:
+    """Generate a tree of every size, run every benchmark on it and print the results as they come in.
+
+    :param sizes: The numbers of directories to benchmark with.
+    :type sizes: list[int]
+    :param generator_options: The fan_out, depth, url_length and seed given to TreeGenerator.
+    :type generator_options: dict
+    :param repeat: How many times every benchmark is timed, keeping the fastest. DEFAULTS to 3.
+    :type repeat: int
+    :param measure_memory: If the peak memory should be measured too. DEFAULTS to True.
+    :type measure_memory: bool
+    :returns: The results, as {size: {benchmark name: {"seconds": ..., "peak_mb": ...}}} (sizes are strings, as in JSON),
+        and the benchmarks that missed their target_seconds, as "size name" strings.
+    :rtype: tuple[dict[str, dict[str, dict[str, float]]], list[str]]
+    """
+    results:dict[str, dict[str, dict[str, float]]] = {}
+    missed_targets:list[str] = []
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        for size in sizes:
+            generator = TreeGenerator(size, **generator_options)
+            dump_path = Path(temporary_directory) / f"dump_{size}.txt"
+            tree_path = Path(temporary_directory) / f"tree_{size}.txt"
+            generator.write_dump(dump_path)
+            generator.write_tree(tree_path)
+
+            print(f"\n[+] {size} directories")
+            results[str(size)] = {}
+            for benchmark in create_benchmarks(dump_path, tree_path):
+                result = benchmark.measure(repeat, measure_memory)
+                results[str(size)][benchmark.name] = result
+                print(format_result(benchmark.name, result))
+                if benchmark.misses_target(result):
+                    missed_targets.append(f"{size} {benchmark.name}")
+                    print(f"  [!] {benchmark.name} took longer than {benchmark.target_seconds * 1000:.0f} ms per operation")
+
+    return results, missed_targets
+
+
+def format_result(name:str, result:dict[str, float], baseline_result:dict[str, float]=None) -> str:
+    """Return one line of the results table, with the change from baseline_result if there is one."""
+    line = f"  {name:<28} {result['seconds'] * 1000:>11.1f} ms"
+    if "peak_mb" in result:
+        line += f" {result['peak_mb']:>10.1f} MB"
+    if baseline_result:
+        line += f"   {result['seconds'] / baseline_result['seconds']:>5.2f}x baseline time"
+        if "peak_mb" in result and baseline_result.get("peak_mb"):
+            line += f", {result['peak_mb'] / baseline_result['peak_mb']:.2f}x baseline memory"
+    return line
+
+
+def compare_to_baseline(results:dict, baseline:dict, tolerance:float) -> list[str]:
+    """Print the results next to a stored baseline and return the benchmarks that got slower or bigger than tolerance allows.
+
+    :param results: The results of run_benchmarks().
+    :type results: dict
+    :param baseline: Results saved by an earlier run with --save_baseline.
+    :type baseline: dict
+    :param tolerance: How much slower or bigger a benchmark may get before it counts as a regression, like 0.2 for 20%.
+    :type tolerance: float
+    :returns: The regressions, as "size name" strings.
+    :rtype: list[str]
+    """
+    regressions:list[str] = []
+
+    for size, size_results in results.items():
+        print(f"\n[+] {size} directories, compared to the baseline")
+        for name, result in size_results.items():
+            baseline_result = baseline.get(size, {}).get(name)
+            print(format_result(name, result, baseline_result))
+            if not baseline_result:
+                continue
+            if baseline_result["seconds"] >= MIN_COMPARED_SECONDS and result["seconds"] > baseline_result["seconds"] * (1 + tolerance):
+                regressions.append(f"{size} {name} (time)")
+            if "peak_mb" in result and baseline_result.get("peak_mb") and result["peak_mb"] > baseline_result["peak_mb"] * (1 + tolerance):
+                regressions.append(f"{size} {name} (memory)")
+
+    return regressions
+
+
+def get_argparse() -> argparse.Namespace:
+    """Grabs the command-line arguments specified when the benchmarks were evoked.
+
+    :returns: The arguments given when starting the benchmarks.
+    :rtype: argparse.Namespace
+    """
+    description = """\
+    Benchmark the core tree operations of WebWalker on generated trees and report their time and peak memory.
+
+    Save the results of a run with --save_baseline, then compare later runs to it with --baseline.
+    Comparing exits with status 1 if a benchmark got slower or bigger than --tolerance allows.
+    The run also exits with status 1 if searches took longer than 10 ms each on average.
+    """
+    parser = argparse.ArgumentParser(description=textwrap.dedent(description), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", help="A comma separated list of tree sizes. DEFAULTS to 10000,100000,1000000", default="10000,100000,1000000")
+    parser.add_argument("-f", "--fan_out", help="The average number of children of a directory. DEFAULTS to 8", type=int, default=8)
+    parser.add_argument("-d", "--depth", help="The most levels below the root. DEFAULTS to 5", type=int, default=5)
+    parser.add_argument("-l", "--url_length", help="The shortest length of a url without children. DEFAULTS to 60", type=int, default=60)
+    parser.add_argument("--seed", help="The seed of the random generator. DEFAULTS to 0", type=int, default=0)
+    parser.add_argument("-r", "--repeat", help="How many times every benchmark is timed, keeping the fastest. DEFAULTS to 3", type=int, default=3)
+    parser.add_argument("--no_memory", help="Skip measuring peak memory.", action="store_true")
+    parser.add_argument("--save_baseline", help="Save the results as a JSON baseline to SAVE_BASELINE.", default=None)
+    parser.add_argument("--baseline", help="Compare the results to a JSON baseline saved with --save_baseline.", default=None)
+    parser.add_argument("--tolerance", help="How much slower or bigger a benchmark may get than the baseline. DEFAULTS to 0.25 (25%%)", type=float, default=0.25)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_argparse()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    generator_options = {"fan_out": args.fan_out, "depth": args.depth, "url_length": args.url_length, "seed": args.seed}
+
+    results, missed_targets = run_benchmarks(sizes, generator_options, args.repeat, measure_memory=not args.no_memory)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\n[+] Saved the baseline to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[!] {len(regressions)} regressions: " + ", ".join(regressions))
+            sys.exit(1)
+        print("\n[+] No regressions.")
+
+    if missed_targets:
+        print(f"\n[!] {len(missed_targets)} missed targets: " + ", ".join(missed_targets))
+        sys.exit(1)
@@ -0,0 +1,142 @@
+import argparse
+import json
+import random
+import textwrap
+
+from collections.abc import Iterator
+from pathlib import Path
+
+
+# Words the generated path segments are made of, so names look and tokenize like real urls.
+SEGMENT_WORDS:tuple[str, ...] = (
+    "account", "admin", "api", "assets", "auth", "blog", "cart", "catalog", "checkout", "config", "css", "dashboard",
+    "docs", "download", "edit", "en", "export", "files", "help", "images", "img", "js", "login", "logout", "media",
+    "news", "orders", "page", "products", "profile", "reports", "search", "settings", "static", "support", "upload",
+    "user", "users", "v1", "v2", "view", "wiki",
+    )
+LEAF_EXTENSIONS:tuple[str, ...] = ("", "", "", ".html", ".php", ".js", ".css", ".png", ".pdf")
+QUERY_NAMES:tuple[str, ...] = ("id", "page", "q", "sort", "lang", "ref")
+
+
+class TreeGenerator():
+    def __init__(self, node_count:int, fan_out:int=8, depth:int=5, url_length:int=60, seed:int=0) -> None:
+        """Generate realistic, deterministic directory trees of urls for benchmarking.
+
+        The root's children are hosts like "https://host3.example.com", and every other directory is a path one
+        segment longer than its parent. Directories below depth get between 1 and 2 * fan_out - 1 children,
+        and hosts are added until node_count directories exist. The same arguments always generate the same tree.
+
+        :param node_count: How many directories to generate, the root not included.
+        :type node_count: int
+        :param fan_out: The average number of children of a directory. DEFAULTS to 8.
+        :type fan_out: int
+        :param depth: The most levels below the root. DEFAULTS to 5.
+        :type depth: int
+        :param url_length: Directories without children are padded to at least this many characters. DEFAULTS to 60.
+        :type url_length: int
+        :param seed: The seed of the random generator. DEFAULTS to 0.
+        :type seed: int
+        """
+        if node_count < 1 or fan_out < 1 or depth < 1:
+            raise ValueError("[!] node_count, fan_out and depth must all be at least 1.")
+
+        self.node_count = node_count
+        self.fan_out = fan_out
+        self.depth = depth
+        self.url_length = url_length
+        self.seed = seed
+
+    def iter_directories(self) -> Iterator[tuple[int, str]]:
+        """Yield every generated directory in pre-order, as its depth below the root (starting at 1) and its name."""
+        rng = random.Random(self.seed)
+        generated_count:int = 0
+        host_number:int = 0
+
+        while generated_count < self.node_count:
+            # each entry is the depth and name of a directory whose children have not been generated yet
+            stack:list[tuple[int, str]] = [(1, f"https://host{host_number}.example.com")]
+            host_number += 1
+
+            while stack and generated_count < self.node_count:
+                directory_depth, name = stack.pop()
+                child_count = rng.randint(1, 2 * self.fan_out - 1) if directory_depth < self.depth else 0
+                if not child_count:
+                    name = self.make_leaf_name(rng, name)
+
+                yield directory_depth, name
+                generated_count += 1
+
+                # numbering the segments keeps every name unique
+                child_names = [f"{name}/{rng.choice(SEGMENT_WORDS)}{index}" for index in range(child_count)]
+                stack.extend((directory_depth + 1, child_name) for child_name in reversed(child_names))
+
+    def make_leaf_name(self, rng:random.Random, name:str) -> str:
+        """Give a directory without children an extension, sometimes a query string, and pad it to url_length."""
+        extension = rng.choice(LEAF_EXTENSIONS)
+        padding_length = self.url_length - len(name) - len(extension) - 1
+        if padding_length > 0:
+            name += "-" + "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=padding_length))
+        name += extension
+        if rng.random() < 0.2:
+            name += f"?{rng.choice(QUERY_NAMES)}={rng.randint(1, 999)}"
+        return name
+
+    def iter_hrefs(self, duplicate_ratio:float=0.1) -> Iterator[str]:
+        """Yield the names of the generated directories as hrefs, the way walkman.js collects them from many pages.
+
+        :param duplicate_ratio: The share of hrefs that are repeated later on, like links shared by every page. DEFAULTS to 0.1.
+        :type duplicate_ratio: float
+        """
+        rng = random.Random(self.seed + 1)
+        seen_hrefs:list[str] = []
+        for _, name in self.iter_directories():
+            yield name
+            seen_hrefs.append(name)
+            if rng.random() < duplicate_ratio:
+                yield rng.choice(seen_hrefs)
+
+    def write_dump(self, path:Path, duplicate_ratio:float=0.1) -> None:
+        """Write the hrefs as a walkman.js dump, the way it is copied from the browser console (a JSON array, one href per line)."""
+        with open(path, "w") as file:
+            file.write("[\n")
+            first = True
+            for href in self.iter_hrefs(duplicate_ratio):
+                file.write(("" if first else ",\n") + "  " + json.dumps(href))
+                first = False
+            file.write("\n]\n")
+
+    def write_tree(self, path:Path, root_name:str="/") -> None:
+        """Write the directories as a tree file, in the format of DirectoryAsset.create_output_file() (root level 2)."""
+        with open(path, "w") as file:
+            file.write("- " + root_name + "\n")
+            file.writelines(" " * (2 * directory_depth) + "- " + name + "\n" for directory_depth, name in self.iter_directories())
+
+
+def get_argparse() -> argparse.Namespace:
+    """Grabs the command-line arguments specified when the generator was evoked.
+
+    :returns: The arguments given when starting the generator.
+    :rtype: argparse.Namespace
+    """
+    description = """\
+    Generate a synthetic walkman.js dump and a saved tree file inside of the data folder, for trying out
+    WebWalker on large inputs. The same arguments always generate the same files.
+    """
+    parser = argparse.ArgumentParser(description=textwrap.dedent(description), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--node_count", help="How many directories to generate. DEFAULTS to 100000", type=int, default=100000)
+    parser.add_argument("-f", "--fan_out", help="The average number of children of a directory. DEFAULTS to 8", type=int, default=8)
+    parser.add_argument("-d", "--depth", help="The most levels below the root. DEFAULTS to 5", type=int, default=5)
+    parser.add_argument("-l", "--url_length", help="The shortest length of a url without children. DEFAULTS to 60", type=int, default=60)
+    parser.add_argument("--seed", help="The seed of the random generator. DEFAULTS to 0", type=int, default=0)
+    parser.add_argument("-o", "--output_name", help="The base name of the files. DEFAULTS to synthetic, which writes synthetic_dump.txt and synthetic_tree.txt", default="synthetic")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_argparse()
+    generator = TreeGenerator(args.node_count, args.fan_out, args.depth, args.url_length, args.seed)
+    data_path = Path(__file__).resolve().parent.parent / "data"
+
+    generator.write_dump(data_path / f"{args.output_name}_dump.txt")
+    generator.write_tree(data_path / f"{args.output_name}_tree.txt")
+    print(f"[+] Wrote {args.output_name}_dump.txt and {args.output_name}_tree.txt with {args.node_count} directories to {data_path}")
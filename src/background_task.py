@@ -0,0 +1,228 @@
+import os
+import queue
+import threading
+import time
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import TextIO
+
+from metrics import METRICS
+
+
+# How many items a task hands over to the UI thread at once.
+HANDOFF_BATCH_SIZE:int = 10000
+# How many batches can wait for the UI thread before the task waits for it to catch up.
+HANDOFF_QUEUE_SIZE:int = 32
+# How often the work of a task is checked for cancellation, in items (see BackgroundTask.track()).
+CANCEL_CHECK_INTERVAL:int = 1000
+
+
+class TaskCancelled(Exception):
+    """Raised inside of a task's thread once the task was cancelled, to stop its work."""
+
+
+class BackgroundTask():
+    def __init__(self, name:str, work:Callable[["BackgroundTask"], object], apply:Callable[[list], None]=None,
+                 total_bytes:int=0, total_nodes:int=0, timer_name:str="background task") -> None:
+        """Run work on a worker thread, so the UI stays responsive while large files are loaded, imported or saved.
+
+        The tree is not thread-safe, so work should only read files and build new data. Whatever should go into
+        the tree is handed over in batches with hand_off(), and apply() is called with each batch on the UI thread
+        by poll(). The hand-off queue is bounded, so a fast reader waits for the tree instead of filling memory.
+
+        work is stopped by cancel() the next time it reads through a ProgressReader, iterates through track() or
+        calls hand_off(). Progress is kept in bytes_done and nodes_done, out of total_bytes and total_nodes if known.
+
+        :param name: What the task does, like "Populating /", shown with its progress.
+        :type name: str
+        :param work: Called on the worker thread with the task. Its return value is kept in result.
+        :type work: Callable[[BackgroundTask], object]
+        :param apply: Called on the UI thread with every batch handed over by work. DEFAULTS to None.
+        :type apply: Callable[[list], None]
+        :param total_bytes: How many bytes work will read or write, if known. DEFAULTS to 0.
+        :type total_bytes: int
+        :param total_nodes: How many directories work will go through, if known. DEFAULTS to 0.
+        :type total_nodes: int
+        :param timer_name: The METRICS timer the time the task took is recorded under. DEFAULTS to "background task".
+        :type timer_name: str
+        """
+        self.name = name
+        self.apply = apply
+        self.timer_name = timer_name
+        self.total_bytes = total_bytes
+        self.total_nodes = total_nodes
+        self.bytes_done:int = 0
+        self.nodes_done:int = 0
+        self.result:object = None
+        self.error:Exception = None
+
+        self.cancel_event = threading.Event()
+        self.handoffs:queue.Queue = queue.Queue(maxsize=HANDOFF_QUEUE_SIZE)
+        self.start_time:float = time.perf_counter()
+        self.seconds:float = 0.0
+        # daemon, so a task that is still running never keeps the program from quitting
+        self.thread = threading.Thread(target=self._run, args=(work,), name=name, daemon=True)
+        self.thread.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def done(self) -> bool:
+        """If work has returned and every batch it handed over was applied (or thrown away after a cancel)."""
+        return not self.thread.is_alive() and self.handoffs.empty()
+
+    def _run(self, work:Callable[["BackgroundTask"], object]) -> None:
+        try:
+            self.result = work(self)
+        except TaskCancelled:
+            pass
+        except Exception as e:
+            # handed to the UI thread, which reports it the same way as if the work had run there
+            self.error = e
+        finally:
+            self.seconds = time.perf_counter() - self.start_time
+            METRICS.add_time(self.timer_name, self.seconds)
+
+    def check_cancelled(self) -> None:
+        """Raise TaskCancelled if the task was cancelled. Called by work between steps."""
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+
+    def cancel(self) -> None:
+        """Ask work to stop. Batches that were not applied yet are thrown away by the next poll()."""
+        self.cancel_event.set()
+
+    def hand_off(self, items:list) -> None:
+        """Give a batch to the UI thread, waiting while the queue is full. Called by work.
+
+        :raises TaskCancelled: If the task was cancelled.
+        """
+        while True:
+            self.check_cancelled()
+            try:
+                self.handoffs.put(items, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def hand_off_all(self, items:Iterable) -> None:
+        """Give items to the UI thread in batches of HANDOFF_BATCH_SIZE. Called by work."""
+        batch:list = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= HANDOFF_BATCH_SIZE:
+                self.hand_off(batch)
+                batch = []
+        if batch:
+            self.hand_off(batch)
+
+    def track(self, items:Iterable) -> Iterator:
+        """Yield items, counting them in nodes_done and stopping once the task is cancelled. Called by work."""
+        count:int = 0
+        for count, item in enumerate(items, start=1):
+            if not count % CANCEL_CHECK_INTERVAL:
+                self.nodes_done = count
+                self.check_cancelled()
+            yield item
+        self.nodes_done = count
+
+    def poll(self, time_budget:float=None) -> bool:
+        """Apply the batches handed over so far. Only call this from the UI thread.
+
+        :param time_budget: Stop applying batches after this many seconds, so the UI can redraw in between. DEFAULTS to no limit.
+        :type time_budget: float
+        :returns: If the task is done (see done).
+        :rtype: bool
+        """
+        start_time = time.perf_counter()
+        while time_budget is None or time.perf_counter() - start_time < time_budget:
+            try:
+                items = self.handoffs.get_nowait()
+            except queue.Empty:
+                break
+            if self.apply and not self.cancelled:
+                self.apply(items)
+
+        return self.done
+
+    def wait(self) -> None:
+        """Block until the task is done, applying its batches as they come in. Only call this from the UI thread."""
+        while not self.poll():
+            self.thread.join(timeout=0.05)
+
+    def get_result(self) -> object:
+        """Return what work returned, or raise the error it raised."""
+        if self.error:
+            raise self.error
+        return self.result
+
+    def get_progress_line(self, width:int) -> str:
+        """Return the progress as one line of at most width characters, with a bar, the rate and the time left if the total is known.
+
+        :param width: The most characters the line can have.
+        :type width: int
+        :returns: Like "Populating / [#####-----] 52% 12.1 of 23.4 MB, 3.2 MB/s, 0:03 left, 81,204 directories".
+        :rtype: str
+        """
+        elapsed = max(time.perf_counter() - self.start_time, 1e-6)
+
+        if self.total_bytes:
+            done, total = self.bytes_done, self.total_bytes
+            amount = f"{done / 1e6:.1f} of {total / 1e6:.1f} MB, {done / 1e6 / elapsed:.1f} MB/s"
+        elif self.total_nodes:
+            done, total = self.nodes_done, self.total_nodes
+            amount = f"{done:,} of {total:,} directories, {done / elapsed:,.0f}/s"
+        else:
+            done, total = 0, 0
+            amount = f"{elapsed:.0f}s"
+
+        progress_line = self.name
+        if total:
+            fraction = min(done / total, 1.0)
+            bar_width = 20
+            filled = int(fraction * bar_width)
+            progress_line += f" [{'#' * filled}{'-' * (bar_width - filled)}] {fraction * 100:3.0f}% {amount}"
+            if done:
+                seconds_left = int((total - done) * elapsed / done)
+                progress_line += f", {seconds_left // 60}:{seconds_left % 60:02d} left"
+        else:
+            progress_line += " " + amount
+        if self.total_bytes and self.nodes_done:
+            progress_line += f", {self.nodes_done:,} directories"
+        if self.cancelled:
+            progress_line += " (cancelling)"
+
+        return progress_line[:width]
+
+
+class ProgressReader():
+    def __init__(self, file:TextIO, task:BackgroundTask) -> None:
+        """Wraps an open text file, so a task counts what is read from it in bytes_done and can be cancelled while reading.
+
+        The size of the file is added to the task's total_bytes. Characters are counted as they are read,
+        which is the same as bytes for the ASCII urls walkman.js collects.
+
+        :param file: The open file.
+        :type file: TextIO
+        :param task: The task that reads the file.
+        :type task: BackgroundTask
+        """
+        self.file = file
+        self.task = task
+        task.total_bytes += os.fstat(file.fileno()).st_size
+
+    def read(self, size:int=-1) -> str:
+        self.task.check_cancelled()
+        data = self.file.read(size)
+        self.task.bytes_done += len(data)
+        return data
+
+    def __iter__(self) -> Iterator[str]:
+        task = self.task
+        for line_number, line in enumerate(self.file):
+            task.bytes_done += len(line)
+            if not line_number % CANCEL_CHECK_INTERVAL:
+                task.check_cancelled()
+            yield line
@@ -0,0 +1,231 @@
+import shlex
+import sys
+
+from collections.abc import Callable, Iterable
+from typing import TextIO
+
+from bulk_import import bulk_import
+from directory_asset import DirectoryAsset, open_datafile
+from metrics import METRICS
+from tree_journal import TreeJournal
+from tree_snapshot import save_snapshot
+
+
+# How many directories "search" prints if no limit is given.
+DEFAULT_SEARCH_LIMIT:int = 20
+
+
+class BatchRunner():
+    def __init__(self, root:DirectoryAsset, journal:TreeJournal=None, output:TextIO=None, messages:TextIO=None,
+                 snapshot_compression:str="zlib", import_workers:int=None) -> None:
+        """Run the operations of the navigator from a script, without curses.
+
+        Every line of a script is one command, like "populate input.txt" or "cd https://example.com". The arguments
+        are split the way a shell splits them, so names with spaces can be quoted. Empty lines and lines starting
+        with "#" are skipped. Run the command "help" to list every command.
+
+        Results (the names printed by search and ls) are written to output, and what each command did is written to
+        messages, so results can be piped into other programs while the messages still show up in the terminal.
+
+        :param root: The root directory of the tree. Commands start in it.
+        :type root: DirectoryAsset
+        :param journal: If provided, every change is journaled like in the navigator. DEFAULTS to None.
+        :type journal: TreeJournal
+        :param output: Where results are written. DEFAULTS to stdout.
+        :type output: TextIO
+        :param messages: Where messages are written. DEFAULTS to stderr.
+        :type messages: TextIO
+        :param snapshot_compression: The compression used by the snapshot command. DEFAULTS to zlib.
+        :type snapshot_compression: str
+        :param import_workers: How many processes the import command uses to read files. DEFAULTS to the number of CPUs.
+        :type import_workers: int
+        """
+        self.root = root
+        self.current_directory = root
+        self.journal = journal
+        self.output = output or sys.stdout
+        self.messages = messages or sys.stderr
+        self.snapshot_compression = snapshot_compression
+        self.import_workers = import_workers
+
+        # each command is its function, the least and most arguments it takes (None is no limit), and its usage
+        self.commands:dict[str, tuple[Callable[..., str], int, int, str]] = {
+            "populate": (self.populate, 1, 2, "populate FILE [CHILD] - add the hrefs in data/FILE to the current directory, or to its child CHILD"),
+            "import": (self.import_files, 1, 1, "import PATTERN - bulk import every file matching the folder or glob pattern into the current directory"),
+            "add": (self.add, 1, None, "add NAME [NAME ...] - add children to the current directory"),
+            "cd": (self.change_directory, 1, 1, "cd NAME - change to the directory NAME, or to the parent with '..'"),
+            "ls": (self.list_children, 0, 0, "ls - print the children of the current directory"),
+            "remove": (self.remove, 1, 1, "remove NAME - remove a child of the current directory, or every child matching a pattern like *.png"),
+            "move": (self.move, 2, 2, "move CHILD TARGET - move a child of the current directory into the directory TARGET"),
+            "merge": (self.merge, 2, 2, "merge CHILD TARGET - move the children of CHILD into the directory TARGET, then remove CHILD"),
+            "search": (self.search, 1, 2, f"search QUERY [LIMIT] - print the directories that best match QUERY. LIMIT DEFAULTS to {DEFAULT_SEARCH_LIMIT}"),
+            "save": (self.save, 0, 1, "save [FILE] - save the tree of the current directory to data/FILE. FILE DEFAULTS to output.txt"),
+            "snapshot": (self.snapshot, 1, 1, "snapshot FILE - save the whole tree as a binary snapshot to data/FILE"),
+            "help": (self.get_help, 0, 0, "help - list every command"),
+            }
+
+    def run_script(self, script_lines:Iterable[str], keep_going:bool=False) -> int:
+        """Run every command in script_lines, writing a message for each one.
+
+        :param script_lines: The lines of the script, as an open file object or a list of lines.
+        :type script_lines: Iterable[str]
+        :param keep_going: If True, the commands after a failed one are still run. Otherwise, the script stops at the first failure. DEFAULTS to False.
+        :type keep_going: bool
+        :returns: How many commands failed.
+        :rtype: int
+        """
+        failed_count:int = 0
+
+        for line_number, line in enumerate(script_lines, start=1):
+            try:
+                message = self.run_line(line)
+            # OSError covers a missing file as well as a directory or a file that cannot be read or written
+            except (OSError, ValueError) as e:
+                failed_count += 1
+                print(f"[!] Line {line_number}: {str(e).removeprefix('[!] ')}", file=self.messages)
+                if not keep_going:
+                    break
+            else:
+                if message:
+                    print(message, file=self.messages)
+
+        return failed_count
+
+    def run_line(self, line:str) -> str:
+        """Run the command on one line of a script.
+
+        :param line: The line, like "cd https://example.com".
+        :type line: str
+        :returns: What the command did, or an empty string for an empty line or a comment.
+        :rtype: str
+        :raises ValueError: If the command is unknown, has the wrong number of arguments or fails.
+        :raises FileNotFoundError: If a file the command reads does not exist.
+        """
+        if not line.strip() or line.lstrip().startswith("#"):
+            return ""
+
+        command, *arguments = shlex.split(line)
+        if command not in self.commands:
+            raise ValueError(f"[!] '{command}' is not a command. Run 'help' to list every command.")
+
+        command_function, min_arguments, max_arguments, usage = self.commands[command]
+        if len(arguments) < min_arguments or (max_arguments is not None and len(arguments) > max_arguments):
+            raise ValueError(f"[!] Usage: {usage}")
+
+        with METRICS.timer("script: " + command):
+            return command_function(*arguments)
+
+    def get_help(self) -> str:
+        """Return the usage of every command, one per line."""
+        return "\n".join(usage for _, _, _, usage in self.commands.values())
+
+    def get_directory(self, directory_name:str) -> DirectoryAsset:
+        """Return the directory directory_name from the registry.
+
+        :raises ValueError: If there is no such directory.
+        """
+        directory = DirectoryAsset.master_list.get(directory_name)
+        if not directory:
+            raise ValueError(f"[!] '{directory_name}' is not a recognized directory.")
+        return directory
+
+    def get_child(self, child_name:str) -> DirectoryAsset:
+        """Return the child child_name of current_directory.
+
+        :raises ValueError: If current_directory has no such child.
+        """
+        child = self.current_directory.children.get(child_name)
+        if not child:
+            raise ValueError(f"[!] {child_name} is not a valid child directory of {self.current_directory.name}.")
+        return child
+
+    def populate(self, input_file_name:str, child_name:str=None) -> str:
+        directory = self.get_child(child_name) if child_name else self.current_directory
+        with open_datafile(input_file_name) as file:
+            created_directories = directory.populate_directories(file)
+
+        if self.journal:
+            self.journal.record_added(created_directories)
+        return f"[+] Added {len(created_directories)} directories to {directory.name} from {input_file_name}."
+
+    def import_files(self, import_pattern:str) -> str:
+        import_result = bulk_import(self.current_directory, import_pattern, workers=self.import_workers)
+
+        if self.journal:
+            self.journal.record_added(import_result.created_directories)
+        return import_result.get_summary()
+
+    def add(self, *child_names:str) -> str:
+        created_directories = self.current_directory.add_directories(child_names)
+        if not created_directories:
+            raise ValueError(f"[!] Nothing was added to {self.current_directory.name} - every name already exists or is not valid.")
+
+        if self.journal:
+            self.journal.record_added(created_directories)
+        return f"[+] Added {len(created_directories)} of {len(child_names)} directories to {self.current_directory.name}."
+
+    def change_directory(self, directory_name:str) -> str:
+        if directory_name == "..":
+            if not self.current_directory.parent:
+                raise ValueError(f"[!] {self.current_directory.name} does not have a parent directory.")
+            self.current_directory = self.current_directory.parent
+        else:
+            self.current_directory = self.get_directory(directory_name)
+        return f"[+] Changed to '{self.current_directory.name}'."
+
+    def list_children(self) -> str:
+        for child_name in self.current_directory.children:
+            print(child_name, file=self.output)
+        return ""
+
+    def remove(self, child_name:str) -> str:
+        if child_name in self.current_directory.children:
+            removed_children = self.current_directory.remove_children([child_name])
+        else:
+            removed_children = self.current_directory.remove_matching_children(child_name)
+            if not removed_children:
+                raise ValueError(f"[!] {child_name} is not a valid child directory or does not match any.")
+
+        if self.journal:
+            self.journal.record_removed(self.current_directory, [child.name for child in removed_children])
+        removed_count = sum(1 for child in removed_children for _ in child.iter_subtree())
+        return f"[+] Removed {len(removed_children)} children ({removed_count} directories) from {self.current_directory.name}."
+
+    def move(self, child_name:str, target_name:str) -> str:
+        child = self.get_child(child_name)
+        target = self.get_directory(target_name)
+        child.move_to(target)
+
+        if self.journal:
+            self.journal.record_moved(self.current_directory, child, target)
+        return f"[+] Moved {child.name} into {target.name}."
+
+    def merge(self, child_name:str, target_name:str) -> str:
+        child = self.get_child(child_name)
+        target = self.get_directory(target_name)
+        moved_children = child.merge_into(target)
+
+        if self.journal:
+            self.journal.record_merged(self.current_directory, child.name, target)
+        return f"[+] Merged {child.name} into {target.name} ({len(moved_children)} children moved)."
+
+    def search(self, query:str, limit:str=None) -> str:
+        try:
+            limit = int(limit) if limit else DEFAULT_SEARCH_LIMIT
+        except ValueError:
+            raise ValueError(f"[!] The search limit must be a number, not '{limit}'.") from None
+
+        for directory in DirectoryAsset.master_list.search(query, limit=limit, wait_for_index=True):
+            print(directory.name, file=self.output)
+        return ""
+
+    def save(self, output_file_name:str="output.txt") -> str:
+        try:
+            self.current_directory.create_output_file(output_file_name)
+        except IndexError as e:
+            raise ValueError(str(e)) from e
+        return f"[+] Saved {self.current_directory.name} to data/{output_file_name}."
+
+    def snapshot(self, snapshot_file_name:str) -> str:
+        save_snapshot(self.root, snapshot_file_name, compression=self.snapshot_compression)
+        return f"[+] Saved a snapshot to data/{snapshot_file_name}."
@@ -0,0 +1,233 @@
+import collections
+import os
+import threading
+import time
+
+from collections.abc import Callable
+from pathlib import Path, PurePath
+
+from directory_asset import DirectoryAsset
+from href_reader import iter_hrefs
+from metrics import METRICS
+from scope_filter import ScopeFilter
+from url_normalizer import UrlNormalizer
+
+
+# How often a bulk import that waits for a file checks if it was cancelled, in seconds.
+CANCEL_POLL_SECONDS:float = 0.1
+
+
+class BulkImportResult():
+    def __init__(self, file_count:int, directories_read:int, unique_directories:int, created_directories:list[DirectoryAsset], seconds:float) -> None:
+        """The outcome of bulk_import().
+
+        :param file_count: How many input files were read.
+        :type file_count: int
+        :param directories_read: How many directory names were read, duplicates included.
+        :type directories_read: int
+        :param unique_directories: How many different directory names were read.
+        :type unique_directories: int
+        :param created_directories: The directories that were added to the tree.
+        :type created_directories: list[DirectoryAsset]
+        :param seconds: How long the import took.
+        :type seconds: float
+        """
+        self.file_count = file_count
+        self.directories_read = directories_read
+        self.unique_directories = unique_directories
+        self.created_directories = created_directories
+        self.seconds = seconds
+
+    def get_summary(self) -> str:
+        """Return a one line summary of the import, including its throughput in urls per second."""
+        urls_per_second = self.directories_read / self.seconds if self.seconds else 0
+        return (f"[+] Read {self.directories_read} urls ({self.unique_directories} unique) from {self.file_count} files "
+                f"and added {len(self.created_directories)} directories in {self.seconds:.2f}s ({urls_per_second:,.0f} urls/s).")
+
+
+def find_import_files(import_pattern:str) -> list[Path]:
+    """Find the input files for a bulk import inside of the data folder.
+
+    Files outside of the data folder are never imported, including the ones a symbolic link inside of it points to.
+
+    :param import_pattern: A directory, whose files are all imported, or a glob pattern like "engagement/*.txt".
+    :type import_pattern: str
+    :returns: The files, sorted by path.
+    :rtype: list[Path]
+    :raises ValueError: If import_pattern is empty, absolute or contains "..".
+    :raises FileNotFoundError: If nothing matches import_pattern.
+    """
+    if not import_pattern.strip():
+        raise ValueError("[!] The import pattern is empty.")
+    pattern_parts = PurePath(import_pattern).parts
+    if PurePath(import_pattern).anchor or ".." in pattern_parts:
+        raise ValueError(f"[!] {import_pattern} is not inside of the data folder. Use a folder or glob pattern relative to it.")
+
+    data_path = (Path(__file__).resolve().parent.parent / "data").resolve()
+    import_path = data_path / import_pattern
+
+    if import_path.is_dir():
+        import_files = [path for path in import_path.iterdir() if path.is_file()]
+    else:
+        import_files = [path for path in data_path.glob(import_pattern) if path.is_file()]
+    import_files = [path for path in import_files if path.resolve().is_relative_to(data_path)]
+
+    if not import_files:
+        raise FileNotFoundError(f"[!] No input files match {import_pattern}.")
+
+    return sorted(import_files)
+
+
+def read_import_file(import_file:Path, url_normalizer:UrlNormalizer=None, scope_filter:ScopeFilter=None) -> tuple[int, list[str], ScopeFilter]:
+    """Read the unique hrefs of one input file, and normalize and filter them the way DirectoryAsset.add_directory_names() does.
+
+    This runs inside of the worker processes, so it must stay at module level. Returns how many unique hrefs the
+    file has, the names that are left, and the copy of scope_filter they were filtered with, which counted this
+    file only (or None if there is no scope_filter).
+    """
+    with open(import_file, "r") as file:
+        directory_names = dict.fromkeys(iter_hrefs(file))
+    read_count = len(directory_names)
+    return (read_count, *filter_directory_names(directory_names, url_normalizer, scope_filter and scope_filter.copy()))
+
+
+def filter_directory_names(directory_names:dict[str, None], url_normalizer:UrlNormalizer, scope_filter:ScopeFilter) -> tuple[list[str], ScopeFilter]:
+    """Return the unique normalized directory_names that scope_filter keeps, and scope_filter. Either one can be None."""
+    if url_normalizer:
+        # different hrefs can have the same normalized form
+        directory_names = dict.fromkeys(url_normalizer.normalize_all(directory_names))
+    if scope_filter:
+        directory_names = scope_filter.filter(directory_names)
+    return list(directory_names), scope_filter
+
+
+def get_pool_context() -> "multiprocessing.context.BaseContext":
+    """Return the multiprocessing context the import pool starts its processes with.
+
+    The pool is started from a worker thread of the navigator, and forking a process with threads running is
+    unsafe (and warned about from Python 3.12 on). "forkserver" and "spawn" start clean processes instead.
+    """
+    import multiprocessing  # see collect_import_names()
+    start_methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in start_methods else "spawn")
+
+
+def collect_import_names(import_files:list[Path], workers:int=None, on_file_read:Callable[[Path], None]=None,
+                         cancel_event:threading.Event=None) -> tuple[int, dict[str, None]]:
+    """Read the hrefs of every input file in a process pool and deduplicate them across all files.
+
+    The hrefs are also normalized and filtered with DirectoryAsset.url_normalizer and DirectoryAsset.scope_filter,
+    so add the names with DirectoryAsset.add_directory_names(filtered=True). With a pool, that is done inside of
+    it for every file, so it runs in parallel and only the names in scope are sent back. What the scope filter of
+    every worker counted is added to DirectoryAsset.scope_filter, so a url in several files is counted for each.
+    Without a pool, the names are normalized and filtered once they were deduplicated, which is less work for
+    a single process.
+
+    Files are handed to the pool one at a time, with no more of them in flight than there are workers, so a
+    cancel returns within CANCEL_POLL_SECONDS. Files that were not started are dropped, and the ones being
+    read finish in the background without anything waiting for them.
+
+    :param import_files: The files to read, usually from find_import_files().
+    :type import_files: list[Path]
+    :param workers: How many processes parse files. DEFAULTS to the number of CPUs.
+    :type workers: int
+    :param on_file_read: Called with every file once it was read, in the order of import_files. DEFAULTS to None.
+    :type on_file_read: Callable[[Path], None]
+    :param cancel_event: Once set, no more files are read, and what was read so far is returned. DEFAULTS to None.
+    :type cancel_event: threading.Event
+    :returns: How many hrefs were read, duplicates across files included, and the unique names in the order they were first seen.
+    :rtype: tuple[int, dict[str, None]]
+    """
+    workers = workers or os.cpu_count() or 1
+    url_normalizer, scope_filter = DirectoryAsset.url_normalizer, DirectoryAsset.scope_filter
+    # the files are read inside of the worker processes, which cannot count for this process
+    METRICS.count("bytes read", sum(import_file.stat().st_size for import_file in import_files))
+
+    directories_read:int = 0
+    # how many names the files gave, after normalizing and filtering, to count the duplicates across files
+    names_read:int = 0
+    # a dict keeps the first-seen order while dropping duplicates
+    unique_directories:dict[str, None] = {}
+
+    def is_cancelled() -> bool:
+        return cancel_event is not None and cancel_event.is_set()
+
+    def add_file(import_file:Path, read_count:int, directory_names:list[str], file_scope_filter:ScopeFilter) -> None:
+        nonlocal directories_read, names_read
+        directories_read += read_count
+        names_read += len(directory_names)
+        unique_directories.update(dict.fromkeys(directory_names))
+        if file_scope_filter:
+            scope_filter.add_counts(file_scope_filter)
+        if on_file_read:
+            on_file_read(import_file)
+
+    # a process pool only pays off when there is more than one file and more than one worker
+    if workers == 1 or len(import_files) == 1:
+        for import_file in import_files:
+            if is_cancelled():
+                break
+            add_file(import_file, *read_import_file(import_file))
+        METRICS.count("duplicates rejected", names_read - len(unique_directories))
+        return directories_read, dict.fromkeys(filter_directory_names(unique_directories, url_normalizer, scope_filter)[0])
+    else:
+        # imported here, since importing multiprocessing takes longer than the rest of a headless run needs to start
+        from concurrent.futures import Future, ProcessPoolExecutor
+
+        pool_size = min(workers, len(import_files))
+        executor = ProcessPoolExecutor(max_workers=pool_size, mp_context=get_pool_context())
+        pending:collections.deque[tuple[Path, Future]] = collections.deque()
+
+        # waits for the oldest file in flight and adds it, or returns False if the import was cancelled while waiting
+        def add_oldest_file() -> bool:
+            import_file, future = pending.popleft()
+            while True:
+                try:
+                    file_result = future.result(timeout=CANCEL_POLL_SECONDS)
+                    break
+                except TimeoutError:
+                    if is_cancelled():
+                        return False
+            add_file(import_file, *file_result)
+            return True
+
+        try:
+            for import_file in import_files:
+                if is_cancelled():
+                    break
+                pending.append((import_file, executor.submit(read_import_file, import_file, url_normalizer, scope_filter)))
+                if len(pending) >= pool_size and not add_oldest_file():
+                    break
+            while pending and not is_cancelled() and add_oldest_file():
+                pass
+        finally:
+            # nothing waits for files that are still being read, and files that were not started are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    METRICS.count("duplicates rejected", names_read - len(unique_directories))
+    return directories_read, unique_directories
+
+
+@METRICS.timer("bulk import")
+def bulk_import(directory:DirectoryAsset, import_pattern:str, workers:int=None) -> BulkImportResult:
+    """Import many walkman.js input files into the tree below directory at once.
+
+    The files are read, parsed, normalized and filtered in a process pool (see collect_import_names()), the names are
+    deduplicated across all files, and then everything is added to the tree in one batch (see DirectoryAsset.add_directory_names()).
+
+    :param directory: The directory to import below.
+    :type directory: DirectoryAsset
+    :param import_pattern: A directory or glob pattern inside of the data folder. See find_import_files().
+    :type import_pattern: str
+    :param workers: How many processes parse files. DEFAULTS to the number of CPUs.
+    :type workers: int
+    :returns: What was imported, and how fast.
+    :rtype: BulkImportResult
+    :raises FileNotFoundError: If nothing matches import_pattern.
+    """
+    start_time = time.perf_counter()
+    import_files = find_import_files(import_pattern)
+    directories_read, unique_directories = collect_import_names(import_files, workers)
+    created_directories = directory.add_directory_names(unique_directories, filtered=True)
+
+    return BulkImportResult(len(import_files), directories_read, len(unique_directories), created_directories, time.perf_counter() - start_time)
@@ -1,28 +1,227 @@
+import bisect
+import fnmatch
+import functools
+import io
+import os
+import sys
+
+from collections.abc import Iterable, Iterator
 from pathlib import Path
+from types import MappingProxyType
+from typing import TextIO
 from urllib.parse import urlparse
 
+from href_reader import iter_hrefs
+from metrics import METRICS
+from search_index import BACKGROUND_INDEX_MIN_NAMES, SearchIndex, SearchIndexBuilder
+from subtree_stats import SubtreeStats, get_tallest
+
+
+# How many parsed urls parse_url_info() remembers.
+URL_INFO_CACHE_SIZE:int = 4096
+
+# Shared read-only stand-in for the children of leaf directories, so leaves don't each carry an empty dict.
+NO_CHILDREN:MappingProxyType = MappingProxyType({})
+
+
+class UnsortedChildren(dict):
+    """The children of a directory that got a batch with sort_children=False and were not sorted since.
+
+    The type is the flag, so directories do not need another slot to remember if their children are sorted.
+    sort_children() replaces it with a plain dict again.
+    """
 
-def parse_url_info(path: str) -> str:
-    """Parse url information and return the information in separate information."""
-    parsed = urlparse(path)
 
-    return (parsed.scheme, parsed.netloc, parsed.path, parsed.params, parsed.query, parsed.fragment)
+@functools.lru_cache(maxsize=URL_INFO_CACHE_SIZE)
+def parse_url_info(path: str) -> tuple[str, str, str, str, str, str]:
+    """Parse url information and return the information in separate information.
 
-def get_datafile(input_file:str) -> str:
+    DirectoryAsset only calls this when its url information is read, and the results are kept in a
+    bounded LRU cache keyed by the raw url. The scheme and netloc are interned, since they repeat
+    across almost every directory of a tree.
+    """
+    parsed = urlparse(path)
+
+    return (sys.intern(parsed.scheme), sys.intern(parsed.netloc), parsed.path, parsed.params, parsed.query, parsed.fragment)
+
+def get_url_hierarchy(path:str) -> list[str]:
+    """Return the names of every directory on the way to a url, ending with the url itself.
+
+    "https://example.com/a/b?c=d" returns ["https://example.com", "https://example.com/a", "https://example.com/a/b",
+    "https://example.com/a/b?c=d"]. Relative urls do not have a netloc, so "/a/b" returns ["/a", "/a/b"], and
+    protocol-relative urls keep their "//", so "//cdn.com/a" returns ["//cdn.com", "//cdn.com/a"]. Urls with
+    a scheme but no netloc (like "mailto:") are returned on their own.
+
+    :param path: The url.
+    :type path: str
+    :returns: The names, from the top of the hierarchy down.
+    :rtype: list[str]
+    """
+    scheme, netloc, url_path, params, query, fragment = parse_url_info(path)
+    # urls like "mailto:" and "javascript:" have a scheme but no hierarchy
+    if scheme and not netloc:
+        return [path]
+
+    hierarchy_name = (f"{scheme}:" if scheme else "") + (f"//{netloc}" if netloc else "")
+    hierarchy_names = [hierarchy_name] if hierarchy_name else []
+    separator = "/" if netloc or url_path.startswith("/") else ""
+
+    for segment in url_path.split("/"):
+        if segment:
+            hierarchy_name += separator + segment
+            hierarchy_names.append(hierarchy_name)
+            separator = "/"
+
+    if not hierarchy_names or hierarchy_names[-1] != path:
+        hierarchy_names.append(path)
+
+    return hierarchy_names
+
+def open_datafile(input_file:str) -> TextIO:
+    """Open a file inside of the data folder for reading. Its size is counted as "bytes read" in METRICS.
+
+    :param input_file: The name of the file.
+    :type input_file: str
+    :returns: The open file.
+    :rtype: TextIO
+    :raises FileNotFoundError: If the file does not exist.
+    """
     script_path = Path(__file__).resolve()
     project_root = script_path.parent.parent
 
-    input_file = project_root / "data" / input_file
+    file = open(project_root / "data" / input_file, "r")
+    METRICS.count("bytes read", os.fstat(file.fileno()).st_size)
+    return file
+
+
+def remove_directories(directories:Iterable["DirectoryAsset"]) -> None:
+    """Remove every directory in directories from the tree, with everything below them.
+
+    Directories that are below another one of directories go with it, so each subtree is only removed once.
+    This is how a cancelled import takes back the directories it created.
+
+    :param directories: The directories to remove.
+    :type directories: Iterable[DirectoryAsset]
+    """
+    directories = set(directories)
+    removals:dict[DirectoryAsset, list[str]] = {}
+    for directory in directories:
+        parent_directory = directory.get_attached_parent()
+        if parent_directory and parent_directory not in directories:
+            removals.setdefault(parent_directory, []).append(directory.name)
 
-    with open(input_file, "r") as file:
-        directories = file.read().strip()
+    for parent_directory, child_names in removals.items():
+        parent_directory.remove_children(child_names)
 
-    return directories
+
+class DirectoryRegistry():
+    def __init__(self) -> None:
+        """Create a registry of every DirectoryAsset, keyed by the directory name.
+
+        A dict is used so that lookups, duplicate checks and removals by name are O(1), while the
+        dict's insertion order still remembers the order the directories were created in.
+        """
+        self.directories:dict[str, "DirectoryAsset"] = {}
+        # only created once something is searched for, and then kept up to date by register() and unregister()
+        self.search_index:SearchIndex = None
+        # builds search_index in the background for large registries, see search()
+        self.index_builder:SearchIndexBuilder = None
+
+    def __len__(self) -> int:
+        return len(self.directories)
+
+    def __iter__(self):
+        return iter(self.directories.values())
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.directories
+
+    def get(self, name:str, default:"DirectoryAsset"=None) -> "DirectoryAsset":
+        """Return the directory registered under name, or default if it does not exist.
+
+        :param name: The directory name.
+        :type name: str
+        :param default: The value to return if name is not registered. DEFAULTS to None.
+        :type default: DirectoryAsset
+        :returns: The registered directory or default.
+        :rtype: DirectoryAsset
+        """
+        return self.directories.get(name, default)
+
+    def register(self, directory:"DirectoryAsset") -> None:
+        """Add directory to the registry.
+
+        :param directory: The directory to register.
+        :type directory: DirectoryAsset
+        """
+        self.directories[directory.name] = directory
+        if self.search_index:
+            self.search_index.add(directory.name)
+        elif self.index_builder:
+            self.index_builder.add(directory.name)
+
+    def unregister(self, directory:"DirectoryAsset") -> None:
+        """Remove directory from the registry. Nothing happens if it was not registered.
+
+        :param directory: The directory to unregister.
+        :type directory: DirectoryAsset
+        """
+        if self.directories.get(directory.name) is directory:
+            del self.directories[directory.name]
+            if self.search_index:
+                self.search_index.discard(directory.name)
+            elif self.index_builder:
+                self.index_builder.discard(directory.name)
+
+    def clear(self) -> None:
+        """Remove every directory from the registry."""
+        self.directories.clear()
+        self.search_index = None
+        if self.index_builder:
+            self.index_builder.cancel()
+            self.index_builder = None
+
+    def search(self, query:str, limit:int=20, wait_for_index:bool=False) -> list["DirectoryAsset"]:
+        """Return the directories whose names best match query. See SearchIndex.search().
+
+        The search index is created on the first search, and kept up to date as directories are registered
+        and unregistered afterwards. Registries of BACKGROUND_INDEX_MIN_NAMES or more directories build it on
+        a worker thread, which takes seconds for millions of directories. Until it is done, the names are
+        scanned instead (see NameScanner), so searching never freezes the navigator.
+
+        :param query: What to search for.
+        :type query: str
+        :param limit: The most directories to return. DEFAULTS to 20.
+        :type limit: int
+        :param wait_for_index: If True, waits for the index instead of scanning, so the results never depend on timing. DEFAULTS to False.
+        :type wait_for_index: bool
+        :returns: The matching directories, best match first.
+        :rtype: list[DirectoryAsset]
+        """
+        if self.search_index is None:
+            if self.index_builder is None and len(self.directories) < BACKGROUND_INDEX_MIN_NAMES:
+                self.search_index = SearchIndex(self.directories)
+            else:
+                if self.index_builder is None:
+                    # the worker reads a copy, since the registry keeps changing on the UI thread
+                    self.index_builder = SearchIndexBuilder(list(self.directories))
+                self.search_index = self.index_builder.get_index(wait=wait_for_index)
+                if self.search_index is None:
+                    return [self.directories[name] for name in self.index_builder.search(query, limit)]
+                self.index_builder = None
+
+        return [self.directories[name] for name in self.search_index.search(query, limit)]
 
 
 class DirectoryAsset():
-    master_list:list = []
+    # __slots__ drops the per-object __dict__, which dominates memory on large trees.
+    __slots__ = ("name", "level", "parent", "_children", "_stats")
+
+    master_list:DirectoryRegistry = DirectoryRegistry()
     hostname:str = None
+    url_hierarchy:bool = False  # if True, populate_directories() builds the netloc and path hierarchy of every url
+    url_normalizer:"UrlNormalizer" = None  # if set, populate_directories() normalizes every url before adding it
+    scope_filter:"ScopeFilter" = None  # if set, populate_directories() drops every url that is out of scope
 
     def nuke_directory():
         """This function call nukes the entire DirectoryAsset's existing directory tree.
@@ -30,7 +229,8 @@ class DirectoryAsset():
         Currently, the only thing that needs to happen is clear master_list, but there may
         be other things needed in the future that this method can use.
         """
-        DirectoryAsset.master_list = []
+        DirectoryAsset.master_list.clear()
+        parse_url_info.cache_clear()
 
 
     def __init__(self, name:str, level:int=2, parent:"DirectoryAsset"=None, children:dict[str, "DirectoryAsset"]=None) -> None:
@@ -42,7 +242,8 @@ class DirectoryAsset():
 
         :param name: The directory name.
         :type name: str
-        :param level: The hierarchy level of a directory. Children will be appended with level+=2
+        :param level: The hierarchy level of a directory without a parent. Every other directory is 2 levels deeper than its
+            parent, so it is ignored when parent is given. DEFAULTS to 2.
         :type level: int
         :param parent: The parent DirectoryAsset.
         :type parent: DirectoryAsset
@@ -50,79 +251,282 @@ class DirectoryAsset():
         :type children: dict[str, DirectoryAsset]
         """
         # Checking if the directory already exists. If so, raise an error.
-        try:
-            directory_index = [directory.name for directory in DirectoryAsset.master_list].index(name)
-        except ValueError:
-            pass
-        else:
+        existing_directory = DirectoryAsset.master_list.get(name)
+        if existing_directory:
             # If the parent has a name, then show it. Otherwise, just tell user the directory already exists.
-            if DirectoryAsset.master_list[directory_index].parent:
-                raise ValueError(f"[!] Cannot create {name} - it already exists as a parent to {DirectoryAsset.master_list[directory_index].parent.name}")
+            if existing_directory.parent:
+                raise ValueError(f"[!] Cannot create {name} - it already exists as a parent to {existing_directory.parent.name}")
             else:
                 raise ValueError(f"[!] Cannot create {name} - it already exists as a directory.")
 
         self.name = name  # the full URL
-        self.level = level
+        # parent is the one parent pointer. It is set here and by add_children(), so a directory that is attached to
+        # a parent always points back at it (see get_attached_parent()), and its level is always parent.level + 2.
+        self.level = parent.level + 2 if parent is not None else level
         self.parent = parent
-        self.children = children or {}  # children should be like so {child.name, object}
-
-        # urllib parsed information
-        self.scheme:str = None
-        self.netloc:str = None
-        self.path:str = None
-        self.params:str = None
-        self.query:str = None
-        self.fragment:str = None
-
-        self.scheme, self.netloc, self.path, self.params, self.query, self.fragment = parse_url_info(self.name)
-
-        DirectoryAsset.master_list.append(self)  # keeping track of a master list to prevent recursive entries
-
-
-    def populate_directories(self, directory_string_list:str) -> None:
+        self._children = None
+        self._stats = None  # only created once self has children, see update_stats()
+        if children:
+            self.add_children(children.values())  # children should be like so {child.name, object}
+
+        DirectoryAsset.master_list.register(self)  # keeping track of a master list to prevent recursive entries
+
+    @property
+    def children(self) -> dict[str, "DirectoryAsset"]:
+        """The children of self. Directories without children share the read-only NO_CHILDREN mapping."""
+        if self._children is None:
+            return NO_CHILDREN
+        return self._children
+
+    @children.setter
+    def children(self, children:dict[str, "DirectoryAsset"]) -> None:
+        # the dict is only created once a child is actually added
+        self._children = children or None
+
+    @property
+    def has_children(self) -> bool:
+        """If self has any children. The same as bool(children), and the cheap check for ReadOnlyDirectory as well."""
+        return bool(self._children)
+
+    @property
+    def stats(self) -> SubtreeStats:
+        """The statistics of everything below self. They are kept up to date as directories are added and removed, so reading them is O(1).
+
+        Treat them as read-only. Directories without children get a new, empty SubtreeStats.
+        """
+        return self._stats or SubtreeStats()
+
+    @property
+    def descendant_count(self) -> int:
+        """The number of directories below self."""
+        return self._stats.descendant_count if self._stats else 0
+
+    @property
+    def height(self) -> int:
+        """The number of levels below self. 0 if self has no children."""
+        return self._stats.height if self._stats else 0
+
+    def get_attached_parent(self) -> "DirectoryAsset":
+        """Return the parent self is a child of, or None if self is a root or has not been added to its parent yet."""
+        parent = self.parent
+        if parent is None or parent._children is None or parent._children.get(self.name) is not self:
+            return None
+        return parent
+
+    def update_stats(self, change:SubtreeStats, sign:int, height_before:int, height_after:int,
+                     count_before:int=1, count_after:int=1) -> None:
+        """Apply a change below self to the statistics of self and every ancestor, after children were added or removed.
+
+        Only the directories on the way up are touched, so this takes time proportional to the depth of self.
+        Every directory counts how many of its children are the tallest (see SubtreeStats.tallest_count), so its
+        children are only scanned for the new tallest one once the last of the tallest children got shorter or was removed.
+        Ancestors that self is not attached to yet are left alone. They are updated once self is added to them.
+
+        :param change: The statistics of the directories that were added or removed, each one included.
+        :type change: SubtreeStats
+        :param sign: 1 if the directories were added, -1 if they were removed.
+        :type sign: int
+        :param height_before: The tallest height + 1 of the changed children before the change, 0 if there were none.
+        :type height_before: int
+        :param height_after: The tallest height + 1 of the changed children after the change, 0 if there are none.
+        :type height_after: int
+        :param count_before: How many of the changed children were height_before - 1 tall before the change. DEFAULTS to 1.
+        :type count_before: int
+        :param count_after: How many of the changed children are height_after - 1 tall after the change. DEFAULTS to 1.
+        :type count_after: int
+        """
+        directory = self
+        while directory is not None:
+            stats = directory._stats
+            old_height = stats.height if stats else 0
+
+            if directory._children is None:
+                directory._stats = None
+                new_height = 0
+            else:
+                if stats is None:
+                    # a directory that just got its first children takes the change over as its statistics,
+                    # which is safe since the ancestors above only read from it
+                    stats = directory._stats = change
+                else:
+                    stats.merge(change, sign)
+
+                if height_before and height_before == old_height:
+                    stats.tallest_count -= count_before
+                if height_after > old_height:
+                    stats.height, stats.tallest_count = height_after, count_after
+                elif height_after and height_after == old_height:
+                    stats.tallest_count += count_after
+                if stats.tallest_count <= 0:
+                    # every tallest child got shorter or was removed, so the new tallest ones have to be found
+                    stats.height, stats.tallest_count = get_tallest(directory._children.values())
+                new_height = stats.height
+
+            # from here on, the change is the one directory on the way up that got taller or shorter
+            height_before, height_after = old_height + 1, new_height + 1
+            count_before = count_after = 1
+            directory = directory.get_attached_parent()
+
+    # urllib parsed information, which is only parsed (and cached) when it is asked for
+    @property
+    def scheme(self) -> str:
+        return parse_url_info(self.name)[0]
+
+    @property
+    def netloc(self) -> str:
+        return parse_url_info(self.name)[1]
+
+    @property
+    def path(self) -> str:
+        return parse_url_info(self.name)[2]
+
+    @property
+    def params(self) -> str:
+        return parse_url_info(self.name)[3]
+
+    @property
+    def query(self) -> str:
+        return parse_url_info(self.name)[4]
+
+    @property
+    def fragment(self) -> str:
+        return parse_url_info(self.name)[5]
+
+    def populate_directories(self, directory_string_list:"str | TextIO") -> list["DirectoryAsset"]:
         """Populate children directories.
 
         The way children directories are bulk populated is by running walkman.js, and saving the results as a text file.
-        This method handles the list as a string, drops malformed entries, and splits each entry into a DirectoryAsset
-        with self as the parent.
+        This method reads the hrefs from the list one at a time (see href_reader.iter_hrefs()), drops malformed entries,
+        and turns each remaining entry into a DirectoryAsset with self as the parent.
 
-        :param directory_string_list: The results from walkman.js as a text file.
-        :type directory_string_list: str like list
+        :param directory_string_list: The results from walkman.js, as an open text file or as a string.
+        :type directory_string_list: str | TextIO
+        :returns: The children that were created.
+        :rtype: list[DirectoryAsset]
+        """
+        if isinstance(directory_string_list, str):
+            directory_string_list = io.StringIO(directory_string_list)
+
+        with METRICS.timer("populate directories"):
+            return self.add_directory_names(iter_hrefs(directory_string_list))
+
+    def add_directory_names(self, directory_names:Iterable[str], sort_children:bool=True, filtered:bool=False) -> list["DirectoryAsset"]:
+        """Add names below self the way populate_directories() does.
+
+        If DirectoryAsset.url_normalizer is set, every name is normalized first, so different ways of writing the
+        same url only add one directory. If DirectoryAsset.scope_filter is set, names that are out of scope are
+        dropped next. If DirectoryAsset.url_hierarchy is set, the names are then added with add_url_hierarchy().
+        Otherwise, they are added with add_directories().
+
+        :param directory_names: The names of the directories to add.
+        :type directory_names: Iterable[str]
+        :param sort_children: If the children of every parent that got new ones are sorted. See add_children(). DEFAULTS to True.
+        :type sort_children: bool
+        :param filtered: If the names were already normalized and filtered, like by bulk_import.collect_import_names(). DEFAULTS to False.
+        :type filtered: bool
+        :returns: The directories that were created.
+        :rtype: list[DirectoryAsset]
+        """
+        if DirectoryAsset.url_normalizer and not filtered:
+            directory_names = DirectoryAsset.url_normalizer.normalize_all(directory_names)
+        if DirectoryAsset.scope_filter and not filtered:
+            directory_names = DirectoryAsset.scope_filter.filter(directory_names)
+
+        if DirectoryAsset.url_hierarchy:
+            return self.add_url_hierarchy(directory_names, sort_children)
+        return self.add_directories(directory_names, sort_children)
+
+    def add_url_hierarchy(self, directory_names:Iterable[str], sort_children:bool=True) -> list["DirectoryAsset"]:
+        """Add urls below self, creating a directory for the netloc and for every path segment on the way to each url.
+
+        For example, "https://example.com/a/b" creates "https://example.com", "https://example.com/a" and
+        "https://example.com/a/b", each one a child of the one before. Directories that already exist are reused,
+        so urls that share a prefix end up in the same subtree, and each segment is only looked up once (O(segments)).
+        Relative urls like "/a/b" create "/a" and "/a/b". Names are validated the same way as add_directories().
+
+        :param directory_names: The urls to add.
+        :type directory_names: Iterable[str]
+        :param sort_children: If the children of every parent that got new ones are sorted. See add_children(). DEFAULTS to True.
+        :type sort_children: bool
+        :returns: The directories that were created, every parent before its children.
+        :rtype: list[DirectoryAsset]
         """
-        # Removing specific characters from directory_string_list so that it can be parsed correctly.
-        directories = set(
-                directory_string_list
-                .replace("[", "")
-                .replace("]", "")
-                .replace(",", "")
-                .replace('"', "")
-                .replace(" ", "")
-                .strip()
-                .split("\n")
-                )
+        created_directories:list[DirectoryAsset] = []
+        # children are attached per parent at the end, so each parent is only sorted once
+        pending_children:dict[DirectoryAsset, list[DirectoryAsset]] = {}
 
-        directories_to_add = set()
+        duplicate_count:int = 0
 
-        for directory in directories:
+        for directory in directory_names:
+            if not directory or "#" in directory:
+                continue
+
+            parent_directory = self
+            created_count = len(created_directories)
+            for hierarchy_name in get_url_hierarchy(directory):
+                if hierarchy_name == self.name:
+                    continue
+
+                hierarchy_directory = DirectoryAsset.master_list.get(hierarchy_name)
+                if not hierarchy_directory:
+                    hierarchy_directory = DirectoryAsset(name=hierarchy_name, parent=parent_directory)
+                    pending_children.setdefault(parent_directory, []).append(hierarchy_directory)
+                    created_directories.append(hierarchy_directory)
+                parent_directory = hierarchy_directory
+
+            # a url that did not create anything, not even its own directory, was already in the tree
+            if created_count == len(created_directories):
+                duplicate_count += 1
+
+        # deepest first, so every subtree is complete before it is attached and its statistics only travel up once
+        for parent_directory, children in reversed(pending_children.items()):
+            parent_directory.add_children(children, sort_children)
+
+        METRICS.count("directories created", len(created_directories))
+        METRICS.count("duplicates rejected", duplicate_count)
+        return created_directories
+
+    def add_directories(self, directory_names:Iterable[str], sort_children:bool=True) -> list["DirectoryAsset"]:
+        """Create and add a batch of children directories to self.
+
+        Every name is validated first (empty names, self, fragments and existing directories are dropped),
+        then each remaining name is registered as a DirectoryAsset and the whole batch is attached with
+        add_children(), so the children are only sorted once.
+
+        :param directory_names: The names of the directories to add.
+        :type directory_names: Iterable[str]
+        :param sort_children: If the children of self are sorted afterwards. See add_children(). DEFAULTS to True.
+        :type sort_children: bool
+        :returns: The children that were created.
+        :rtype: list[DirectoryAsset]
+        """
+        directories_to_add = []
+        duplicate_count:int = 0
 
-            if directory == self.name:
+        for directory in directory_names:
+
+            if not directory:
+                continue
+            elif directory == self.name:
                 continue
             elif "#" in directory:
                 continue
-            elif directory in [x.name for x in DirectoryAsset.master_list]:
+            elif directory in DirectoryAsset.master_list:
+                duplicate_count += 1
                 continue
             else:
-                directories_to_add.add(directory)
-
-        for directory in directories_to_add:
-            # Ignore ValueErrors raised by object creation if the directory already exists.
-            # Removing the try/except block will cause errors when trying to bulk add entries.
-            try:
-                child_directory = DirectoryAsset(name=directory, level=self.level+2, parent=self)
-            except ValueError:
-                pass
-            else:
-                self.add_child(child_directory)  # this creates the dictionary entry for children
+                # Ignore ValueErrors raised by object creation if the directory already exists.
+                # Removing the try/except block will cause errors when trying to bulk add entries.
+                try:
+                    child_directory = DirectoryAsset(name=directory, parent=self)
+                except ValueError:
+                    duplicate_count += 1
+                else:
+                    directories_to_add.append(child_directory)
+
+        METRICS.count("directories created", len(directories_to_add))
+        METRICS.count("duplicates rejected", duplicate_count)
+        return self.add_children(directories_to_add, sort_children)  # this creates the dictionary entries for children
 
     def add_child(self, child:"DirectoryAsset"=None) -> None:
         """Add a single child to self.
@@ -130,41 +534,124 @@ class DirectoryAsset():
         :param child: The DirectoryAsset to as a child to self. Defaults to None.
         :type child: DirectoryAsset
         """
-
-        child.parent_directory = self
-
-        self.children.setdefault(child.name, child)  # adding child as directory
-        self.sort_children()  # sort children based by alphabetical order
+        self.add_children([child])
+
+    def add_children(self, children:Iterable["DirectoryAsset"], sort_children:bool=True) -> list["DirectoryAsset"]:
+        """Add a batch of children to self.
+
+        The children are attached first and then sorted once, instead of re-sorting after every child.
+        Sorting rebuilds all children, so when many small batches are added to one parent, pass sort_children=False
+        and call sort_children() once after the last batch. Until then, the children are kept as UnsortedChildren.
+        A single new child is put in place with a binary search instead of a sort, unless the children are unsorted.
+        Children that were at another level, like ones moved from another parent, are shifted with their subtrees (see shift_levels()).
+
+        :param children: The DirectoryAssets to add as children to self.
+        :type children: Iterable[DirectoryAsset]
+        :param sort_children: If the children are sorted afterwards. DEFAULTS to True.
+        :type sort_children: bool
+        :returns: The children that were attached. Children whose name already exists in self are skipped.
+        :rtype: list[DirectoryAsset]
+        """
+        added_children = []
+        child_level = self.level + 2
+
+        if self._children is None:
+            self._children = {} if sort_children else UnsortedChildren()
+
+        for child in children:
+            if child.name not in self._children:
+                child.parent = self  # only for added children, so a skipped duplicate keeps its own parent
+                self._children[child.name] = child  # adding child as directory
+                added_children.append(child)
+                if child.level != child_level:
+                    child.shift_levels(child_level - child.level)
+
+        if added_children:
+            children_sorted = type(self._children) is not UnsortedChildren
+            if sort_children and children_sorted and len(added_children) == 1:
+                self._move_last_child_into_order()
+            elif sort_children:
+                self.sort_children()  # sort children based by alphabetical order
+            elif children_sorted:
+                # copied once per unsorted run, since later batches find the children unsorted already
+                self._children = UnsortedChildren(self._children)
+
+            height_after, count_after = get_tallest(added_children)
+            self.update_stats(SubtreeStats.from_directories(added_children), 1, 0, height_after, 0, count_after)
+        elif not self._children:
+            self._children = None
+
+        return added_children
 
     def sort_children(self) -> None:
         """Sorts children directories by alphabetical order."""
         self.children = dict(sorted(self.children.items()))
 
+    def _move_last_child_into_order(self) -> None:
+        # The other children are sorted (add_children() only calls this when they are not UnsortedChildren), so the
+        # place of the last one is found with a binary search. The dict is only rebuilt if that is not the end, which
+        # is a copy of the children rather than a sort. zip() reuses its tuple, so the copy does not allocate an item
+        # per child (which also keeps the garbage collector out).
+        reversed_names = reversed(self._children)
+        last_name = next(reversed_names)
+        if next(reversed_names, "") < last_name:
+            return  # already in order, like when names are added in order
+
+        child_names = list(self._children)
+        child_names.pop()
+        position = bisect.bisect_left(child_names, last_name)
+        if position < len(child_names):
+            children = list(self._children.values())
+            children.insert(position, children.pop())
+            child_names.insert(position, last_name)
+            self._children = dict(zip(child_names, children))
+
     def get_asset_list_string(self, first_call=True) -> str:
         """Return the directory tree as a string from the perspective of self.
 
-        :param first_call: Used to prevent double printing of name attributes. Recommended to not touch this. DEFAULTS to true.
+        :param first_call: If the name of self should be the first line of the string. DEFAULTS to true.
         :type first_call: bool
         :returns: The directory tree as a string.
         :rtype: str
         """
+        return "".join(self.iter_asset_lines(include_self=first_call))
 
-        return_string = ""
+    def iter_asset_lines(self, include_self:bool=True) -> Iterator[str]:
+        """Return a generator that yields the directory tree from the perspective of self, one line at a time.
+
+        The tree is walked with an explicit stack instead of recursion, so deep trees do not hit Python's
+        recursion limit, and lines are produced as they are needed instead of being built up into one string.
 
+        :param include_self: If the name of self should be the first line yielded. DEFAULTS to True.
+        :type include_self: bool
+        :returns: A generator of newline terminated lines.
+        :rtype: Iterator[str]
+        """
+        # Checked here instead of in the generator so the error is raised before anything is consumed.
         if not self.children:
             raise IndexError(f"[!] No subdirectories found for {self.name}")
-        if first_call:
-            return_string += "- " + self.name + "\n"
 
-        for directory in self.children.keys():
-            return_string += " " * self.level
-            return_string += "- " + directory + "\n"
-            if self.children[directory].children:
-                return_string += self.children[directory].get_asset_list_string(first_call=False)
+        return self._walk_asset_lines(include_self)
 
-        return return_string
+    def _walk_asset_lines(self, include_self:bool) -> Iterator[str]:
+        if include_self:
+            yield "- " + self.name + "\n"
+
+        # each entry is a directory and an iterator over the children that have not been yielded yet
+        stack:list[tuple["DirectoryAsset", Iterator["DirectoryAsset"]]] = [(self, iter(self.children.values()))]
+
+        while stack:
+            directory, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+
+            yield " " * directory.level + "- " + child.name + "\n"
+            if child.children:
+                stack.append((child, iter(child.children.values())))
 
-    def populate_child_directories(self, child_directory_name:str, input_file_name:str) -> None:
+    def populate_child_directories(self, child_directory_name:str, input_file_name:str) -> list["DirectoryAsset"]:
         """Running this method allows the user to populate children directores from a directly linked child node.
 
         The benefit of this is being able to populate children directories,
@@ -174,47 +661,223 @@ class DirectoryAsset():
         :type child_directory_name: str
         :param input_file_name: The name of the input file in ../data/
         :type input_file_name: str
+        :returns: The children that were created.
+        :rtype: list[DirectoryAsset]
         """
 
-        data_path = Path(__file__).resolve().parent.parent / "data" / input_file_name
+        with open_datafile(input_file_name) as file:
+            return self.children[child_directory_name].populate_directories(file)
 
-        with open(data_path, "r") as file:
-            directories = file.read().strip()
+    def shift_levels(self, shift:int) -> None:
+        """Add shift to the level of self and of every directory below it, like after self was moved to another depth.
 
-        self.children[child_directory_name].populate_directories(directories)
+        :param shift: The number of levels to add. Negative to move the subtree up.
+        :type shift: int
+        """
+        for directory in self.iter_subtree():
+            directory.level += shift
 
-    def remove_child(self, child_name:str) -> None:
-        """Remove a child directory.
+    def iter_subtree(self) -> Iterator["DirectoryAsset"]:
+        """Yield self and every directory below it, parents before their children.
 
-        Not currently implemented. Running this does nothing.
+        :returns: A generator of the directories in the subtree of self, in pre-order.
+        :rtype: Iterator[DirectoryAsset]
         """
-        # Figure out if child exists.
-        try:
-            self.children[child_name]
-        except KeyError:
-            raise ValueError(f"[!] {child_name} is not a valid child directory.")
-            return  # end this function call
-
-        # Remove the child from the children list.
-        directory_object = self.children.pop(child_name)
-        # Remove the child from the master list.
-        DirectoryAsset.master_list.remove(directory_object)
-        # Attempt to delete the child.
-        del directory_object
-
-    def create_output_file(self, output_file_name:str="output.txt") -> None:
+        stack:list[DirectoryAsset] = [self]
+        while stack:
+            directory = stack.pop()
+            yield directory
+            if directory._children:
+                stack.extend(reversed(directory._children.values()))
+
+    def remove_child(self, child_name:str) -> "DirectoryAsset":
+        """Remove a child directory and everything below it.
+
+        Every directory in the child's subtree is unregistered from master_list, so they no longer count,
+        can be added again and can be garbage collected. This takes time proportional to the size of the subtree.
+        The subtree itself is left intact, so it can be put back with restore_children().
+
+        :param child_name: The name of the child to remove.
+        :type child_name: str
+        :returns: The removed child.
+        :rtype: DirectoryAsset
+        :raises ValueError: If self has no child called child_name.
+        """
+        return self.remove_children([child_name])[0]
+
+    def remove_children(self, child_names:Iterable[str]) -> list["DirectoryAsset"]:
+        """Remove a batch of child directories and everything below them. See remove_child().
+
+        :param child_names: The names of the children to remove.
+        :type child_names: Iterable[str]
+        :returns: The removed children.
+        :rtype: list[DirectoryAsset]
+        :raises ValueError: If one of child_names is not a child of self. Nothing is removed in that case.
+        """
+        child_names = list(child_names)
+        for child_name in child_names:
+            if child_name not in self.children:
+                raise ValueError(f"[!] {child_name} is not a valid child directory.")
+
+        removed_children:list[DirectoryAsset] = []
+        for child_name in child_names:
+            child = self._children.pop(child_name, None)
+            if child is None:  # the name was given twice
+                continue
+            for directory in child.iter_subtree():
+                DirectoryAsset.master_list.unregister(directory)
+            removed_children.append(child)
+
+        if not self._children:
+            self._children = None
+
+        if removed_children:
+            height_before, count_before = get_tallest(removed_children)
+            self.update_stats(SubtreeStats.from_directories(removed_children), -1, height_before, 0, count_before, 0)
+
+        return removed_children
+
+    def remove_matching_children(self, pattern:str) -> list["DirectoryAsset"]:
+        """Remove every child whose name matches a shell-style pattern, like "*.png" or "*logout*", in one batch.
+
+        :param pattern: The pattern, as used by fnmatch.
+        :type pattern: str
+        :returns: The removed children. Empty if no child matched.
+        :rtype: list[DirectoryAsset]
+        """
+        return self.remove_children(fnmatch.filter(self.children, pattern))
+
+    def restore_children(self, children:Iterable["DirectoryAsset"]) -> list["DirectoryAsset"]:
+        """Put children that were removed from self back, together with everything that was below them.
+
+        :param children: Children returned by remove_child(), remove_children() or remove_matching_children().
+        :type children: Iterable[DirectoryAsset]
+        :returns: The restored children.
+        :rtype: list[DirectoryAsset]
+        :raises ValueError: If self is no longer in the tree (for example, it was merged into another directory or removed),
+            or a directory in one of the subtrees was created again since it was removed. Nothing is restored in either case.
+        """
+        # restoring into a directory that left the tree would register directories that cannot be reached from the root
+        if DirectoryAsset.master_list.get(self.name) is not self or (self.parent is not None and self.get_attached_parent() is None):
+            raise ValueError(f"[!] Cannot restore into {self.name} - it is no longer in the tree.")
+
+        children = list(children)
+        subtree_directories = [directory for child in children for directory in child.iter_subtree()]
+
+        for directory in subtree_directories:
+            if directory.name in DirectoryAsset.master_list:
+                raise ValueError(f"[!] Cannot restore {directory.name} - it was created again after it was removed.")
+
+        for directory in subtree_directories:
+            DirectoryAsset.master_list.register(directory)
+
+        return self.add_children(children)
+
+    def is_below(self, directory:"DirectoryAsset") -> bool:
+        """Return True if self is inside of the subtree of directory, directory itself included. Takes time proportional to the depth of self."""
+        current_directory = self
+        while current_directory is not None:
+            if current_directory is directory:
+                return True
+            current_directory = current_directory.get_attached_parent()
+        return False
+
+    def detach(self) -> "DirectoryAsset":
+        """Take self and its subtree out of its parent without unregistering anything, so it can be attached somewhere else.
+
+        :returns: The parent self was taken out of.
+        :rtype: DirectoryAsset
+        :raises ValueError: If self is not attached to a parent.
+        """
+        parent = self.get_attached_parent()
+        if parent is None:
+            raise ValueError(f"[!] {self.name} does not have a parent to be moved away from.")
+
+        del parent._children[self.name]
+        if not parent._children:
+            parent._children = None
+        parent.update_stats(SubtreeStats.from_directories([self]), -1, self.height + 1, 0, count_after=0)
+
+        return parent
+
+    def move_to(self, new_parent:"DirectoryAsset") -> "DirectoryAsset":
+        """Move self, with everything below it, to be a child of new_parent.
+
+        The levels inside of the moved subtree are shifted once, and statistics are only updated along the old and new
+        ancestors. This takes time proportional to the size of the subtree plus the depth of the two parents.
+
+        :param new_parent: The directory to move self into.
+        :type new_parent: DirectoryAsset
+        :returns: The parent self was moved away from.
+        :rtype: DirectoryAsset
+        :raises ValueError: If self has no parent, or new_parent is self, inside of self's subtree or already self's parent.
+        """
+        if new_parent.is_below(self):
+            raise ValueError(f"[!] Cannot move {self.name} into {new_parent.name} - it is inside of {self.name}.")
+        if self.get_attached_parent() is new_parent:
+            raise ValueError(f"[!] {self.name} is already a child of {new_parent.name}.")
+
+        old_parent = self.detach()
+        new_parent.add_children([self])
+
+        return old_parent
+
+    def merge_into(self, target:"DirectoryAsset") -> list["DirectoryAsset"]:
+        """Merge self into target: every child of self is moved into target, and then self is removed.
+
+        This is meant for directories that turned out to be the same, like "http://example.com" and "https://example.com".
+        Directory names are unique, so the moved children never clash with the children of target.
+        This takes time proportional to the number of children of self, plus the depth of the two directories,
+        plus the size of the moved subtrees when target is at another level than self.
+
+        :param target: The directory that takes over the children of self.
+        :type target: DirectoryAsset
+        :returns: The children that were moved.
+        :rtype: list[DirectoryAsset]
+        :raises ValueError: If self has no parent, or target is self or inside of self's subtree.
+        """
+        if target.is_below(self):
+            raise ValueError(f"[!] Cannot merge {self.name} into {target.name} - it is inside of {self.name}.")
+        parent = self.get_attached_parent()
+        if parent is None:
+            raise ValueError(f"[!] {self.name} does not have a parent to be removed from.")
+
+        moved_children = list(self.children.values())
+        if moved_children:
+            self._children = None
+            height_before, count_before = get_tallest(moved_children)
+            self.update_stats(SubtreeStats.from_directories(moved_children), -1, height_before, 0, count_before, 0)
+            target.add_children(moved_children)
+
+        parent.remove_children([self.name])
+        return moved_children
+
+    def create_output_file(self, output_file_name:str="output.txt", task:"BackgroundTask"=None) -> None:
         """Create an output file of the directory tree.
 
-        Currently, this saves the data as the string generated from get_asset_list_string().
+        The lines from iter_asset_lines() are written straight to the file as they are generated,
+        so the full tree is never held in memory as a single string. They are written to a temporary
+        file first, so a save that fails or is cancelled never leaves a half written file behind.
 
         :param output_file_name: The name of the file to save to. DEFAULTS to output.txt
         :type output_file_name: str
+        :param task: If provided, the lines written are counted in its progress and the save stops when it is cancelled. DEFAULTS to None.
+        :type task: BackgroundTask
         """
         data_path = Path(__file__).parent.parent.resolve()
         data_path = data_path / "data" / output_file_name
-        asset_list_string = self.get_asset_list_string()
+        temporary_path = data_path.with_name(data_path.name + ".tmp")
+        asset_lines = self.iter_asset_lines()
+        if task:
+            asset_lines = task.track(asset_lines)
 
-        data_path.write_text(asset_list_string)
+        try:
+            with METRICS.timer("write tree file"), open(temporary_path, "w") as file:
+                file.writelines(asset_lines)
+            os.replace(temporary_path, data_path)
+        except BaseException:
+            temporary_path.unlink(missing_ok=True)
+            raise
 
     def get_asset_details(self) -> str:
         return_string = ""
@@ -222,18 +885,21 @@ class DirectoryAsset():
         if self.parent:
             return_string += f"Parent: {self.parent.name}\n"
         return_string += f"Number of children: {len(self.children)}\n"
-
-        if self.scheme:
-            return_string += f"\nScheme: {self.scheme}"
-        if self.netloc:
-            return_string += f"\nNetloc: {self.netloc}"
-        if self.path:
-            return_string += f"\nPath: {self.path}"
-        if self.params:
-            return_string += f"\nParams: {self.params}"
-        if self.query:
-            return_string += f"\nQuery: {self.query}"
-        if self.fragment:
-            return_string += f"\nFragment: {self.fragment}"
+        return_string += f"Number of subdirectories: {self.descendant_count}\n"
+        return_string += f"Depth of subtree: {self.height}\n"
+
+        scheme, netloc, path, params, query, fragment = parse_url_info(self.name)
+        if scheme:
+            return_string += f"\nScheme: {scheme}"
+        if netloc:
+            return_string += f"\nNetloc: {netloc}"
+        if path:
+            return_string += f"\nPath: {path}"
+        if params:
+            return_string += f"\nParams: {params}"
+        if query:
+            return_string += f"\nQuery: {query}"
+        if fragment:
+            return_string += f"\nFragment: {fragment}"
 
         return return_string
@@ -1,10 +1,159 @@
+import collections
 import curses
 
-from directory_asset import DirectoryAsset, get_datafile
+from collections.abc import Callable
+
+from background_task import BackgroundTask, ProgressReader
+from bulk_import import BulkImportResult, collect_import_names, find_import_files
+from directory_asset import DirectoryAsset, open_datafile, remove_directories
+from href_reader import iter_hrefs
+from metrics import METRICS
+
+
+# How many removals the navigator can undo.
+UNDO_LIMIT:int = 20
+# The file inside of the data folder that the performance statistics screen saves to.
+METRICS_FILE_NAME:str = "metrics.json"
+# How often screens that wait for a key update the progress of a background task, in milliseconds.
+POLL_INTERVAL_MS:int = 100
+# How long to wait for a key while work of a background task is waiting to be added. Not 0, so the rest of an escape sequence (like an arrow key) can arrive.
+BUSY_POLL_INTERVAL_MS:int = 10
+# The most time spent adding the work of a background task to the tree between two screen updates, in seconds.
+POLL_TIME_BUDGET:float = 0.05
+# Options that cannot run while a background task runs, since they change the tree (or start another task).
+TREE_CHANGING_OPTIONS:frozenset[str] = frozenset((
+    "populate_current_directory", "populate_child_directory", "bulk_import_files", "add_child_directory", "remove_child_directory",
+    "undo_removal", "move_child_directory", "merge_child_directory", "save_directory",
+    ))
+
+
+class TreeBrowser:
+    def __init__(self, directory:DirectoryAsset) -> None:
+        """Keeps the rows of a collapsible directory tree.
+
+        Only directory starts out as a row, expanded. A directory's children only become rows when it is expanded,
+        and stop being rows when it is collapsed, so the number of rows depends on what has been opened, not on
+        the size of the tree.
+
+        :param directory: The directory at the top of the tree.
+        :type directory: DirectoryAsset
+        """
+        # each row is [directory, depth, expanded]
+        self.rows:list[list] = [[directory, 0, False]]
+        self.expand(0)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get_directory(self, row_number:int) -> DirectoryAsset:
+        return self.rows[row_number][0]
+
+    def is_expanded(self, row_number:int) -> bool:
+        return self.rows[row_number][2]
+
+    def get_row_string(self, row_number:int) -> str:
+        """Return a row as it is shown to the user, indented by depth with a marker for expanded directories."""
+        directory, depth, expanded = self.rows[row_number]
+        if expanded:
+            marker = "[-]"
+        elif directory.has_children:
+            marker = "[+]"
+        else:
+            marker = " - "
+        return "  " * depth + marker + " " + directory.name
+
+    def expand(self, row_number:int) -> None:
+        """Add the children of a row's directory as rows right below it. Nothing happens if it is already expanded."""
+        directory, depth, expanded = self.rows[row_number]
+        if expanded or not directory.has_children:
+            return
+
+        self.rows[row_number + 1:row_number + 1] = [[child, depth + 1, False] for child in directory.children.values()]
+        self.rows[row_number][2] = True
+
+    def collapse(self, row_number:int) -> None:
+        """Remove every row below a row's directory that belongs to its subtree."""
+        depth = self.rows[row_number][1]
+        end_row = row_number + 1
+        while end_row < len(self.rows) and self.rows[end_row][1] > depth:
+            end_row += 1
+
+        del self.rows[row_number + 1:end_row]
+        self.rows[row_number][2] = False
+
+    def toggle(self, row_number:int) -> None:
+        if self.is_expanded(row_number):
+            self.collapse(row_number)
+        else:
+            self.expand(row_number)
+
+    def get_parent_row(self, row_number:int) -> int:
+        """Return the row number of a row's parent, or the row itself if it is at the top."""
+        depth = self.rows[row_number][1]
+        while row_number > 0 and self.rows[row_number][1] >= depth:
+            row_number -= 1
+        return row_number
+
+
+class TreeWindow:
+    def __init__(self, directory:DirectoryAsset, cache_size:int=1000) -> None:
+        """Hands out the lines of a directory tree one screen at a time, without generating the whole tree.
+
+        Lines come from directory.iter_asset_lines(), which walks the tree lazily. Only the lines up to the
+        bottom of the requested window are generated, and at most about 2 * cache_size of the most recent
+        lines are kept, so scrolling back over the last few screens does not walk the tree again.
+
+        :param directory: The directory whose tree is shown.
+        :type directory: DirectoryAsset
+        :param cache_size: How many recently generated lines are always kept. DEFAULTS to 1000.
+        :type cache_size: int
+        :raises IndexError: If directory has no children.
+        """
+        self.directory = directory
+        self.cache_size = cache_size
+        self.restart()
+
+    def restart(self) -> None:
+        """Start generating lines from the top of the tree again."""
+        self.lines = self.directory.iter_asset_lines()
+        self.cached_lines:list[str] = []
+        self.cache_start:int = 0  # the line number of cached_lines[0]
+        self.exhausted:bool = False
+
+    def get_lines(self, start:int, count:int) -> list[str]:
+        """Return up to count lines, starting at line number start. An empty list means start is past the end.
+
+        :param start: The line number of the first line to return, where 0 is the first line of the tree.
+        :type start: int
+        :param count: The most lines to return.
+        :type count: int
+        :returns: The lines, each ending with a newline.
+        :rtype: list[str]
+        """
+        # lines before the cache were thrown away, so the only way back to them is walking the tree again
+        if start < self.cache_start:
+            self.restart()
+
+        end = start + count
+        while not self.exhausted and self.cache_start + len(self.cached_lines) < end:
+            line = next(self.lines, None)
+            if line is None:
+                self.exhausted = True
+                break
+            self.cached_lines.append(line)
+
+            # dropping old lines in chunks, keeping at least cache_size and the requested window
+            if len(self.cached_lines) > 2 * max(self.cache_size, count):
+                dropped_lines = len(self.cached_lines) - max(self.cache_size, count)
+                del self.cached_lines[:dropped_lines]
+                self.cache_start += dropped_lines
+
+        return self.cached_lines[start - self.cache_start:end - self.cache_start]
 
 
 class DirectoryNavigator:
-    def __init__(self, current_directory:DirectoryAsset, stdscr:"curses.window") -> None:
+    def __init__(self, current_directory:DirectoryAsset, stdscr:"curses.window", registry:"DirectoryRegistry"=None, read_only:bool=False,
+                 journal:"TreeJournal"=None, import_pattern:str=None, import_workers:int=None) -> None:
         """Creates a looping interface for handling DirectoryAsset objects.
 
         When this object is created, a looping menu occurs, which allows direct interaction
@@ -15,7 +164,27 @@ class DirectoryNavigator:
         :type current_directory: DirectoryAsset
         :param stdscr: The curses window to display and grab input.
         :type stdscr: curses.window
+        :param registry: Where directories are looked up by name. DEFAULTS to DirectoryAsset.master_list.
+        :type registry: DirectoryRegistry
+        :param read_only: If True, only the options that browse the tree are shown. DEFAULTS to False.
+        :type read_only: bool
+        :param journal: If provided, every change made through the navigator is written to this journal. If its compact_in_background is set, it is compacted in the background. DEFAULTS to None.
+        :type journal: TreeJournal
+        :param import_pattern: If provided, the files matching this folder or glob pattern are bulk imported into current_directory in the background as soon as the menu shows. DEFAULTS to None.
+        :type import_pattern: str
+        :param import_workers: How many processes bulk imports use to read files. DEFAULTS to the number of CPUs.
+        :type import_workers: int
         """
+        self.registry = DirectoryAsset.master_list if registry is None else registry
+        self.read_only = read_only
+        self.journal = journal
+        self.import_workers = import_workers
+        # the last removals, as the parent and the children removed from it, so they can be undone
+        self.removals:collections.deque[tuple[DirectoryAsset, list[DirectoryAsset]]] = collections.deque(maxlen=UNDO_LIMIT)
+        # the load, import or save running on a worker thread, what to do once it is done, and how the last one ended
+        self.background_task:BackgroundTask = None
+        self.on_task_finished:Callable[[BackgroundTask], str] = None
+        self.task_message:str = None
         self.main_options = self.create_options_menu()
 
         # Setting curses parameters
@@ -28,6 +197,12 @@ class DirectoryNavigator:
 
         self.current_directory = current_directory
 
+        if import_pattern:
+            try:
+                self.start_bulk_import(import_pattern)
+            except (OSError, ValueError, NotImplementedError) as e:
+                self.task_message = f"[!] Could not import {import_pattern}: {str(e).removeprefix('[!] ')}"
+
         # starts an 'infinite' loop
         self.enter_main_loop()
 
@@ -54,7 +229,7 @@ class DirectoryNavigator:
         else:
             # Attempt to best guess what message the user wants to display:
             if y==0 and x==0:
-                message = f"[+] Currently in '{self.current_directory.name}': {len(DirectoryAsset.master_list)} directories exist"
+                message = f"[+] Currently in '{self.current_directory.name}': {len(self.registry)} directories exist"
             else:
                 message = "Press ENTER ... "
             self.stdscr.addstr(y, x, message, curses.A_REVERSE if reverse else curses.A_NORMAL)
@@ -72,18 +247,39 @@ class DirectoryNavigator:
         which contains the description of the funciton, as well as the function to call.
         :rtype: dict[int, tuple]
         """
-        options = [
-                ("Show directory tree", self.show_current_directory_tree),
-                ("Populate current directory", self.populate_current_directory),
-                ("Populate child directory", self.populate_child_directory),
-                ("Add a child directory", self.add_child_directory),
-                ("Change to a directory", self.change_directory),
-                ("Remove a child directory", self.remove_child_directory),
-                ("Show asset details", self.show_asset_details),
-                ("Save directory tree", self.save_directory),
-                # Add any options above "Quit" - that way, quit is last
-                ("Quit", self.quit_program)
-                ]
+        if self.read_only:
+            options = [
+                    ("Show directory tree", self.show_current_directory_tree),
+                    ("Browse directory tree", self.browse_directory_tree),
+                    ("Change to a directory", self.change_directory),
+                    ("Search directories", self.search_directories),
+                    ("Show asset details", self.show_asset_details),
+                    ("Show performance statistics", self.show_performance_statistics),
+                    # Add any options above "Quit" - that way, quit is last
+                    ("Quit", self.quit_program)
+                    ]
+        else:
+            options = [
+                    ("Show directory tree", self.show_current_directory_tree),
+                    ("Browse directory tree", self.browse_directory_tree),
+                    ("Populate current directory", self.populate_current_directory),
+                    ("Populate child directory", self.populate_child_directory),
+                    ("Bulk import files", self.bulk_import_files),
+                    ("Add a child directory", self.add_child_directory),
+                    ("Change to a directory", self.change_directory),
+                    ("Search directories", self.search_directories),
+                    ("Remove a child directory", self.remove_child_directory),
+                    ("Undo last removal", self.undo_removal),
+                    ("Move a child directory", self.move_child_directory),
+                    ("Merge a child directory", self.merge_child_directory),
+                    ("Show asset details", self.show_asset_details),
+                    ("Show subtree statistics", self.show_subtree_statistics),
+                    ("Show performance statistics", self.show_performance_statistics),
+                    ("Show or cancel background task", self.show_background_task),
+                    ("Save directory tree", self.save_directory),
+                    # Add any options above "Quit" - that way, quit is last
+                    ("Quit", self.quit_program)
+                    ]
 
         return {option_number: option_tuple for option_number, option_tuple in enumerate(options, start=0)}
 
@@ -91,40 +287,62 @@ class DirectoryNavigator:
         """Calling this evokes the main loop for DirectoryNavigator.
 
         This loops continuously until the user provides the quit option, or an
-        unhandled error occurs.
+        unhandled error occurs. Every option that is run is timed in METRICS as "menu: <option>".
+        That time includes waiting for the user to type, so compare it with the timers of the steps inside.
+
+        The menu lives in its own window that is kept between keypresses. Moving the selection only redraws the
+        two options that changed, and changes are sent with noutrefresh()/doupdate(), so a keypress costs a few
+        bytes of terminal output instead of a repaint. The whole screen is only redrawn after an option ran
+        (options draw over the screen) or the terminal was resized.
+
+        While a background task runs, its progress is shown below the menu and updated every POLL_INTERVAL_MS.
+        Options that change the tree wait until it is done, and quitting cancels it.
         """
 
         current_line:int = 0  # setting current_line to 0 so that first option is selected
         min_option:int = 0
         max_option:int = max(self.main_options.keys())
         option:int = None
+        drawn_line:int = None  # the selected line as it is on the screen, or None if the screen has to be redrawn
+
+        self.menu_window:"curses.window" = None
 
         while option != max(self.main_options.keys()):
             # run the function that was requested, unless an error occured, then do nothing.
             try:
                 curses.curs_set(1)
-                self.main_options[option][1]()
+                curses.echo(True)  # the options read their input with echo on
+                option_name, option_function = self.main_options[option]
+                with METRICS.timer("menu: " + option_name):
+                    if self.background_task and option_function.__name__ in TREE_CHANGING_OPTIONS:
+                        self.show_task_running()
+                    else:
+                        option_function()
                 option = None  # set option back to None to prevent infinite loop of running option
+                drawn_line = None
             except KeyError:
                 pass
 
-            curses.curs_set(0)  # hide cursor
+            self.compact_journal_if_due()
 
-            self.stdscr.clear()
-            # reshow main menu
-            window_y, window_x, window_end_y, window_end_x = self.show_main_menu(current_line)
+            curses.curs_set(0)  # hide cursor
+            curses.noecho()  # echoed keys would be drawn into the menu, which is no longer redrawn on every key
 
-            message = " WebWalker "
-            self.stdscr.addstr(window_y, (curses.COLS - len(message)) // 2, message, curses.A_BOLD)
-            if len(DirectoryAsset.master_list) == 1:
-                message = f"You are in '{self.current_directory.name}' directory. 1 directory exists."
+            if drawn_line is None:
+                self.show_main_menu(current_line)
             else:
-                message = f"You are in '{self.current_directory.name}' directory. {len(DirectoryAsset.master_list)} directories exist."
-            self.stdscr.addstr(window_end_y, (curses.COLS - len(message)) // 2, message, curses.A_BOLD)
-
-            self.stdscr.refresh()
+                if drawn_line != current_line:
+                    self.show_menu_option(drawn_line, selected=False)
+                    self.show_menu_option(current_line, selected=True)
+                # only the characters that changed are sent, so this costs nothing while no task is running
+                self.show_status_lines()
+            drawn_line = current_line
+            if self.menu_window:
+                self.menu_window.noutrefresh()
+            curses.doupdate()
 
-            key = self.stdscr.getkey()
+            # read from the menu window, so reading a key does not refresh (and repaint) stdscr
+            key = self.read_key(self.menu_window or self.stdscr)
 
             if key in ["j", "KEY_DOWN"] and current_line < max_option:
                 current_line += 1
@@ -134,37 +352,189 @@ class DirectoryNavigator:
                 option = current_line
             elif key in ["q"]:
                 option = max_option  # max_option should always be quit
+            elif key in ["KEY_RESIZE"]:
+                curses.update_lines_cols()
+                drawn_line = None
 
+        if self.background_task:
+            self.stdscr.erase()
+            self.stdscr.addstr(0, 0, f"[+] Cancelling: {self.background_task.name} ...")
+            self.stdscr.refresh()
+            self.background_task.cancel()
+            self.poll_background_task(wait=True)
 
-    def show_main_menu(self, selected_line:int=0) -> tuple[int, int, int, int]:
-        """Displays the main menu opc476a6117899a01412145b8e1372d637f5c3ec5ctions."""
+    def show_main_menu(self, selected_line:int=0) -> None:
+        """Redraws the whole main screen: the menu window, with selected_line highlighted, and the status line below it.
 
-        # finding the midpoint of the screen, so that options can be printed in the middle
-        longest_option = len(max([option[0] for option in self.main_options.values()], key=len))
+        The menu window is created the first time and moved when the terminal was resized. Only noutrefresh() is called,
+        so nothing is sent to the terminal until the caller calls curses.doupdate().
 
-        mid_height = (curses.LINES - len(self.main_options)) // 2  # mid-height being adjusted for # of options
-        mid_cols = (curses.COLS - longest_option) // 2  # mid-width being adjusted for length of longest option
-        height = len(self.main_options) + 2  # compensating for a bit more height
+        :param selected_line: The option to highlight. DEFAULTS to 0.
+        :type selected_line: int
+        """
+        longest_option = len(max([option[0] for option in self.main_options.values()], key=len))
+        height = len(self.main_options) + 2  # room for the border
         width = longest_option + 2
-        menu_win = self.stdscr.subwin(height, width, mid_height, mid_cols)
 
-        # keeps track of the offset from mid_height to display each item
-        current_display_line:int = 1
+        # erase() instead of clear(), so curses only sends what differs from the screen that is already shown
+        self.stdscr.erase()
 
-        for (key, option) in self.main_options.items():
-            if selected_line == current_display_line - 1:
-                menu_win.addstr(0 + current_display_line, 1, f"{option[0]}", curses.A_REVERSE)
-            else:
-                menu_win.addstr(0 + current_display_line, 1, f"{option[0]}")
-            current_display_line += 1
+        # two lines are needed below the menu for the status lines
+        if curses.LINES < height + 2 or curses.COLS < width:
+            self.menu_window = None
+            self.stdscr.addnstr(0, 0, "[!] The terminal is too small to show the menu. Make it bigger or press q to quit.", curses.COLS - 1, self.RED_ALERT)
+            self.stdscr.noutrefresh()
+            return
+
+        # finding the midpoint of the screen, so that the menu is shown in the middle
+        menu_y = min((curses.LINES - len(self.main_options)) // 2, curses.LINES - height - 2)
+        menu_x = (curses.COLS - longest_option) // 2
+        if self.menu_window is None:
+            self.menu_window = curses.newwin(height, width, menu_y, menu_x)
+            self.menu_window.keypad(True)
+        else:
+            self.menu_window.mvwin(menu_y, menu_x)
 
-        menu_win.border()
-        self.stdscr.refresh()
-        y, x = menu_win.getbegyx()
-        end_y, end_x = menu_win.getmaxyx()
-        del menu_win  # deleting this window
+        self.status_y:int = menu_y + height
+        self.show_status_lines()
+
+        self.menu_window.erase()
+        self.menu_window.border()
+        title = " WebWalker "[:width]
+        self.menu_window.addstr(0, (width - len(title)) // 2, title, curses.A_BOLD)
+        for option_number in self.main_options:
+            self.show_menu_option(option_number, selected=option_number == selected_line)
+        # the menu window sits on top of stdscr, which was just redrawn, so all of it has to be sent again
+        self.menu_window.touchwin()
+
+    def show_status_lines(self) -> None:
+        """Draws the two lines below the menu: the current directory, and the progress of the background task or how the last one ended.
+
+        Nothing is sent to the terminal until the caller calls curses.doupdate().
+        """
+        if self.menu_window is None:
+            return
+
+        if len(self.registry) == 1:
+            message = f"You are in '{self.current_directory.name}' directory. 1 directory exists."
+        else:
+            message = f"You are in '{self.current_directory.name}' directory. {len(self.registry)} directories exist."
+        if self.background_task:
+            task_line = self.background_task.get_progress_line(curses.COLS - 1)
+        else:
+            task_line = (self.task_message or "").split("\n")[0]
+
+        for line_number, (line, attribute) in enumerate(((message, curses.A_BOLD), (task_line, curses.A_NORMAL))):
+            line = line[:curses.COLS - 1]
+            self.stdscr.move(self.status_y + line_number, 0)
+            self.stdscr.clrtoeol()
+            self.stdscr.addstr(self.status_y + line_number, (curses.COLS - len(line)) // 2, line, attribute)
+        self.stdscr.noutrefresh()
+
+    def read_key(self, window:"curses.window") -> str:
+        """Waits for a key on window and returns it, like window.getkey().
+
+        While a background task runs, the wait is cut into POLL_INTERVAL_MS steps, and the work the task handed
+        over is added to the tree after each one. While work is waiting, the steps are BUSY_POLL_INTERVAL_MS, so
+        the tree keeps up with the task. None is returned if no key was pressed, so the caller can redraw.
+
+        :param window: The window to read the key from.
+        :type window: curses.window
+        :returns: The key, or None if there was none.
+        :rtype: str
+        """
+        task = self.background_task
+        if not task:
+            window.timeout(-1)
+        elif task.handoffs.empty():
+            window.timeout(POLL_INTERVAL_MS)
+        else:
+            window.timeout(BUSY_POLL_INTERVAL_MS)
+        try:
+            key = window.getkey()
+        except curses.error:
+            key = None
+        finally:
+            window.timeout(-1)
+
+        self.poll_background_task()
+        return key
+
+    def start_background_task(self, task:BackgroundTask, on_finished:Callable[[BackgroundTask], str]) -> None:
+        """Keeps track of a task that was just started, so its progress is shown and on_finished is called once it is done.
+
+        :param task: The task.
+        :type task: BackgroundTask
+        :param on_finished: Called on the UI thread once the task is done. Returns the message that tells the user how it ended.
+        :type on_finished: Callable[[BackgroundTask], str]
+        """
+        self.background_task = task
+        self.on_task_finished = on_finished
+        self.task_message = None
+
+    def poll_background_task(self, wait:bool=False) -> None:
+        """Adds the work the background task handed over to the tree, and finishes the task if it is done.
+
+        :param wait: If True, blocks until the task is done. DEFAULTS to False.
+        :type wait: bool
+        """
+        task = self.background_task
+        if not task:
+            return
+        if wait:
+            task.wait()
+        elif not task.poll(time_budget=POLL_TIME_BUDGET):
+            return
+
+        self.background_task = None
+        try:
+            self.task_message = self.on_task_finished(task)
+        except (OSError, ValueError, IndexError) as e:
+            self.task_message = f"[!] {task.name} failed: {str(e).removeprefix('[!] ')}"
+
+        # a cancelled import removes what it added, which may include the directory the user changed to since
+        while self.registry.get(self.current_directory.name) is not self.current_directory and self.current_directory.parent:
+            self.current_directory = self.current_directory.parent
 
-        return (y,x,y+end_y,x+end_x)
+    def compact_journal_if_due(self) -> None:
+        """Starts compacting the journal in the background once it is due, unless another task is running.
+
+        Compacting writes the whole tree to a snapshot, which takes seconds for large trees, so it runs like a save:
+        on a worker thread, while the options that change the tree wait for it (see TREE_CHANGING_OPTIONS). It is
+        only started from the main menu, so no option is halfway through changing the tree.
+        """
+        if not self.journal or not self.journal.compaction_due or self.background_task:
+            return
+
+        journal = self.journal
+        last_message = self.task_message
+
+        def finish_compaction(task:BackgroundTask) -> str:
+            if task.cancelled or task.error:
+                # tried again after the next change, instead of right away
+                journal.changes_since_compaction = journal.compact_every - 1
+            task.get_result()
+            if task.cancelled:
+                return f"[!] Cancelled compacting - data/{journal.snapshot_file_name} and the journal were not changed."
+            # the message of the task that made the changes is kept, since compacting follows it right away
+            return "\n".join(filter(None, (last_message, f"[+] Compacted the journal into data/{journal.snapshot_file_name} in {task.seconds:.1f}s.")))
+
+        task = BackgroundTask("Compacting the journal", journal.compact, total_nodes=journal.root.descendant_count + 1,
+                              timer_name="background compaction")
+        self.start_background_task(task, finish_compaction)
+
+    def show_task_running(self) -> None:
+        """Tells the user that the option they chose has to wait for the background task."""
+        self.stdscr.clear()
+        self.stdscr.addstr(0, 0, f"[!] Wait for '{self.background_task.name}' to finish, or cancel it with 'Show or cancel background task'.", self.RED_ALERT)
+        col_length = self.show_banner(1, 0)
+        self.stdscr.getch(1, col_length)
+
+    def show_menu_option(self, option_number:int, selected:bool) -> None:
+        """Draws one option of the menu window, highlighted if it is selected. Nothing is sent to the terminal."""
+        if self.menu_window is None:
+            return
+        self.menu_window.addstr(option_number + 1, 1, self.main_options[option_number][0], curses.A_REVERSE if selected else curses.A_NORMAL)
 
     def show_current_directory_tree(self) -> None:
         """This method shows the current directory tree.
@@ -172,18 +542,16 @@ class DirectoryNavigator:
         This produces the tree from the perspective of the current_directory attribute.
         This means that any parent directories are ignored. To show all directories,
         it is recommended to be in the root directory.
+
+        Only the lines that fit on the screen are generated and drawn (see TreeWindow),
+        so large trees open instantly and memory use does not grow with the tree.
         """
         self.stdscr.clear()
         curses.curs_set(0)
 
         # This block of code is needed to handle directories with no children.
         try:
-            #directory_list:list = (
-            directory_list:str = (
-                    self.current_directory.get_asset_list_string()  # this function throws the error
-                    .rstrip()
-                    #.split("\n")
-                    )
+            tree_window = TreeWindow(self.current_directory)  # this throws the error
         except IndexError as e:
             self.stdscr.addstr(0, 0, str(e), self.RED_ALERT)
             exit_banner = "Press ENTER ..."
@@ -191,53 +559,123 @@ class DirectoryNavigator:
             self.stdscr.getch(1, len(exit_banner))
             return  # exit this function
 
-        # preparing pad
-        number_directories:int = len(directory_list.split("\n"))
-        longest_option:int = len(max(directory_list.split("\n"), key=len))
-        treepad = curses.newpad(number_directories+1, longest_option+1)  # removing the +1 causes an error
+        shown_lines:int = 0
+        while True:
+            # Determines how many directory lines can be shown at once (the first line is the header).
+            max_line = curses.LINES - 1
+            max_col = curses.COLS - 1
+
+            directory_lines = tree_window.get_lines(shown_lines, max_line)
+            # paging past the last line closes the tree, like reaching the end of a pager
+            if not directory_lines:
+                return
 
-        # Determines how many directory lines can be shown at once.
-        max_line = curses.LINES - 1
-        max_col = curses.COLS - 1
+            self.stdscr.erase()
+            self.stdscr.addnstr(0, 0, f"Directory tree for {self.current_directory.name}", max_col, curses.A_BOLD)
+            for line_number, directory_line in enumerate(directory_lines, start=1):
+                self.stdscr.addnstr(line_number, 0, directory_line.rstrip("\n"), max_col)
+            self.stdscr.refresh()
 
-        treepad.addstr(0, 0, directory_list)
-        shown_lines:int = 0
-        while shown_lines < number_directories:
-            self.stdscr.addstr(0, 0, f"Directory tree for {self.current_directory.name}", curses.A_BOLD)
-            self.stdscr.noutrefresh()
-            treepad.noutrefresh(shown_lines, 0, 1, 0, max_line, max_col)
-            curses.doupdate()
-            key = treepad.getkey()
+            key = self.stdscr.getkey()
             # if user presses j or KEY_DOWN, then move the screen down a whole screen
             if key in ["j", "KEY_DOWN"]:
-                self.stdscr.clear()
                 shown_lines += (max_line)
-                if shown_lines < 0:
-                    shown_lines = 0
             # if user presses SHIFT-J, then move the screen down by one line
             elif key in ["J"]:
-                self.stdscr.clear()
                 shown_lines += 1
-                if shown_lines < 0:
-                    shown_lines = 0
             # if user presses k or KEY_UP, then move the screen up by a whole screen
-            elif key in ["k", "KEY_UP"] and shown_lines > 0:
-                self.stdscr.clear()
+            elif key in ["k", "KEY_UP"]:
                 shown_lines -= (max_line)
             # if user presses SHIFT-K, then move the screen up by one line
             elif key in ["K"]:
-                self.stdscr.clear()
                 shown_lines -= 1
             # Exit if user presses q
             elif key in ["q"]:
                 return
+            elif key in ["KEY_RESIZE"]:
+                curses.update_lines_cols()
 
             # move shown_lines to 0 if it less than 0
             # that way, the user doesn't have to press down a lot if they went up a bunch
             if shown_lines < 0:
                 shown_lines = 0
 
+    def browse_directory_tree(self) -> None:
+        """Shows the current directory tree as a collapsible tree.
+
+        Directories start out collapsed, and only the rows of expanded directories exist (see TreeBrowser),
+        so this stays responsive on very large trees. The selected directory can be made the current directory.
+
+        Keys: j/k move down/up, J/K move a whole screen, l or ENTER expands or collapses, h collapses or jumps to
+        the parent, p jumps to the parent, c changes to the selected directory, q quits.
+
+        While a background task runs, its progress is shown on the last line. Directories it adds show up when
+        their parent is expanded, and the rows start over once it is done, in case it was cancelled.
+        """
+        self.stdscr.clear()
+        curses.curs_set(0)
+
+        tree_browser = TreeBrowser(self.current_directory)
+        help_banner = "j/k: move  l/ENTER: expand/collapse  h: collapse/parent  p: parent  c: change to directory  q: quit"
+
+        selected_row:int = 0
+        top_row:int = 0
+        while True:
+            # Determines how many rows can be shown at once (the first two lines are the header, the last one the progress).
+            max_row = curses.LINES - 2 - (1 if self.background_task else 0)
+            max_col = curses.COLS - 1
+
+            # scrolling just enough to keep the selected row on the screen
+            if selected_row < top_row:
+                top_row = selected_row
+            elif selected_row >= top_row + max_row:
+                top_row = selected_row - max_row + 1
+
+            self.stdscr.erase()
+            self.stdscr.addnstr(0, 0, f"Browsing {self.current_directory.name}", max_col, curses.A_BOLD)
+            self.stdscr.addnstr(1, 0, help_banner, max_col)
+            for screen_line, row_number in enumerate(range(top_row, min(top_row + max_row, len(tree_browser))), start=2):
+                row_string = tree_browser.get_row_string(row_number)
+                self.stdscr.addnstr(screen_line, 0, row_string, max_col, curses.A_REVERSE if row_number == selected_row else curses.A_NORMAL)
+            if self.background_task:
+                self.stdscr.addnstr(curses.LINES - 1, 0, self.background_task.get_progress_line(max_col), max_col, curses.A_REVERSE)
+            self.stdscr.refresh()
+
+            task_was_running = self.background_task is not None
+            key = self.read_key(self.stdscr)
+            if task_was_running and not self.background_task:
+                tree_browser = TreeBrowser(self.current_directory)
+                selected_row = top_row = 0
+
+            if key in ["j", "KEY_DOWN"]:
+                selected_row += 1
+            elif key in ["k", "KEY_UP"]:
+                selected_row -= 1
+            elif key in ["J", "KEY_NPAGE"]:
+                selected_row += max_row
+            elif key in ["K", "KEY_PPAGE"]:
+                selected_row -= max_row
+            elif key in ["l", "KEY_RIGHT", "KEY_ENTER", "\n", "\r"]:
+                tree_browser.toggle(selected_row)
+            elif key in ["h", "KEY_LEFT"]:
+                if tree_browser.is_expanded(selected_row):
+                    tree_browser.collapse(selected_row)
+                else:
+                    selected_row = tree_browser.get_parent_row(selected_row)
+            elif key in ["p"]:
+                selected_row = tree_browser.get_parent_row(selected_row)
+            elif key in ["c"]:
+                self.current_directory = tree_browser.get_directory(selected_row)
+                return
+            elif key in ["q"]:
+                return
+            elif key in ["KEY_RESIZE"]:
+                curses.update_lines_cols()
+
+            selected_row = max(0, min(selected_row, len(tree_browser) - 1))
+
     def populate_current_directory(self) -> None:
+        """Populates current_directory from a walkman.js output file in the background. See import_in_background()."""
         self.stdscr.clear()
 
         self.show_banner()
@@ -248,20 +686,19 @@ class DirectoryNavigator:
         file_name:str = self.stdscr.getstr(1, col_length).decode()
 
         try:
-            input_file = get_datafile(file_name)  # function from directory_asset
+            input_file = open_datafile(file_name)  # function from directory_asset
         except FileNotFoundError:
             self.stdscr.addstr(2, 0, f"[!] {file_name} is not a valid file. Nothing happened.", self.RED_ALERT)
             col_length = self.show_banner(3, 0)
             self.stdscr.getch(3, col_length)
         else:
-            self.current_directory.populate_directories(input_file)
+            self.import_in_background(self.current_directory, input_file)
 
     def populate_child_directory(self) -> None:
-        """Calling this method invokes the populate_child_directories() for the current_directory attribute.
+        """Calling this method populates a child of current_directory from a walkman.js output file in the background.
 
         The method should walk the user through creation of the child directory, based on the directory name and the input file's name.
-
-        File path and name validation is inside directory_asset.
+        The import itself runs like populate_current_directory().
         """
         self.stdscr.clear()
 
@@ -283,19 +720,123 @@ class DirectoryNavigator:
         col_length = self.show_banner(1, 0, message=file_input_banner, reverse=False)
         file_name:str = self.stdscr.getstr(1, col_length).decode()
 
-        # Tell the user the file was found and children populated, or file was not found.
+        # Tell the user the file was not found, or start populating.
         try:
-            self.current_directory.populate_child_directories(child_name, file_name)
+            input_file = open_datafile(file_name)
         except FileNotFoundError:
             self.stdscr.clear()
             self.stdscr.addstr(0, 0, f"[!] {file_name} is not a valid file - please double check file name", self.RED_ALERT)
-            self.stdscr.refresh()
-        else:
-            self.stdscr.clear()
-            self.stdscr.addstr(0, 0, f"[+] {child_name} directories have been populated!", self.GREEN_ALERT)
-        finally:
             col_length = self.show_banner(y=1, x=0)
             self.stdscr.getch(1, col_length)
+        else:
+            self.import_in_background(self.current_directory.children[child_name], input_file)
+
+    def bulk_import_files(self) -> None:
+        """Imports every input file matching a folder or glob pattern into current_directory in the background. See bulk_import.bulk_import()."""
+        self.stdscr.clear()
+        self.show_banner()
+
+        input_banner = "[+] Please enter the folder or glob pattern of the files to import (like crawl/*.txt): "
+        col_length = self.show_banner(1, 0, input_banner, reverse=False)
+        import_pattern:str = self.stdscr.getstr(1, col_length).decode()
+
+        try:
+            self.start_bulk_import(import_pattern)
+        except (OSError, ValueError, NotImplementedError) as e:
+            self.stdscr.addstr(2, 0, f"[!] Could not import {import_pattern}: {str(e).removeprefix('[!] ')} Nothing happened.", self.RED_ALERT)
+            col_length = self.show_banner(y=3, x=0)
+            self.stdscr.getch(3, col_length)
+
+    def start_bulk_import(self, import_pattern:str) -> None:
+        """Starts importing every input file matching import_pattern into current_directory in the background. See track_import().
+
+        :param import_pattern: The folder or glob pattern of the files, inside of the data folder.
+        :type import_pattern: str
+        :raises ValueError: If import_pattern is not inside of the data folder.
+        :raises FileNotFoundError: If no file matches import_pattern.
+        """
+        import_files = find_import_files(import_pattern)
+
+        def read_import_files(task:BackgroundTask) -> tuple[int, int]:
+            def count_file(import_file:"Path") -> None:
+                task.bytes_done += import_file.stat().st_size
+                task.check_cancelled()
+
+            directories_read, unique_directories = collect_import_names(import_files, workers=self.import_workers, on_file_read=count_file,
+                                                                        cancel_event=task.cancel_event)
+            task.hand_off_all(unique_directories)
+            return directories_read, len(unique_directories)
+
+        def get_summary(task:BackgroundTask, created_directories:list[DirectoryAsset]) -> str:
+            directories_read, unique_count = task.result
+            summary = BulkImportResult(len(import_files), directories_read, unique_count, created_directories, task.seconds).get_summary()
+            if DirectoryAsset.scope_filter:
+                summary += "\n" + DirectoryAsset.scope_filter.get_summary()
+            return summary
+
+        task = BackgroundTask(f"Importing {import_pattern}", read_import_files,
+                              total_bytes=sum(import_file.stat().st_size for import_file in import_files), timer_name="background import")
+        self.track_import(task, self.current_directory, get_summary, filtered=True)
+
+    def import_in_background(self, directory:DirectoryAsset, input_file:"TextIO") -> None:
+        """Reads the hrefs of input_file on a worker thread and adds them below directory, without blocking the navigator.
+
+        The worker only reads and tokenizes the file. The hrefs are handed over in batches and added to the tree
+        between keypresses, so the tree is only ever changed from the UI thread. See track_import().
+
+        :param directory: The directory to populate.
+        :type directory: DirectoryAsset
+        :param input_file: The open walkman.js output file. It is closed once it was read.
+        :type input_file: TextIO
+        """
+        def read_hrefs(task:BackgroundTask) -> None:
+            with input_file:
+                task.hand_off_all(iter_hrefs(ProgressReader(input_file, task)))
+
+        def get_summary(task:BackgroundTask, created_directories:list[DirectoryAsset]) -> str:
+            return f"[+] Added {len(created_directories)} directories to {directory.name} in {task.seconds:.1f}s."
+
+        task = BackgroundTask(f"Populating {directory.name}", read_hrefs, timer_name="background populate")
+        self.track_import(task, directory, get_summary)
+
+    def track_import(self, task:BackgroundTask, directory:DirectoryAsset, get_summary:Callable[[BackgroundTask, list[DirectoryAsset]], str],
+                     filtered:bool=False) -> None:
+        """Adds the hrefs task hands over below directory, and journals them once the task is done.
+
+        Batches are added without sorting, since re-sorting a parent with many children after every batch would
+        slow each batch down as the tree grows. Every parent that got new children is sorted once the task is done.
+        If the task is cancelled or fails, every directory it added is removed again, so the tree is left as it was.
+
+        :param task: The task that reads the hrefs. Its apply is set here.
+        :type task: BackgroundTask
+        :param directory: The directory the hrefs are added below.
+        :type directory: DirectoryAsset
+        :param get_summary: Returns the message shown once the task is done, from the task and the directories it added.
+        :type get_summary: Callable[[BackgroundTask, list[DirectoryAsset]], str]
+        :param filtered: If task hands over names that were already normalized and filtered. See DirectoryAsset.add_directory_names(). DEFAULTS to False.
+        :type filtered: bool
+        """
+        created_directories:list[DirectoryAsset] = []
+
+        def add_hrefs(hrefs:list[str]) -> None:
+            added_directories = directory.add_directory_names(hrefs, sort_children=False, filtered=filtered)
+            created_directories.extend(added_directories)
+            task.nodes_done += len(added_directories)
+
+        def finish_import(task:BackgroundTask) -> str:
+            if task.cancelled or task.error:
+                # the unsorted children were appended after the sorted ones, so removing them restores the order
+                remove_directories(created_directories)
+                task.get_result()
+                return f"[!] Cancelled: {task.name}. Nothing was added."
+            for parent_directory in {created_directory.parent: None for created_directory in created_directories}:
+                parent_directory.sort_children()
+            if self.journal:
+                self.journal.record_added(created_directories)
+            return get_summary(task, created_directories)
+
+        task.apply = add_hrefs
+        self.start_background_task(task, finish_import)
 
     def add_child_directory(self) -> None:
         """Creates a single child directory to current_directory.
@@ -312,7 +853,7 @@ class DirectoryNavigator:
         child_name = self.stdscr.getstr(1, col_length).decode()
 
         try:
-            child = DirectoryAsset(name=child_name, parent=self.current_directory, level=self.current_directory.level+2)
+            child = DirectoryAsset(name=child_name, parent=self.current_directory)
         except ValueError as e:
             self.stdscr.addstr(2, 0, str(e), self.RED_ALERT)
             closing_message = "Nothing happened. Press ENTER ..."
@@ -320,6 +861,8 @@ class DirectoryNavigator:
             self.stdscr.getch(3, col_length)
         else:
             self.current_directory.add_child(child)
+            if self.journal:
+                self.journal.record_added([child])
 
             self.stdscr.addstr(2, 0, f"[+] {child_name} has been added to {self.current_directory.name}", self.GREEN_ALERT)
             col_length = self.show_banner(y=3, x=0)
@@ -328,7 +871,7 @@ class DirectoryNavigator:
     def change_directory(self) -> None:
         """Changes the current_directory attribute.
 
-        Nothing will happen if the directory being called does not exist in the master_list of DirectoryAsset.
+        Nothing will happen if the directory being called does not exist in the registry (by default, the master_list of DirectoryAsset).
         """
         self.stdscr.clear()
         self.show_banner()
@@ -336,25 +879,82 @@ class DirectoryNavigator:
         col_length = self.show_banner(y=1, x=0, message=new_directory_prompt, reverse=False)
         new_directory_name = self.stdscr.getstr(1, col_length).decode()
 
-        try:
-            directory_location:int = [x.name for x in DirectoryAsset.master_list].index(new_directory_name)
-        except ValueError:
+        new_directory:DirectoryAsset = self.registry.get(new_directory_name)
+
+        if not new_directory:
             self.stdscr.clear()
             self.stdscr.addstr(0, 0, f"[!] '{new_directory_name}' is not a recognized directory. Nothing happened.", self.RED_ALERT)
         else:
-            self.current_directory = DirectoryAsset.master_list[directory_location]
+            self.current_directory = new_directory
             self.stdscr.clear()
             self.stdscr.addstr(0, 0, f"[+] Successfully changed to '{new_directory_name}'.", self.GREEN_ALERT)
 
         col_length = self.show_banner(y=1, x=0)
         self.stdscr.getch(1, col_length)
 
+    def search_directories(self) -> None:
+        """Search for a directory as the user types, and change to the selected result.
+
+        Results are refreshed after every keystroke using the registry's search index, best match first.
+        While a large index is still built in the background, the names are scanned instead and a note says so.
+        UP/DOWN select a result, ENTER changes to it, and ESC leaves without changing directories.
+        """
+        self.stdscr.clear()
+        curses.noecho()  # the query is drawn by this method, so typed keys should not be echoed
+
+        search_prompt = "[+] Search: "
+        query:str = ""
+        results:list[DirectoryAsset] = []
+        selected_result:int = 0
+
+        try:
+            while True:
+                max_col = curses.COLS - 1
+                max_results = curses.LINES - 3
+                results = self.registry.search(query, limit=max_results) if query else []
+                selected_result = max(0, min(selected_result, len(results) - 1))
+
+                self.stdscr.erase()
+                self.show_banner()
+                self.stdscr.addnstr(1, 0, search_prompt + query, max_col)
+                if query and not results:
+                    self.stdscr.addnstr(2, 0, f"[!] Nothing matches '{query}'.", max_col, self.RED_ALERT)
+                for result_number, result in enumerate(results):
+                    self.stdscr.addnstr(result_number + 2, 0, result.name, max_col, curses.A_REVERSE if result_number == selected_result else curses.A_NORMAL)
+                if query and self.registry.index_builder:
+                    self.stdscr.addnstr(curses.LINES - 1, 0, "[+] Still indexing - misspellings are matched once it is done.", max_col, curses.A_REVERSE)
+                self.stdscr.move(1, min(len(search_prompt) + len(query), max_col))
+                self.stdscr.refresh()
+
+                key = self.stdscr.getkey()
+                if key in ["KEY_ENTER", "\n", "\r"]:
+                    if results:
+                        self.current_directory = results[selected_result]
+                    return
+                elif key in ["\x1b"]:
+                    return
+                elif key in ["KEY_RESIZE"]:
+                    curses.update_lines_cols()
+                elif key in ["KEY_DOWN"]:
+                    selected_result += 1
+                elif key in ["KEY_UP"]:
+                    selected_result -= 1
+                elif key in ["KEY_BACKSPACE", "\x7f", "\b"]:
+                    query = query[:-1]
+                    selected_result = 0
+                elif len(key) == 1 and key.isprintable():
+                    query += key
+                    selected_result = 0
+        finally:
+            curses.echo(True)
+
     def save_directory(self) -> None:
-        """Save the current directory tree to a file.
+        """Save the current directory tree to a file in the background.
 
         This method prompts the user for the name of a file to save the directory tree to.
         This file defaults to 'output.txt' if nothing is provided, and will be saved inside of the 'data' folder
-        of the project's root directory.
+        of the project's root directory. The file is written on a worker thread, while options that change
+        the tree wait for it (see TREE_CHANGING_OPTIONS), so the navigator can still be used.
         """
         self.stdscr.clear()
 
@@ -363,38 +963,166 @@ class DirectoryNavigator:
 
         input_banner = "[+] Please enter the name of the output file (default 'output.txt'): "
         col_length = self.show_banner(1, 0, input_banner, reverse=False)
-        file_name = self.stdscr.getstr(1, col_length).decode()
+        file_name = self.stdscr.getstr(1, col_length).decode() or "output.txt"
+        directory = self.current_directory
 
-        if file_name:
-            self.stdscr.addstr(2, 0, f"Saving to data/{file_name}...")
-            self.current_directory.create_output_file(output_file_name)
-            self.stdscr.addstr(3, 0, f"[+] Saved to data/{file_name}!", self.GREEN_ALERT)
-        else:
-            self.stdscr.addstr(2, 0, "Saving to data/outputfile.txt ...")
-            self.current_directory.create_output_file()
-            self.stdscr.addstr(3, 0, f"[+] Saved to data/outputfile.txt", self.GREEN_ALERT)
+        def finish_save(task:BackgroundTask) -> str:
+            task.get_result()
+            if task.cancelled:
+                return f"[!] Cancelled saving - data/{file_name} was not changed."
+            return f"[+] Saved to data/{file_name} in {task.seconds:.1f}s."
 
-        col_length = self.show_banner(y=4, x=0)
-        self.stdscr.getch(4, col_length)
+        task = BackgroundTask(f"Saving data/{file_name}", lambda task: directory.create_output_file(file_name, task=task),
+                              total_nodes=directory.descendant_count + 1, timer_name="background save")
+        self.start_background_task(task, finish_save)
+
+        self.stdscr.addstr(2, 0, f"[+] Saving to data/{file_name} in the background. The progress is shown below the menu.", self.GREEN_ALERT)
+        col_length = self.show_banner(y=3, x=0)
+        self.stdscr.getch(3, col_length)
+
+    def show_background_task(self) -> None:
+        """Shows the progress of the background task until it is done, or how the last one ended. Pressing c cancels it."""
+        curses.curs_set(0)
+        curses.noecho()
+        self.stdscr.clear()
+
+        try:
+            while True:
+                max_col = curses.COLS - 1
+                self.stdscr.erase()
+                self.show_banner()
+                if self.background_task:
+                    self.stdscr.addnstr(2, 0, self.background_task.get_progress_line(max_col), max_col)
+                    self.stdscr.addnstr(4, 0, "Press c to cancel, or ENTER to go back ...", max_col, curses.A_REVERSE)
+                else:
+                    for line_number, message_line in enumerate((self.task_message or "No task is running.").split("\n"), start=2):
+                        self.stdscr.addnstr(line_number, 0, message_line, max_col)
+                    self.stdscr.addnstr(line_number + 2, 0, "Press ENTER ...", max_col, curses.A_REVERSE)
+                self.stdscr.refresh()
+
+                key = self.read_key(self.stdscr)
+                if key in ["c"] and self.background_task:
+                    self.background_task.cancel()
+                elif key in ["KEY_RESIZE"]:
+                    curses.update_lines_cols()
+                elif key is not None and key not in ["c"]:
+                    return
+        finally:
+            curses.echo(True)
 
     def remove_child_directory(self) -> None:
+        """Removes a child of current_directory, or every child matching a pattern like "*.png", with everything below them.
+
+        The removal is kept in the undo buffer, so undo_removal() can put it back.
+        """
         self.stdscr.clear()
         self.show_banner()
 
-        input_banner = "[+] Please enter the name of the child directory to remove: "
+        input_banner = "[+] Please enter the name of the child directory to remove (or a pattern like *.png): "
         col_length = self.show_banner(1, 0, input_banner, reverse=False)
         child_name = self.stdscr.getstr(1, col_length).decode()
 
         try:
-            self.current_directory.remove_child(child_name)
+            if child_name in self.current_directory.children:
+                removed_children = self.current_directory.remove_children([child_name])
+            else:
+                removed_children = self.current_directory.remove_matching_children(child_name)
+                if not removed_children:
+                    raise ValueError(f"[!] {child_name} is not a valid child directory or does not match any.")
         except ValueError as e:
             self.stdscr.addstr(2, 0, str(e), self.RED_ALERT)
         else:
-            self.stdscr.addstr(2, 0, f"Removed {child_name} from {self.current_directory.name}", self.GREEN_ALERT)
+            self.removals.append((self.current_directory, removed_children))
+            if self.journal:
+                self.journal.record_removed(self.current_directory, [child.name for child in removed_children])
+
+            removed_count = sum(1 for child in removed_children for _ in child.iter_subtree())
+            self.stdscr.addstr(2, 0, f"Removed {len(removed_children)} children ({removed_count} directories) from {self.current_directory.name}. "
+                                     "Use 'Undo last removal' to put them back.", self.GREEN_ALERT)
         finally:
             col_length = self.show_banner(3, 0)
             self.stdscr.getch(3, col_length)
 
+    def undo_removal(self) -> None:
+        """Puts back the children removed by the last remove_child_directory() that has not been undone yet."""
+        self.stdscr.clear()
+        self.show_banner()
+
+        if not self.removals:
+            self.stdscr.addstr(1, 0, "[!] There is nothing to undo.", self.RED_ALERT)
+        else:
+            parent_directory, removed_children = self.removals.pop()
+            try:
+                restored_children = parent_directory.restore_children(removed_children)
+            except ValueError as e:
+                self.stdscr.addstr(1, 0, str(e), self.RED_ALERT)
+            else:
+                if self.journal:
+                    self.journal.record_restored(restored_children)
+                restored_names = ", ".join(child.name for child in restored_children)
+                self.stdscr.addstr(1, 0, f"[+] Put {restored_names} back into {parent_directory.name}.", self.GREEN_ALERT)
+
+        col_length = self.show_banner(2, 0)
+        self.stdscr.getch(2, col_length)
+
+    def ask_for_child_and_target(self, action:str) -> tuple[DirectoryAsset, DirectoryAsset]:
+        """Asks for a child of current_directory and for the directory to move or merge it into.
+
+        :param action: What is done with the child, like "move", used in the prompts.
+        :type action: str
+        :returns: The child and the target directory.
+        :rtype: tuple[DirectoryAsset, DirectoryAsset]
+        :raises ValueError: If either name is not valid.
+        """
+        self.stdscr.clear()
+        self.show_banner()
+
+        input_banner = f"[+] Please enter the name of the child directory to {action}: "
+        col_length = self.show_banner(1, 0, input_banner, reverse=False)
+        child_name = self.stdscr.getstr(1, col_length).decode()
+        child = self.current_directory.children.get(child_name)
+        if not child:
+            raise ValueError(f"[!] {child_name} is not a valid child directory.")
+
+        input_banner = f"[+] Please enter the name of the directory to {action} it into: "
+        col_length = self.show_banner(2, 0, input_banner, reverse=False)
+        target_name = self.stdscr.getstr(2, col_length).decode()
+        target = self.registry.get(target_name)
+        if not target:
+            raise ValueError(f"[!] {target_name} does not exist.")
+
+        return child, target
+
+    def move_child_directory(self) -> None:
+        """Moves a child of current_directory, with everything below it, into another directory. See DirectoryAsset.move_to()."""
+        try:
+            child, target = self.ask_for_child_and_target("move")
+            child.move_to(target)
+        except ValueError as e:
+            self.stdscr.addstr(3, 0, str(e), self.RED_ALERT)
+        else:
+            if self.journal:
+                self.journal.record_moved(self.current_directory, child, target)
+            self.stdscr.addstr(3, 0, f"[+] Moved {child.name} into {target.name}.", self.GREEN_ALERT)
+        finally:
+            col_length = self.show_banner(4, 0)
+            self.stdscr.getch(4, col_length)
+
+    def merge_child_directory(self) -> None:
+        """Moves every child of a child of current_directory into another directory, then removes it. See DirectoryAsset.merge_into()."""
+        try:
+            child, target = self.ask_for_child_and_target("merge")
+            moved_children = child.merge_into(target)
+        except ValueError as e:
+            self.stdscr.addstr(3, 0, str(e), self.RED_ALERT)
+        else:
+            if self.journal:
+                self.journal.record_merged(self.current_directory, child.name, target)
+            self.stdscr.addstr(3, 0, f"[+] Merged {child.name} into {target.name} ({len(moved_children)} children moved).", self.GREEN_ALERT)
+        finally:
+            col_length = self.show_banner(4, 0)
+            self.stdscr.getch(4, col_length)
+
     def show_asset_details(self) -> None:
         """Shows current_directory's object details."""
         self.stdscr.clear()
@@ -412,6 +1140,52 @@ class DirectoryNavigator:
         self.stdscr.refresh()
         self.stdscr.getch(current_line, col_length)
 
+    def show_subtree_statistics(self) -> None:
+        """Shows the statistics of everything below current_directory. They are kept up to date by DirectoryAsset, so nothing is walked."""
+        self.stdscr.clear()
+        self.show_banner()
+
+        height, width = self.stdscr.getmaxyx()
+        report_lines = self.current_directory.stats.get_report(limit=5).split("\n")
+        # leaving room for the banner above and the exit banner below
+        report_lines = report_lines[:height - 3]
+
+        current_line:int = 1
+        for report_line in report_lines:
+            self.stdscr.addstr(current_line, 0, report_line[:width - 1])
+            current_line += 1
+
+        col_length = self.show_banner(current_line, 0)
+        self.stdscr.refresh()
+        self.stdscr.getch(current_line, col_length)
+
+    def show_performance_statistics(self) -> None:
+        """Shows the timers and counters recorded in METRICS, and saves them as JSON if the user presses s."""
+        self.stdscr.clear()
+        self.show_banner()
+
+        height, width = self.stdscr.getmaxyx()
+        report_lines = METRICS.get_report().split("\n")
+        # leaving room for the banner above and the prompt below
+        report_lines = report_lines[:height - 3]
+
+        current_line:int = 1
+        for report_line in report_lines:
+            self.stdscr.addstr(current_line, 0, report_line[:width - 1])
+            current_line += 1
+
+        prompt = f"Press s to save as data/{METRICS_FILE_NAME}, or ENTER to go back ..."
+        col_length = self.show_banner(current_line, 0, prompt)
+        self.stdscr.refresh()
+        key = self.stdscr.getch(current_line, col_length)
+
+        if key == ord("s"):
+            metrics_path = METRICS.save_json(METRICS_FILE_NAME)
+            self.stdscr.clear()
+            self.stdscr.addstr(0, 0, f"[+] Saved to {metrics_path}", self.GREEN_ALERT)
+            col_length = self.show_banner(1, 0)
+            self.stdscr.getch(1, col_length)
+
     def quit_program(self) -> None:
         """Clears the screen.
 
@@ -0,0 +1,95 @@
+import json
+import re
+
+from collections.abc import Iterator
+from typing import TextIO
+
+
+# How many characters iter_hrefs() reads from a file at a time.
+READ_CHUNK_SIZE:int = 1 << 16
+
+# One token of walkman.js output. Every alternative is anchored at the current position, so the first one that
+# matches decides what comes next:
+#   separators   whitespace, brackets and commas between hrefs
+#   header       the "Array(3) " or "(3) " that browser consoles print in front of a copied array
+#   quoted       an href in double or single quotes (JSON and console formats), escapes included
+#   unclosed     a quote that is not closed on its line, which is read like a bare href
+#   bare         an href without quotes, which runs to the end of its line (one href per line format)
+HREF_TOKEN_PATTERN:re.Pattern = re.compile(r"""
+    (?P<separators>[\s\[\],]+)
+    | (?P<header>(?:Array)?\s*\(\d+\)\s*(?=\[))
+    | "(?P<double_quoted>[^"\\\n]*(?:\\.[^"\\\n]*)*)"
+    | '(?P<single_quoted>[^'\\\n]*(?:\\.[^'\\\n]*)*)'
+    | ["'](?P<unclosed>[^\n]*)
+    | (?P<bare>[^\n]+)
+    """, re.VERBOSE)
+
+ESCAPE_PATTERN:re.Pattern = re.compile(r"\\(.)", re.DOTALL)
+
+
+def unescape_href(href:str, double_quoted:bool) -> str:
+    """Undo the backslash escapes inside of a quoted href.
+
+    Double quoted hrefs are JSON strings, so JSON escapes like \\u0026 are decoded. Anything that is not valid JSON,
+    and every single quoted href, has each backslash removed from in front of the character it escapes.
+    """
+    if "\\" not in href:
+        return href
+
+    if double_quoted:
+        try:
+            return json.loads('"' + href + '"')
+        except json.JSONDecodeError:
+            pass
+    return ESCAPE_PATTERN.sub(r"\1", href)
+
+
+def iter_hrefs(input_file:TextIO, chunk_size:int=READ_CHUNK_SIZE) -> Iterator[str]:
+    """Yield the hrefs in the output of walkman.js one at a time, reading input_file in chunks.
+
+    Understands the formats walkman.js output ends up in:
+        - a JSON array, on one line or many: ["/login", "/search?q=a, b"]
+        - an array copied from a browser console, which may start with "Array(2)" or "(2)" and use single quotes
+        - one href per line, without quotes or brackets
+
+    Spaces and commas inside of quoted hrefs are kept, so query strings are not changed. Surrounding whitespace
+    and empty hrefs are dropped. Only the token currently being read is kept in memory, so the memory used does
+    not grow with the size of the file. Duplicates are not removed.
+
+    :param input_file: The walkman.js output, as an open text file or anything else with a read(size) method.
+    :type input_file: TextIO
+    :param chunk_size: How many characters are read at a time. DEFAULTS to READ_CHUNK_SIZE.
+    :type chunk_size: int
+    :returns: A generator of hrefs, in the order they appear in input_file.
+    :rtype: Iterator[str]
+    """
+    buffer:str = ""
+    end_of_file:bool = False
+
+    while not end_of_file:
+        chunk = input_file.read(chunk_size)
+        end_of_file = not chunk
+        buffer += chunk
+        position:int = 0
+
+        while position < len(buffer):
+            # every character starts one of the alternatives, so there is always a match
+            token = HREF_TOKEN_PATTERN.match(buffer, position)
+            # a token that touches the end of the buffer may continue in the next chunk, so it waits for it
+            if not end_of_file and token.end() == len(buffer):
+                break
+
+            position = token.end()
+            kind = token.lastgroup
+            if kind in ("separators", "header"):
+                continue
+            elif kind in ("bare", "unclosed"):
+                href = token.group(kind).rstrip().rstrip(",")
+            else:
+                href = unescape_href(token.group(kind), double_quoted=kind == "double_quoted")
+
+            href = href.strip()
+            if href:
+                yield href
+
+        buffer = buffer[position:]
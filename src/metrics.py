@@ -0,0 +1,118 @@
+import contextlib
+import json
+import threading
+import time
+
+from collections.abc import Iterator
+from pathlib import Path
+
+
+class Metrics():
+    def __init__(self) -> None:
+        """Lightweight timers and counters for finding out which step of the program is slow.
+
+        Timers keep how often a step ran, the total time spent in it and its slowest run, and counters keep
+        running totals like the number of directories created. Both are only touched once per step (a file
+        load, a batch of directories, a menu action), never once per directory, so they are always on.
+
+        Use the shared instance METRICS instead of creating new ones, so every module reports to the same place.
+        Background tasks record to it from their own threads, so every change and read holds lock.
+        """
+        # each timer is [calls, total seconds, slowest seconds]
+        self.timers:dict[str, list] = {}
+        self.counters:dict[str, int] = {}
+        self.lock:threading.Lock = threading.Lock()
+
+    def count(self, name:str, amount:int=1) -> None:
+        """Add amount to the counter name, creating it if needed."""
+        if amount:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, name:str, seconds:float) -> None:
+        """Record one run of the timer name that took seconds."""
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name:str) -> Iterator[None]:
+        """Time the code inside of a with block, or every call of a function when used as a decorator.
+
+        The time is recorded even if the code raises an error.
+
+        :param name: The name of the timer, like "parse tree file".
+        :type name: str
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def reset(self) -> None:
+        """Forget every timer and counter."""
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def to_dict(self) -> dict[str, dict]:
+        """Return the timers and counters in the format saved by save_json(), with times in milliseconds.
+
+        :returns: {"timers": {name: {"calls": ..., "total_ms": ..., "max_ms": ...}}, "counters": {name: ...}}
+        :rtype: dict[str, dict]
+        """
+        with self.lock:
+            return {
+                "timers": {name: {"calls": calls, "total_ms": round(total * 1000, 3), "max_ms": round(slowest * 1000, 3)}
+                           for name, (calls, total, slowest) in self.timers.items()},
+                "counters": dict(self.counters),
+                }
+
+    def save_json(self, file_name:str) -> Path:
+        """Save the timers and counters as JSON inside of the data folder, for analysing them later.
+
+        :param file_name: The name of the file to save to.
+        :type file_name: str
+        :returns: The path of the saved file.
+        :rtype: Path
+        """
+        metrics_path = Path(__file__).resolve().parent.parent / "data" / file_name
+        with open(metrics_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+            file.write("\n")
+        return metrics_path
+
+    def get_report(self) -> str:
+        """Return the timers, slowest in total first, and the counters as text, one per line."""
+        # copied under the lock, so the report is formatted without holding up the threads that record
+        with self.lock:
+            timers = {name: tuple(timer) for name, timer in self.timers.items()}
+            counters = dict(self.counters)
+
+        if not timers and not counters:
+            return "Nothing has been measured yet."
+
+        report_lines:list[str] = []
+        if timers:
+            name_width = max(len(name) for name in timers)
+            report_lines.append(f"{'Timer':<{name_width}}  {'calls':>6}  {'total ms':>10}  {'max ms':>10}")
+            for name, (calls, total, slowest) in sorted(timers.items(), key=lambda item: item[1][1], reverse=True):
+                report_lines.append(f"{name:<{name_width}}  {calls:>6}  {total * 1000:>10.1f}  {slowest * 1000:>10.1f}")
+
+        if counters:
+            if report_lines:
+                report_lines.append("")
+            report_lines.append("Counters:")
+            report_lines.extend(f"  {name}: {count:,}" for name, count in sorted(counters.items()))
+
+        return "\n".join(report_lines)
+
+
+# The instance every module records to.
+METRICS:Metrics = Metrics()
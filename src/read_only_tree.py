@@ -0,0 +1,276 @@
+import bisect
+import mmap
+import sys
+
+from collections.abc import Iterator
+
+from directory_asset import NO_CHILDREN, parse_url_info
+from search_index import BACKGROUND_INDEX_MIN_NAMES, SearchIndex, SearchIndexBuilder
+from tree_snapshot import (COMPRESSION_TYPES, NAME_SEPARATOR, SNAPSHOT_HEADER, from_little_endian, get_snapshot_path,
+                           read_snapshot_header)
+
+
+# how many bytes one item of each section takes up
+SECTION_ITEM_SIZES:dict[str, int] = {"i": 4, "I": 4, "Q": 8}
+
+
+class ReadOnlyTree():
+    def __init__(self, snapshot_file_name:str) -> None:
+        """Open a snapshot for browsing without creating a DirectoryAsset for every directory.
+
+        The snapshot is memory-mapped, so only the pages that are actually browsed are read from disk. This only
+        works with snapshots saved with compression "none". Compressed snapshots are refused instead of being
+        decompressed into memory, which would cost as much memory as the whole body and lose the point of mapping it.
+        Directories are handed out as ReadOnlyDirectory objects, which are created on demand.
+
+        A ReadOnlyTree can be used in place of DirectoryAsset.master_list, since it supports len() and get().
+
+        :param snapshot_file_name: The name of the snapshot file, inside of the data folder.
+        :type snapshot_file_name: str
+        :raises ValueError: If the file is not a snapshot, was saved before version 2, or is compressed.
+        """
+        self.snapshot_file_name:str = snapshot_file_name
+
+        with open(get_snapshot_path(snapshot_file_name), "rb") as file:
+            version, compression, self.node_count = read_snapshot_header(file.read(SNAPSHOT_HEADER.size), snapshot_file_name)
+            if version < 2:
+                raise ValueError(f"[!] {snapshot_file_name} is too old to be opened read-only. Load it with -S and save it again.")
+            if not self.node_count:
+                raise ValueError(f"[!] {snapshot_file_name} does not contain any directories.")
+
+            if compression != COMPRESSION_TYPES["none"]:
+                compression_name = next(name for name, value in COMPRESSION_TYPES.items() if value == compression)
+                raise ValueError(f"[!] {snapshot_file_name} is {compression_name} compressed, so it cannot be memory-mapped. "
+                                 "Load it with -S and save it again with --snapshot_compression none.")
+
+            self.mapped_file:mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            body:memoryview = memoryview(self.mapped_file)[SNAPSHOT_HEADER.size:]
+
+        # the sections of the body, in the order they are written by save_snapshot()
+        count = self.node_count
+        self.parents = self.read_section(body, "i", 0, count)
+        self.name_offsets = self.read_section(body, "Q", count * 4, count + 1)
+        self.names_start:int = count * 4 + (count + 1) * 8
+        sizes_start = self.names_start + self.name_offsets[-1]
+        self.subtree_sizes = self.read_section(body, "I", sizes_start, count)
+        self.sorted_indexes = self.read_section(body, "I", sizes_start + count * 4, count)
+        self.body:memoryview = body
+
+        self.root:ReadOnlyDirectory = ReadOnlyDirectory(self, 0)
+        # only created once something is searched for
+        self.search_index:SearchIndex = None
+        # builds search_index in the background for large snapshots, see search()
+        self.index_builder:SearchIndexBuilder = None
+
+    def read_section(self, body:memoryview, typecode:str, start:int, count:int) -> memoryview:
+        """Return a section of the body as a sequence of numbers, without copying it on little-endian machines."""
+        section = body[start:start + count * SECTION_ITEM_SIZES[typecode]]
+        if sys.byteorder == "big":
+            return memoryview(from_little_endian(typecode, section))
+        return section.cast(typecode)
+
+    def __len__(self) -> int:
+        return self.node_count
+
+    def __contains__(self, name:str) -> bool:
+        return self.find_index(name) is not None
+
+    def close(self) -> None:
+        """Release the memory-mapped file. Directories from this tree cannot be used afterwards."""
+        if self.index_builder:
+            self.index_builder.cancel()
+            self.index_builder = None
+        for section in (self.parents, self.name_offsets, self.subtree_sizes, self.sorted_indexes, self.body):
+            section.release()
+        self.mapped_file.close()
+
+    def get_encoded_name(self, index:int) -> bytes:
+        start = self.names_start + self.name_offsets[index]
+        end = self.names_start + self.name_offsets[index + 1] - len(NAME_SEPARATOR)
+        return bytes(self.body[start:end])
+
+    def get_name(self, index:int) -> str:
+        return self.get_encoded_name(index).decode()
+
+    def get_all_names(self) -> list[str]:
+        """Return the name of every directory, in index order, decoding the name table at once."""
+        name_table = bytes(self.body[self.names_start:self.names_start + self.name_offsets[-1]])
+        return name_table.decode().split(NAME_SEPARATOR.decode())[:-1]
+
+    def find_index(self, name:str) -> int:
+        """Return the index of the directory called name with a binary search over the name-ordered index, or None."""
+        encoded_name = name.encode()
+        position = bisect.bisect_left(self.sorted_indexes, encoded_name, key=self.get_encoded_name)
+
+        if position < self.node_count and self.get_encoded_name(self.sorted_indexes[position]) == encoded_name:
+            return self.sorted_indexes[position]
+        return None
+
+    def get(self, name:str, default:"ReadOnlyDirectory"=None) -> "ReadOnlyDirectory":
+        """Return the directory called name, or default if it is not in the snapshot.
+
+        :param name: The directory name.
+        :type name: str
+        :param default: The value to return if name is not in the snapshot. DEFAULTS to None.
+        :type default: ReadOnlyDirectory
+        :returns: The directory or default.
+        :rtype: ReadOnlyDirectory
+        """
+        index = self.find_index(name)
+        if index is None:
+            return default
+        return ReadOnlyDirectory(self, index)
+
+    def search(self, query:str, limit:int=20, wait_for_index:bool=False) -> list["ReadOnlyDirectory"]:
+        """Return the directories whose names best match query. See DirectoryRegistry.search().
+
+        The search index is built from every name in the snapshot on the first search, in the background for
+        large snapshots. Until it is done, every name is scanned instead, unless wait_for_index is True.
+        """
+        if self.search_index is None:
+            if self.index_builder is None and self.node_count < BACKGROUND_INDEX_MIN_NAMES:
+                self.search_index = SearchIndex(self.get_name(index) for index in range(self.node_count))
+            else:
+                if self.index_builder is None:
+                    self.index_builder = SearchIndexBuilder(self.get_all_names())
+                self.search_index = self.index_builder.get_index(wait=wait_for_index)
+                if self.search_index is None:
+                    return [self.get(name) for name in self.index_builder.search(query, limit)]
+                self.index_builder = None
+
+        return [self.get(name) for name in self.search_index.search(query, limit)]
+
+    def iter_child_indexes(self, index:int) -> Iterator[int]:
+        """Yield the indexes of the children of a directory.
+
+        Directories are stored in pre-order, so the first child directly follows its parent and each following
+        child comes right after the subtree of the previous one.
+        """
+        child_index = index + 1
+        end = index + self.subtree_sizes[index]
+        while child_index < end:
+            yield child_index
+            child_index += self.subtree_sizes[child_index]
+
+    def get_level(self, index:int) -> int:
+        """Return the level of a directory, matching DirectoryAsset.level (the root is 2, and each child adds 2)."""
+        level = 2
+        while self.parents[index] >= 0:
+            index = self.parents[index]
+            level += 2
+        return level
+
+
+class ReadOnlyDirectory():
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree:ReadOnlyTree, index:int) -> None:
+        """A lightweight, read-only stand-in for a DirectoryAsset that lives inside of a ReadOnlyTree.
+
+        It provides the parts of the DirectoryAsset interface that are used for browsing. Everything is read from
+        the snapshot when it is asked for, so creating one is cheap.
+
+        :param tree: The tree this directory belongs to.
+        :type tree: ReadOnlyTree
+        :param index: The pre-order index of this directory inside of the snapshot.
+        :type index: int
+        """
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other:object) -> bool:
+        return isinstance(other, ReadOnlyDirectory) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    @property
+    def name(self) -> str:
+        return self.tree.get_name(self.index)
+
+    @property
+    def level(self) -> int:
+        return self.tree.get_level(self.index)
+
+    @property
+    def parent(self) -> "ReadOnlyDirectory":
+        parent_index = self.tree.parents[self.index]
+        if parent_index < 0:
+            return None
+        return ReadOnlyDirectory(self.tree, parent_index)
+
+    @property
+    def has_children(self) -> bool:
+        """If self has any children. Unlike children, this only reads the subtree size of self, so it is O(1)."""
+        return self.tree.subtree_sizes[self.index] > 1
+
+    @property
+    def children(self) -> dict[str, "ReadOnlyDirectory"]:
+        """The children of self, read from the snapshot each time this is accessed. Use has_children to only check if there are any."""
+        if self.tree.subtree_sizes[self.index] == 1:
+            return NO_CHILDREN
+
+        children = (ReadOnlyDirectory(self.tree, child_index) for child_index in self.tree.iter_child_indexes(self.index))
+        return {child.name: child for child in children}
+
+    def get_asset_list_string(self, first_call=True) -> str:
+        """Return the directory tree as a string from the perspective of self. See DirectoryAsset.get_asset_list_string()."""
+        return "".join(self.iter_asset_lines(include_self=first_call))
+
+    def iter_asset_lines(self, include_self:bool=True) -> Iterator[str]:
+        """Return a generator that yields the directory tree from the perspective of self, one line at a time.
+
+        The lines match DirectoryAsset.iter_asset_lines(). Since a subtree is stored as one contiguous pre-order
+        range of the snapshot, the lines are produced by reading that range from start to end.
+
+        :param include_self: If the name of self should be the first line yielded. DEFAULTS to True.
+        :type include_self: bool
+        :returns: A generator of newline terminated lines.
+        :rtype: Iterator[str]
+        """
+        if self.tree.subtree_sizes[self.index] == 1:
+            raise IndexError(f"[!] No subdirectories found for {self.name}")
+
+        return self._walk_asset_lines(include_self)
+
+    def _walk_asset_lines(self, include_self:bool) -> Iterator[str]:
+        tree = self.tree
+        if include_self:
+            yield "- " + self.name + "\n"
+
+        # each entry is the level of an open directory and the index where its subtree ends
+        stack:list[tuple[int, int]] = [(self.level, self.index + tree.subtree_sizes[self.index])]
+
+        for index in range(self.index + 1, stack[0][1]):
+            while stack[-1][1] <= index:
+                stack.pop()
+
+            parent_level = stack[-1][0]
+            yield " " * parent_level + "- " + tree.get_name(index) + "\n"
+            if tree.subtree_sizes[index] > 1:
+                stack.append((parent_level + 2, index + tree.subtree_sizes[index]))
+
+    def get_asset_details(self) -> str:
+        """Return the details of self. See DirectoryAsset.get_asset_details()."""
+        return_string = ""
+        return_string += f"Name: {self.name}\n"
+        if self.parent:
+            return_string += f"Parent: {self.parent.name}\n"
+        return_string += f"Number of children: {sum(1 for _ in self.tree.iter_child_indexes(self.index))}\n"
+        return_string += f"Number of subdirectories: {self.tree.subtree_sizes[self.index] - 1}\n"
+
+        scheme, netloc, path, params, query, fragment = parse_url_info(self.name)
+        if scheme:
+            return_string += f"\nScheme: {scheme}"
+        if netloc:
+            return_string += f"\nNetloc: {netloc}"
+        if path:
+            return_string += f"\nPath: {path}"
+        if params:
+            return_string += f"\nParams: {params}"
+        if query:
+            return_string += f"\nQuery: {query}"
+        if fragment:
+            return_string += f"\nFragment: {fragment}"
+
+        return return_string
@@ -0,0 +1,177 @@
+import copy
+import re
+
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from urllib.parse import urlsplit
+
+
+# The schemes a ScopeFilter keeps when none are given. Relative urls have no scheme and are always kept.
+DEFAULT_SCOPE_SCHEMES:tuple[str, ...] = ("http", "https")
+
+# The flags of a pattern that sets none of its own, which can be joined with other patterns into one
+PLAIN_PATTERN_FLAGS:int = re.compile("").flags
+
+
+def compile_rule_patterns(patterns:Iterable[str]) -> list[tuple[re.Pattern, int]]:
+    """Compile regular expressions into as few patterns as possible, each paired with the position of its rule.
+
+    The patterns without groups or flags of their own are joined into one, each inside of a group named after its
+    position, so a single search checks all of them and match.lastgroup tells which one it was. That pattern is paired
+    with None. A pattern with groups is compiled on its own, since joining it would renumber its groups and break
+    backreferences like (a)\1, and so is one with flags like (?i), which only work at the start of a pattern.
+
+    :param patterns: The regular expressions.
+    :type patterns: Iterable[str]
+    :returns: The compiled patterns and the position of their rule, or None for the joined pattern.
+    :rtype: list[tuple[re.Pattern, int]]
+    :raises ValueError: If one of the patterns is not a valid regular expression.
+    """
+    rule_patterns = []
+    joined_patterns = []
+    for index, pattern in enumerate(patterns):
+        try:
+            compiled_pattern = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"[!] Invalid scope pattern {pattern} - {e}") from e
+
+        if compiled_pattern.groups or compiled_pattern.flags != PLAIN_PATTERN_FLAGS:
+            rule_patterns.append((compiled_pattern, index))
+        else:
+            joined_patterns.append(f"(?P<rule{index}>{pattern})")
+
+    if joined_patterns:
+        rule_patterns.insert(0, (re.compile("|".join(joined_patterns)), None))
+    return rule_patterns
+
+
+def search_rule_patterns(rule_patterns:list[tuple[re.Pattern, int]], url:str) -> int:
+    """Return the position of a rule from compile_rule_patterns() whose pattern is found in url, or None if there is none."""
+    for rule_pattern, index in rule_patterns:
+        match = rule_pattern.search(url)
+        if match:
+            return int(match.lastgroup.removeprefix("rule")) if index is None else index
+    return None
+
+
+class ScopeFilter():
+    def __init__(self, hosts:Iterable[str]=(), path_prefixes:Iterable[str]=(), include_patterns:Iterable[str]=(),
+                 exclude_patterns:Iterable[str]=(), schemes:Iterable[str]=DEFAULT_SCOPE_SCHEMES) -> None:
+        """Create a filter that decides which urls are in scope of an engagement.
+
+        The rules are compiled once into sets, tuples and as few regular expressions per rule type as possible
+        (see compile_rule_patterns()), so checking a url costs one urlsplit() plus a few lookups.
+        A url is kept if it passes every rule that was given:
+            - schemes: its scheme is one of schemes. This drops "mailto:", "javascript:" and the like.
+            - hosts: its host is one of hosts. "*.example.com" allows every subdomain of example.com.
+            - path_prefixes: its path starts with one of path_prefixes, like "/app".
+            - include_patterns: one of the regular expressions is found in it.
+            - exclude_patterns: none of the regular expressions are found in it.
+        Relative urls have no scheme or host, so they always pass those two rules.
+
+        Every url that is dropped is counted under the rule that dropped it (see dropped_counts).
+
+        :param hosts: The hosts that are in scope. DEFAULTS to every host.
+        :type hosts: Iterable[str]
+        :param path_prefixes: The paths that are in scope. DEFAULTS to every path.
+        :type path_prefixes: Iterable[str]
+        :param include_patterns: Regular expressions, one of which must be found in a url. DEFAULTS to none.
+        :type include_patterns: Iterable[str]
+        :param exclude_patterns: Regular expressions that must not be found in a url. DEFAULTS to none.
+        :type exclude_patterns: Iterable[str]
+        :param schemes: The schemes that are in scope. DEFAULTS to DEFAULT_SCOPE_SCHEMES.
+        :type schemes: Iterable[str]
+        :raises ValueError: If one of the patterns is not a valid regular expression.
+        """
+        self.schemes:frozenset[str] = frozenset(scheme.lower() for scheme in schemes)
+
+        hosts = [host.lower() for host in hosts]
+        self.exact_hosts:frozenset[str] = frozenset(host for host in hosts if not host.startswith("*."))
+        # "*.example.com" is stored as ".example.com", so str.endswith() can check every wildcard at once
+        self.host_suffixes:tuple[str, ...] = tuple(host[1:] for host in hosts if host.startswith("*."))
+        self.path_prefixes:tuple[str, ...] = tuple(path_prefixes)
+
+        self.include_patterns:list[str] = list(include_patterns)
+        self.exclude_patterns:list[str] = list(exclude_patterns)
+        self.include_rule_patterns:list[tuple[re.Pattern, int]] = compile_rule_patterns(self.include_patterns)
+        self.exclude_rule_patterns:list[tuple[re.Pattern, int]] = compile_rule_patterns(self.exclude_patterns)
+
+        self.dropped_counts:Counter = Counter()
+        self.kept_count:int = 0
+
+    @property
+    def dropped_count(self) -> int:
+        return sum(self.dropped_counts.values())
+
+    def copy(self) -> "ScopeFilter":
+        """Return a filter with the same rules that has not counted anything yet, like for filtering in a worker process."""
+        scope_filter = copy.copy(self)
+        scope_filter.dropped_counts = Counter()
+        scope_filter.kept_count = 0
+        return scope_filter
+
+    def add_counts(self, scope_filter:"ScopeFilter") -> None:
+        """Add what a copy() of this filter counted to the counts of this filter."""
+        self.dropped_counts.update(scope_filter.dropped_counts)
+        self.kept_count += scope_filter.kept_count
+
+    def get_drop_rule(self, url:str) -> str:
+        """Return the name of the first rule url breaks, or None if url is in scope.
+
+        :param url: The url to check.
+        :type url: str
+        :returns: "scheme", "host", "path", "include" or "exclude <pattern>", or None.
+        :rtype: str
+        """
+        try:
+            scheme, netloc, path, query, fragment = urlsplit(url)
+        except ValueError:
+            return "scheme"
+
+        if scheme and scheme.lower() not in self.schemes:
+            return "scheme"
+
+        if netloc and (self.exact_hosts or self.host_suffixes):
+            host = netloc.rpartition("@")[2].lower()
+            # removing the port, without mistaking the colons of an IPv6 address for one
+            if host.rfind(":") > host.rfind("]"):
+                host = host.rsplit(":", 1)[0]
+            if host not in self.exact_hosts and not host.endswith(self.host_suffixes):
+                return "host"
+
+        if self.path_prefixes and not (path or "/").startswith(self.path_prefixes):
+            return "path"
+
+        if self.include_rule_patterns and search_rule_patterns(self.include_rule_patterns, url) is None:
+            return "include"
+
+        if self.exclude_rule_patterns:
+            index = search_rule_patterns(self.exclude_rule_patterns, url)
+            if index is not None:
+                return "exclude " + self.exclude_patterns[index]
+
+        return None
+
+    def filter(self, urls:Iterable[str]) -> Iterator[str]:
+        """Yield the urls that are in scope, counting the ones that are dropped.
+
+        :param urls: The urls to check.
+        :type urls: Iterable[str]
+        :returns: A generator of the urls that are in scope, in the same order.
+        :rtype: Iterator[str]
+        """
+        get_drop_rule = self.get_drop_rule
+        for url in urls:
+            drop_rule = get_drop_rule(url)
+            if drop_rule:
+                self.dropped_counts[drop_rule] += 1
+            else:
+                self.kept_count += 1
+                yield url
+
+    def get_summary(self) -> str:
+        """Return a one line summary of how many urls were kept and how many each rule dropped."""
+        summary = f"[+] Scope: kept {self.kept_count} urls, dropped {self.dropped_count}"
+        if self.dropped_counts:
+            summary += " (" + ", ".join(f"{rule}: {count}" for rule, count in self.dropped_counts.most_common()) + ")"
+        return summary + "."
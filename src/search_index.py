@@ -0,0 +1,375 @@
+import bisect
+import collections
+import difflib
+import heapq
+import itertools
+import re
+
+from collections.abc import Iterable, Iterator
+
+from background_task import BackgroundTask
+
+
+# Directory names are split into lowercase runs of letters and runs of numbers, so "item1234" is "item" and "1234".
+TOKEN_PATTERN:re.Pattern = re.compile(r"[a-z]+|[0-9]+")
+
+# Candidate sets larger than this are narrowed down to their shortest names before being ranked.
+RANK_ALL_LIMIT:int = 5000
+# When every query token matches more than RANK_ALL_LIMIT names, the names are checked from the shortest up instead,
+# until enough of them match or this many had to be tokenized.
+LENGTH_SCAN_LIMIT:int = 20000
+# The names of each length are intersected with the names of at most this many of the tokens matching a query token.
+SET_SCAN_TOKEN_LIMIT:int = 20
+# While the index is built, searches rank at most this many matches, so a query like "a" stays as fast as a keystroke.
+SCAN_MATCH_LIMIT:int = 5000
+# Indexes of fewer names than this are built right away, since that takes less time than a keystroke. Larger ones are built in the background.
+BACKGROUND_INDEX_MIN_NAMES:int = 50000
+# Fuzzy matching only compares the query with this many of the words that share the most letter pairs with it.
+FUZZY_CANDIDATE_LIMIT:int = 100
+
+
+def tokenize(name:str) -> list[str]:
+    """Split a directory name into the lowercase tokens it is indexed under.
+
+    :param name: The directory name, usually a URL.
+    :type name: str
+    :returns: The tokens, like ["https", "example", "com", "login"].
+    :rtype: list[str]
+    """
+    return TOKEN_PATTERN.findall(name.lower())
+
+
+def get_letter_pairs(word:str) -> set[str]:
+    """Return the pairs of letters in word that are next to each other or one letter apart.
+
+    A misspelling only changes the pairs around the letters it got wrong, so a word and its misspelling share
+    most of them. The pairs one letter apart keep swapped letters in common, like "ogi" in "login" and "lgoin".
+    """
+    return {word[index:index + 2] for index in range(len(word) - 1)} | {word[index] + word[index + 2] for index in range(len(word) - 2)}
+
+
+def rank_match(name:str, query:str) -> tuple[int, int, str]:
+    """Return the sort key of a name that matches query: exact, then starting with the query, then containing it, then the rest.
+
+    Ties go to the shorter name, then alphabetical order. query must already be stripped and lowercase.
+    """
+    lowercase_name = name.lower()
+    if lowercase_name == query:
+        match_type = 0
+    elif lowercase_name.startswith(query):
+        match_type = 1
+    elif query in lowercase_name:
+        match_type = 2
+    else:
+        match_type = 3
+    return (match_type, len(name), name)
+
+
+class SearchIndex():
+    def __init__(self, names:Iterable[str]=()) -> None:
+        """Create an index of directory names for prefix, substring and fuzzy searches.
+
+        Every name is indexed under its tokens (see tokenize()), so a search only looks at the names that share
+        tokens with the query instead of every name. The index is updated one name at a time with add() and
+        discard(), so it can follow a tree as it changes.
+
+        :param names: The names to start with. DEFAULTS to no names.
+        :type names: Iterable[str]
+        """
+        self.token_names:dict[str, set[str]] = {}
+        # the tokens in sorted order for prefix searches, and the tokens made of letters for substring and fuzzy
+        # searches (numbers are only matched by prefix). Both are rebuilt on the next search after tokens change.
+        self.sorted_tokens:list[str] = []
+        self.sorted_words:list[str] = []
+        self.sorted_tokens_stale:bool = False
+        # the tokens made of letters by the letter pairs in them (see get_letter_pairs()), for substring and fuzzy searches
+        self.pair_words:dict[str, set[str]] = {}
+        # the names by their length, to find the shortest names matching a common token without sorting all of them
+        self.length_names:dict[int, set[str]] = {}
+
+        for name in names:
+            self.add(name)
+
+    def add(self, name:str) -> None:
+        self.length_names.setdefault(len(name), set()).add(name)
+        for token in tokenize(name):
+            token_names = self.token_names.get(token)
+            if token_names is None:
+                self.token_names[token] = {name}
+                self.sorted_tokens_stale = True
+                if token.isalpha():
+                    for pair in get_letter_pairs(token):
+                        self.pair_words.setdefault(pair, set()).add(token)
+            else:
+                token_names.add(name)
+
+    def discard(self, name:str) -> None:
+        length_names = self.length_names.get(len(name))
+        if length_names is not None:
+            length_names.discard(name)
+            if not length_names:
+                del self.length_names[len(name)]
+        for token in tokenize(name):
+            token_names = self.token_names.get(token)
+            if token_names is None:
+                continue
+            token_names.discard(name)
+            if not token_names:
+                del self.token_names[token]
+                self.sorted_tokens_stale = True
+                if token.isalpha():
+                    for pair in get_letter_pairs(token):
+                        pair_words = self.pair_words[pair]
+                        pair_words.discard(token)
+                        if not pair_words:
+                            del self.pair_words[pair]
+
+    def clear(self) -> None:
+        self.token_names.clear()
+        self.sorted_tokens = []
+        self.sorted_words = []
+        self.sorted_tokens_stale = False
+        self.pair_words.clear()
+        self.length_names.clear()
+
+    def get_matching_tokens(self, query_token:str) -> list[str]:
+        """Return the indexed tokens that match one token of a query.
+
+        Tokens starting with query_token are preferred. If there are none and query_token is made of letters,
+        tokens containing it are used, and if there are still none, the closest tokens by spelling (fuzzy matching).
+        Both only look at the words that share letter pairs with query_token (see get_letter_pairs()) instead of
+        every word, and fuzzy matching only compares query_token with the FUZZY_CANDIDATE_LIMIT words sharing the most.
+        """
+        if self.sorted_tokens_stale:
+            self.sorted_tokens = sorted(self.token_names)
+            self.sorted_words = [token for token in self.sorted_tokens if token.isalpha()]
+            self.sorted_tokens_stale = False
+
+        start = bisect.bisect_left(self.sorted_tokens, query_token)
+        # tokens only contain letters and numbers, so "{" sorts after every token starting with query_token
+        end = bisect.bisect_left(self.sorted_tokens, query_token + "{")
+        if start < end or not query_token.isalpha():
+            return self.sorted_tokens[start:end]
+
+        if len(query_token) == 1:
+            substring_tokens = [token for token in self.sorted_words if query_token in token]
+        else:
+            # a word containing query_token has every pair of letters next to each other in it
+            pair_word_sets = sorted((self.pair_words.get(query_token[index:index + 2], set()) for index in range(len(query_token) - 1)), key=len)
+            substring_tokens = sorted(token for token in pair_word_sets[0].intersection(*pair_word_sets[1:]) if query_token in token)
+        if substring_tokens:
+            return substring_tokens
+
+        shared_pair_counts:collections.Counter = collections.Counter()
+        for pair in get_letter_pairs(query_token):
+            shared_pair_counts.update(self.pair_words.get(pair, ()))
+        candidates = heapq.nlargest(FUZZY_CANDIDATE_LIMIT, shared_pair_counts, key=shared_pair_counts.__getitem__)
+        return difflib.get_close_matches(query_token, candidates, n=5, cutoff=0.7)
+
+    def search(self, query:str, limit:int=20) -> list[str]:
+        """Return the names that best match query.
+
+        A name matches if every token of the query matches one of its tokens (see get_matching_tokens()).
+        Matches are ranked by how closely the whole name matches: exact, then starting with the query, then
+        containing the query, then everything else. Ties go to the shorter name, then alphabetical order.
+        When more than RANK_ALL_LIMIT names match, only the shortest of them are ranked, which keeps searches
+        for very common tokens fast. If every query token is that common, the names are checked from the shortest
+        up (see find_shortest_matches()) instead of collecting every match.
+
+        :param query: What to search for, like "login" or "example.com/adm".
+        :type query: str
+        :param limit: The most names to return. DEFAULTS to 20.
+        :type limit: int
+        :returns: The matching names, best match first.
+        :rtype: list[str]
+        """
+        query = query.strip().lower()
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        matching_token_lists:list[list[str]] = []
+        # the longest token is the most selective, so it is looked up first
+        for query_token in sorted(set(query_tokens), key=len, reverse=True):
+            matching_tokens = self.get_matching_tokens(query_token)
+            if not matching_tokens:
+                return []
+            matching_token_lists.append(matching_tokens)
+
+        # how many names match each query token, counting the names with several of its matching tokens more than once
+        match_counts = [sum(len(self.token_names[token]) for token in matching_tokens) for matching_tokens in matching_token_lists]
+        if min(match_counts) > RANK_ALL_LIMIT:
+            selective_token_lists = [matching_tokens for _, matching_tokens in sorted(zip(match_counts, matching_token_lists), key=lambda pair: pair[0])]
+            shortest_matches = self.find_shortest_matches(selective_token_lists, limit * 10)
+            if shortest_matches is not None:
+                return heapq.nsmallest(limit, shortest_matches, key=lambda name: rank_match(name, query))
+
+        candidate_sets:list[set[str]] = []
+        for matching_tokens in matching_token_lists:
+            if len(matching_tokens) == 1:
+                candidate_sets.append(self.token_names[matching_tokens[0]])
+            else:
+                candidate_sets.append(set().union(*(self.token_names[token] for token in matching_tokens)))
+
+        candidate_sets.sort(key=len)
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:]) if len(candidate_sets) > 1 else candidate_sets[0]
+        if len(candidates) > RANK_ALL_LIMIT:
+            candidates = heapq.nsmallest(limit * 10, candidates, key=len)
+
+        return heapq.nsmallest(limit, candidates, key=lambda name: rank_match(name, query))
+
+    def find_shortest_matches(self, matching_token_lists:list[list[str]], count:int) -> list[str]:
+        """Return the count shortest names that have one of the tokens of each list, checking the names from the shortest up.
+
+        This is much faster than collecting every match when most names match, like for "a" or "https". The names of
+        each length are narrowed down with set intersections by the names of the SET_SCAN_TOKEN_LIMIT most common tokens
+        of each list. The names of the other tokens of the first list are put together beforehand, so it should be the
+        most selective list. For the other lists, the names left are tokenized instead. Returns None if LENGTH_SCAN_LIMIT
+        names had to be tokenized, since the matches are then rare enough to be collected from the index.
+        """
+        first_token_names = sorted((self.token_names[token] for token in matching_token_lists[0]), key=len, reverse=True)
+        if len(first_token_names) > SET_SCAN_TOKEN_LIMIT:
+            first_token_names[SET_SCAN_TOKEN_LIMIT - 1:] = [set().union(*first_token_names[SET_SCAN_TOKEN_LIMIT - 1:])]
+        # for each other list, the names of its most common tokens, and its other tokens
+        other_token_checks:list[tuple[list[set[str]], set[str]]] = []
+        for matching_tokens in matching_token_lists[1:]:
+            common_tokens = sorted(matching_tokens, key=lambda token: len(self.token_names[token]), reverse=True)
+            common_token_names = [self.token_names[token] for token in common_tokens[:SET_SCAN_TOKEN_LIMIT]]
+            rare_tokens = set(common_tokens[SET_SCAN_TOKEN_LIMIT:])
+            # rare tokens with few names between them are cheaper to put together than to look for in every name
+            if sum(len(self.token_names[token]) for token in rare_tokens) <= RANK_ALL_LIMIT:
+                common_token_names.append(set().union(*(self.token_names[token] for token in rare_tokens)))
+                rare_tokens = set()
+            other_token_checks.append((common_token_names, rare_tokens))
+
+        shortest_matches:list[str] = []
+        checked_names = 0
+        for length in sorted(self.length_names):
+            length_matches = set().union(*(self.length_names[length].intersection(token_names) for token_names in first_token_names))
+            for common_token_names, rare_tokens in other_token_checks:
+                matches = set().union(*(length_matches.intersection(token_names) for token_names in common_token_names))
+                if rare_tokens:
+                    for name in length_matches - matches:
+                        checked_names += 1
+                        if checked_names > LENGTH_SCAN_LIMIT:
+                            return None
+                        if not rare_tokens.isdisjoint(tokenize(name)):
+                            matches.add(name)
+                length_matches = matches
+            shortest_matches.extend(itertools.islice(length_matches, count - len(shortest_matches)))
+            if len(shortest_matches) == count:
+                break
+        return shortest_matches
+
+
+class NameScanner():
+    def __init__(self, names:list[str]) -> None:
+        """Search a fixed list of names without an index, for searching while the index is still being built.
+
+        The lowercase names are joined into one text, so finding a query token is a str.find() over it
+        instead of a Python loop over every name. A name matches if it contains every token of the query.
+        Unlike SearchIndex.search(), close misspellings do not match.
+
+        :param names: The names to search. Names cannot contain a newline.
+        :type names: list[str]
+        """
+        self.names = names
+        self.text:str = "\n".join(names).lower()
+        name_lengths = map(len, names)
+        if len(self.text) != sum(map(len, names)) + len(names) - 1:
+            # a few characters have a lowercase form of another length, so lowercase the names one by one
+            lowercase_names = [name.lower() for name in names]
+            self.text = "\n".join(lowercase_names)
+            name_lengths = map(len, lowercase_names)
+        # where each name starts in text, to find the name a match is in
+        self.name_starts:list[int] = list(itertools.accumulate((length + 1 for length in name_lengths), initial=0))
+
+    def iter_matches(self, query_tokens:list[str]) -> Iterator[str]:
+        """Yield every name containing all of query_tokens, once each, in the order of names."""
+        # counting is done in C, so it is much cheaper than checking the names found by a common token
+        rarest_token = min(query_tokens, key=self.text.count)
+        position = self.text.find(rarest_token)
+        while position != -1:
+            index = bisect.bisect_right(self.name_starts, position) - 1
+            next_start = self.name_starts[index + 1]
+            lowercase_name = self.text[self.name_starts[index]:next_start - 1]
+            if all(query_token in lowercase_name for query_token in query_tokens):
+                yield self.names[index]
+            position = self.text.find(rarest_token, next_start)
+
+
+class SearchIndexBuilder():
+    def __init__(self, names:list[str]) -> None:
+        """Build a SearchIndex on a worker thread, so the first search of a large tree does not freeze the UI.
+
+        names is read on the worker thread, so it must not change while the index is built (pass a copy).
+        Names that are added or removed in the meantime are recorded with add() and discard(), and applied
+        to the index once it is done. Until then, search() scans the names instead.
+
+        :param names: The names to index.
+        :type names: list[str]
+        """
+        # each change is a name and whether it was added (True) or removed (False)
+        self.changes:list[tuple[str, bool]] = []
+        self.scanner:NameScanner = NameScanner(names)
+        self.task:BackgroundTask = BackgroundTask("Indexing directories", lambda task: SearchIndex(task.track(names)),
+                                                  total_nodes=len(names), timer_name="build search index")
+
+    def add(self, name:str) -> None:
+        self.changes.append((name, True))
+
+    def discard(self, name:str) -> None:
+        self.changes.append((name, False))
+
+    def cancel(self) -> None:
+        """Stop building the index, and wait until the worker thread stopped reading names."""
+        self.task.cancel()
+        self.task.wait()
+
+    def search(self, query:str, limit:int=20) -> list[str]:
+        """Return the names that best match query by scanning them, including the changes made since the build started.
+
+        Only the first SCAN_MATCH_LIMIT matches are ranked (like SearchIndex.search(), see rank_match()), so a
+        query that matches many names gets good matches rather than the best ones until the index is done.
+
+        :param query: What to search for.
+        :type query: str
+        :param limit: The most names to return. DEFAULTS to 20.
+        :type limit: int
+        :returns: The matching names, best match first.
+        :rtype: list[str]
+        """
+        query = query.strip().lower()
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        # the last change of a name decides whether it is still there
+        changed_names = dict(self.changes)
+        scanned_names = itertools.islice(self.scanner.iter_matches(query_tokens), SCAN_MATCH_LIMIT)
+        matches = {name for name in scanned_names if changed_names.get(name, True)}
+        matches.update(name for name, added in changed_names.items()
+                       if added and all(query_token in name.lower() for query_token in query_tokens))
+        return heapq.nsmallest(limit, matches, key=lambda name: rank_match(name, query))
+
+    def get_index(self, wait:bool=False) -> SearchIndex:
+        """Return the index, with every change recorded so far applied, or None if it is not done yet.
+
+        :param wait: If True, waits for the index instead of returning None. DEFAULTS to False.
+        :type wait: bool
+        :returns: The index or None.
+        :rtype: SearchIndex
+        """
+        if wait:
+            self.task.wait()
+        elif not self.task.done:
+            return None
+
+        search_index = self.task.get_result()
+        for name, added in self.changes:
+            if added:
+                search_index.add(name)
+            else:
+                search_index.discard(name)
+        self.changes.clear()
+        return search_index
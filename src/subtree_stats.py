@@ -0,0 +1,139 @@
+import heapq
+import sys
+
+from collections.abc import Iterable
+
+
+def get_url_categories(name:str) -> tuple[str, str, str]:
+    """Return the scheme, host and file extension a directory name is counted under, each an empty string if it has none.
+
+    This is called for every directory that is added or removed, so it splits the name with str methods instead of urlsplit().
+    "https://example.com/img/logo.PNG?v=2" returns ("https", "example.com", ".png").
+
+    :param name: The directory name, usually a url.
+    :type name: str
+    :returns: The scheme, host and lowercase extension.
+    :rtype: tuple[str, str, str]
+    """
+    scheme, separator, rest = name.partition("://")
+    if separator:
+        netloc, slash, path = rest.partition("/")
+        host = netloc.partition("?")[0].partition("#")[0].rpartition("@")[2].lower()
+    else:
+        # relative urls, and urls like "mailto:" that have a scheme but no host
+        scheme, separator, path = name.partition(":")
+        if not separator or not scheme.isalpha():
+            scheme, path = "", name
+        else:
+            path = ""  # "mailto:a@example.com" does not point to a file
+        host = ""
+
+    last_segment = path.partition("?")[0].partition("#")[0].rpartition("/")[2]
+    dot_index = last_segment.rfind(".")
+    extension = last_segment[dot_index:].lower() if dot_index > 0 else ""
+
+    # the same few schemes and hosts are counted in every node, so they share one string each
+    return sys.intern(scheme.lower()) if scheme else "", sys.intern(host), extension
+
+
+def get_tallest(directories:Iterable["DirectoryAsset"]) -> tuple[int, int]:
+    """Return the tallest height + 1 of directories, and how many of them are that tall. (0, 0) if there are none.
+
+    :param directories: The directories, usually a batch of children that was added or removed.
+    :type directories: Iterable[DirectoryAsset]
+    :returns: The tallest height + 1 and the number of directories with it.
+    :rtype: tuple[int, int]
+    """
+    tallest_height:int = 0
+    tallest_count:int = 0
+    for directory in directories:
+        height = directory.height + 1
+        if height > tallest_height:
+            tallest_height, tallest_count = height, 1
+        elif height == tallest_height:
+            tallest_count += 1
+    return tallest_height, tallest_count
+
+
+class SubtreeStats():
+    __slots__ = ("descendant_count", "height", "tallest_count", "schemes", "hosts", "extensions")
+
+    def __init__(self) -> None:
+        """Aggregate statistics of everything below a directory, not including the directory itself.
+
+        DirectoryAsset keeps one of these for every directory with children and updates it as directories are
+        added and removed below it, so reading the statistics of any subtree never walks the subtree.
+
+        descendant_count is the number of directories below, height the number of levels below (0 for a directory
+        without children), tallest_count the number of children that are height - 1 levels tall, and schemes, hosts and extensions count the directories below by each of those
+        (see get_url_categories()). Directories without a scheme, host or extension are not counted there.
+        Plain dicts are used instead of Counters, since there is one of these for every directory with children.
+        """
+        self.descendant_count:int = 0
+        self.height:int = 0
+        self.tallest_count:int = 0
+        self.schemes:dict[str, int] = {}
+        self.hosts:dict[str, int] = {}
+        self.extensions:dict[str, int] = {}
+
+    @classmethod
+    def from_directories(cls, directories:Iterable["DirectoryAsset"]) -> "SubtreeStats":
+        """Return the statistics of directories and everything below them, each directory included.
+
+        :param directories: The directories, usually a batch of children that was added or removed.
+        :type directories: Iterable[DirectoryAsset]
+        :returns: The statistics. The height and tallest_count are left at 0.
+        :rtype: SubtreeStats
+        """
+        stats = cls()
+        schemes, hosts, extensions = stats.schemes, stats.hosts, stats.extensions
+
+        for directory in directories:
+            scheme, host, extension = get_url_categories(directory.name)
+            stats.descendant_count += 1
+            if scheme:
+                schemes[scheme] = schemes.get(scheme, 0) + 1
+            if host:
+                hosts[host] = hosts.get(host, 0) + 1
+            if extension:
+                extensions[extension] = extensions.get(extension, 0) + 1
+
+            if directory._stats:
+                stats.merge(directory._stats)
+
+        return stats
+
+    def merge(self, change:"SubtreeStats", sign:int=1) -> None:
+        """Add the counts of change to self, or subtract them if sign is -1. The height and tallest_count are not changed."""
+        self.descendant_count += sign * change.descendant_count
+        for counts, change_counts in ((self.schemes, change.schemes), (self.hosts, change.hosts), (self.extensions, change.extensions)):
+            for key, count in change_counts.items():
+                new_count = counts.get(key, 0) + sign * count
+                if new_count > 0:
+                    counts[key] = new_count
+                else:
+                    del counts[key]
+
+    def get_report(self, limit:int=10) -> str:
+        """Return the statistics as text, listing at most limit of the most common schemes, hosts and extensions.
+
+        :param limit: The most entries listed per category. DEFAULTS to 10.
+        :type limit: int
+        :returns: The report, one statistic per line.
+        :rtype: str
+        """
+        report_lines = [
+            f"Number of subdirectories: {self.descendant_count}",
+            f"Depth of subtree: {self.height}",
+            ]
+
+        for title, counts in (("Schemes", self.schemes), ("Hosts", self.hosts), ("Extensions", self.extensions)):
+            if not counts:
+                continue
+            report_lines.append("")
+            report_lines.append(f"{title} ({len(counts)}):")
+            report_lines.extend(f"  {key}: {count}" for key, count in heapq.nlargest(limit, counts.items(), key=lambda item: item[1]))
+            if len(counts) > limit:
+                report_lines.append(f"  ... and {len(counts) - limit} more")
+
+        return "\n".join(report_lines)
@@ -0,0 +1,182 @@
+import json
+
+from pathlib import Path
+
+from background_task import BackgroundTask
+from directory_asset import DirectoryAsset
+from tree_snapshot import get_snapshot_path, load_snapshot, save_snapshot
+
+
+class TreeJournal():
+    def __init__(self, journal_name:str, compact_every:int=500) -> None:
+        """Create an append-only journal of the changes made to a directory tree.
+
+        Each change is written to data/<journal_name>.journal as one JSON line as soon as it happens, so saving
+        costs as much as the change itself instead of the whole tree. Every compact_every changes, the tree is
+        written to the snapshot data/<journal_name>.snap and the journal is emptied. On startup, the snapshot
+        is loaded and the journal replayed on top of it, which recovers everything up to the last change.
+
+        :param journal_name: The name of the journal, inside of the data folder, without an extension.
+        :type journal_name: str
+        :param compact_every: How many changes are journaled before the tree is compacted into a snapshot. DEFAULTS to 500.
+        :type compact_every: int
+        """
+        self.journal_path:Path = get_snapshot_path(journal_name + ".journal")
+        self.snapshot_file_name:str = journal_name + ".snap"
+        self.compact_every:int = compact_every
+        self.changes_since_compaction:int = 0
+        self.root:DirectoryAsset = None
+        # if True, record() and start() leave compacting to the caller, which runs compact() in the background once
+        # compaction_due (see DirectoryNavigator.compact_journal_if_due())
+        self.compact_in_background:bool = False
+
+    @property
+    def compaction_due(self) -> bool:
+        """If compact_every changes were journaled since the tree was last compacted."""
+        return self.changes_since_compaction >= self.compact_every
+
+    def has_snapshot(self) -> bool:
+        """Return True if a previous session left a snapshot to start from."""
+        return get_snapshot_path(self.snapshot_file_name).exists()
+
+    def restore(self) -> DirectoryAsset:
+        """Load the snapshot and replay the journal on top of it.
+
+        :returns: The root directory of the restored tree.
+        :rtype: DirectoryAsset
+        :raises ValueError: If the snapshot is not valid.
+        """
+        self.root = load_snapshot(self.snapshot_file_name)
+        self.changes_since_compaction = self.replay()
+        return self.root
+
+    def start(self, root:DirectoryAsset) -> None:
+        """Start journaling changes made to the tree of root, writing root's current tree as the first snapshot.
+
+        With compact_in_background, the first snapshot is only marked as due.
+
+        :param root: The root directory of the tree.
+        :type root: DirectoryAsset
+        """
+        self.root = root
+        if self.compact_in_background:
+            self.changes_since_compaction = self.compact_every
+        else:
+            self.compact()
+
+    def replay(self) -> int:
+        """Apply every change in the journal to the tree.
+
+        A line that cannot be read (for example, one that was cut off by a crash) ends the replay, since nothing
+        after it can be trusted.
+
+        :returns: The number of changes that were replayed.
+        :rtype: int
+        """
+        replayed_changes:int = 0
+
+        try:
+            journal_file = open(self.journal_path, "r")
+        except FileNotFoundError:
+            return replayed_changes
+
+        with journal_file:
+            for line in journal_file:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                parent_directory = DirectoryAsset.master_list.get(change.get("parent"))
+                if not parent_directory:
+                    continue
+
+                if change["operation"] == "add":
+                    parent_directory.add_directories(change["names"])
+                elif change["operation"] == "remove":
+                    # journals written before batch removal have a single "name"
+                    child_names = change.get("names") or [change["name"]]
+                    try:
+                        parent_directory.remove_children(name for name in child_names if name in parent_directory.children)
+                    except ValueError:
+                        continue
+                elif change["operation"] in ("move", "merge"):
+                    child = parent_directory.children.get(change["name"])
+                    target = DirectoryAsset.master_list.get(change["target"])
+                    if not child or not target:
+                        continue
+                    try:
+                        if change["operation"] == "move":
+                            child.move_to(target)
+                        else:
+                            child.merge_into(target)
+                    except ValueError:
+                        continue
+
+                replayed_changes += 1
+
+        return replayed_changes
+
+    def record(self, operation:str, parent:DirectoryAsset, **change) -> None:
+        """Append a change to the journal, compacting the tree into a snapshot when compact_every is reached.
+
+        :param operation: "add" or "remove" with names=[...], or "move" or "merge" with name=... and target=....
+        :type operation: str
+        :param parent: The directory the change was made to.
+        :type parent: DirectoryAsset
+        """
+        change = {"operation": operation, "parent": parent.name, **change}
+
+        with open(self.journal_path, "a") as journal_file:
+            journal_file.write(json.dumps(change) + "\n")
+
+        self.changes_since_compaction += 1
+        if self.compaction_due and not self.compact_in_background:
+            self.compact()
+
+    def record_added(self, children:list[DirectoryAsset]) -> None:
+        """Journal children that were added to the tree. Nothing is written if children is empty.
+
+        Children can belong to different parents (see DirectoryAsset.add_url_hierarchy()), so one change is
+        written per parent, in the order the parents first appear. As long as every parent in children comes
+        before its own children, replaying the changes in that order recreates the same tree.
+
+        :param children: Directories that were just added, so each one's parent is the directory it was added to.
+        :type children: list[DirectoryAsset]
+        """
+        children_by_parent:dict[DirectoryAsset, list[str]] = {}
+        for child in children:
+            children_by_parent.setdefault(child.parent, []).append(child.name)
+
+        for child_parent, child_names in children_by_parent.items():
+            self.record("add", child_parent, names=child_names)
+
+    def record_removed(self, parent:DirectoryAsset, child_names:list[str]) -> None:
+        """Journal children that were removed from parent, together with their subtrees. Nothing is written if child_names is empty."""
+        if child_names:
+            self.record("remove", parent, names=child_names)
+
+    def record_restored(self, children:list[DirectoryAsset]) -> None:
+        """Journal removed children that were put back into their parent, together with their subtrees.
+
+        The subtrees are journaled as additions, every parent before its children, so replaying them recreates them.
+        """
+        self.record_added([directory for child in children for directory in child.iter_subtree()])
+
+    def record_moved(self, old_parent:DirectoryAsset, child:DirectoryAsset, new_parent:DirectoryAsset) -> None:
+        """Journal a child that was moved from old_parent into new_parent, together with its subtree."""
+        self.record("move", old_parent, name=child.name, target=new_parent.name)
+
+    def record_merged(self, parent:DirectoryAsset, child_name:str, target:DirectoryAsset) -> None:
+        """Journal a child of parent that was merged into target (see DirectoryAsset.merge_into())."""
+        self.record("merge", parent, name=child_name, target=target.name)
+
+    def compact(self, task:BackgroundTask=None) -> None:
+        """Write the whole tree to the snapshot and empty the journal.
+
+        :param task: If provided, compact() runs as its work, and a cancel leaves the snapshot and the journal alone. DEFAULTS to None.
+        :type task: BackgroundTask
+        """
+        save_snapshot(self.root, self.snapshot_file_name, task=task)
+        self.journal_path.write_text("")
+        self.changes_since_compaction = 0
@@ -0,0 +1,239 @@
+import gc
+import itertools
+import lzma
+import os
+import struct
+import sys
+import zlib
+
+from array import array
+from pathlib import Path
+
+from background_task import CANCEL_CHECK_INTERVAL, BackgroundTask
+from directory_asset import DirectoryAsset
+from metrics import METRICS
+
+
+# Snapshot layout (little-endian):
+#   header:  magic, version, compression, number of directories
+#   body:    parent index of every directory (int32, -1 for the root), in pre-order
+#            byte offset of every name inside the name table (uint64, number of directories + 1)
+#            name table, the utf-8 names joined by NAME_SEPARATOR
+#            number of directories in the subtree of every directory, itself included (uint32, version 2+)
+#            index of every directory, ordered by name (uint32, version 2+)
+# The body is compressed as a whole when compression is not "none". The sections added in version 2 come
+# after the ones from version 1, so load_snapshot() reads both versions the same way. They let read_only_tree
+# find children and look up names without loading the whole snapshot.
+SNAPSHOT_MAGIC:bytes = b"WWALKSNP"
+SNAPSHOT_VERSION:int = 2
+SNAPSHOT_HEADER:struct.Struct = struct.Struct("<8sHHQ")
+NAME_SEPARATOR:bytes = b"\0"
+
+COMPRESSION_TYPES:dict[str, int] = {"none": 0, "zlib": 1, "lzma": 2}
+
+
+def get_snapshot_path(snapshot_file_name:str) -> Path:
+    """Return the path of a snapshot file inside of the data folder.
+
+    :param snapshot_file_name: The name of the snapshot file.
+    :type snapshot_file_name: str
+    :returns: The path to the snapshot file.
+    :rtype: Path
+    """
+    return Path(__file__).resolve().parent.parent / "data" / snapshot_file_name
+
+
+def to_little_endian(values:array) -> bytes:
+    """Return the bytes of values in little-endian order, no matter the byte order of the machine."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def from_little_endian(typecode:str, data:bytes) -> array:
+    """Return an array built from little-endian data, no matter the byte order of the machine."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+@METRICS.timer("save snapshot")
+def save_snapshot(directory:DirectoryAsset, snapshot_file_name:str, compression:str="zlib", task:BackgroundTask=None) -> int:
+    """Save the directory tree from the perspective of directory as a binary snapshot.
+
+    :param directory: The directory that will be the root of the snapshot.
+    :type directory: DirectoryAsset
+    :param snapshot_file_name: The name of the file to save to, inside of the data folder.
+    :type snapshot_file_name: str
+    :param compression: One of "none", "zlib" or "lzma". DEFAULTS to zlib.
+    :type compression: str
+    :param task: If provided, the directories walked are counted in its progress and the save stops when it is cancelled, leaving the old snapshot alone. DEFAULTS to None.
+    :type task: BackgroundTask
+    :returns: The number of directories saved.
+    :rtype: int
+    """
+    if compression not in COMPRESSION_TYPES:
+        raise ValueError(f"[!] {compression} is not a valid compression type. Use one of {', '.join(COMPRESSION_TYPES)}.")
+
+    parents:array = array("i")
+    names:list[bytes] = []
+
+    # walking the tree in pre-order with an explicit stack, children in the same order as the tree
+    # each entry is a directory and the index of its parent
+    stack:list[tuple[DirectoryAsset, int]] = [(directory, -1)]
+    while stack:
+        current_directory, parent_index = stack.pop()
+        current_index = len(parents)
+        if task and not current_index % CANCEL_CHECK_INTERVAL:
+            task.nodes_done = current_index
+            task.check_cancelled()
+        parents.append(parent_index)
+        names.append(current_directory.name.encode())
+
+        stack.extend((child, current_index) for child in reversed(current_directory.children.values()))
+
+    name_table = NAME_SEPARATOR.join(names) + NAME_SEPARATOR
+    if name_table.count(NAME_SEPARATOR) != len(names):
+        raise ValueError("[!] Cannot save the snapshot - directory names cannot contain null characters.")
+    name_offsets:array = array("Q", [0])
+    name_offsets.extend(itertools.accumulate(len(name) + len(NAME_SEPARATOR) for name in names))
+
+    # every directory comes after its parent, so walking backwards adds each subtree to its parent once it is complete
+    subtree_sizes:array = array("I", [1]) * len(parents)
+    for index in range(len(parents) - 1, 0, -1):
+        subtree_sizes[parents[index]] += subtree_sizes[index]
+    sorted_indexes:array = array("I", sorted(range(len(names)), key=names.__getitem__))
+
+    body = b"".join((
+        to_little_endian(parents),
+        to_little_endian(name_offsets),
+        name_table,
+        to_little_endian(subtree_sizes),
+        to_little_endian(sorted_indexes),
+        ))
+
+    if compression == "zlib":
+        body = zlib.compress(body, 1)
+    elif compression == "lzma":
+        body = lzma.compress(body)
+
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, COMPRESSION_TYPES[compression], len(parents))
+
+    # writing to a temporary file first, so a crash while saving never leaves a half written snapshot behind
+    snapshot_path = get_snapshot_path(snapshot_file_name)
+    temporary_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+    with open(temporary_path, "wb") as file:
+        file.write(header)
+        file.write(body)
+    os.replace(temporary_path, snapshot_path)
+
+    return len(parents)
+
+
+def read_snapshot_header(header:bytes, snapshot_file_name:str) -> tuple[int, int, int]:
+    """Unpack and validate the header of a snapshot file.
+
+    :param header: The first SNAPSHOT_HEADER.size bytes of the snapshot file.
+    :type header: bytes
+    :param snapshot_file_name: The name of the snapshot file, used in error messages.
+    :type snapshot_file_name: str
+    :returns: The version, compression type and number of directories of the snapshot.
+    :rtype: tuple[int, int, int]
+    :raises ValueError: If the file is not a snapshot, or was saved by a newer version.
+    """
+    try:
+        magic, version, compression, node_count = SNAPSHOT_HEADER.unpack(header)
+    except struct.error:
+        magic = None
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"[!] {snapshot_file_name} is not a WebWalker snapshot.")
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f"[!] {snapshot_file_name} uses snapshot version {version}, which is newer than this program supports.")
+
+    return version, compression, node_count
+
+
+def read_snapshot_body(snapshot_file_name:str) -> tuple[int, bytes]:
+    """Read and decompress the body of a snapshot file.
+
+    :param snapshot_file_name: The name of the snapshot file, inside of the data folder.
+    :type snapshot_file_name: str
+    :returns: The number of directories in the snapshot and the uncompressed body.
+    :rtype: tuple[int, bytes]
+    :raises ValueError: If the file is not a snapshot, or was saved by a newer version.
+    """
+    with open(get_snapshot_path(snapshot_file_name), "rb") as file:
+        header = file.read(SNAPSHOT_HEADER.size)
+        body = file.read()
+    METRICS.count("bytes read", len(header) + len(body))
+
+    version, compression, node_count = read_snapshot_header(header, snapshot_file_name)
+
+    try:
+        if compression == COMPRESSION_TYPES["zlib"]:
+            body = zlib.decompress(body)
+        elif compression == COMPRESSION_TYPES["lzma"]:
+            body = lzma.decompress(body)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"[!] {snapshot_file_name} is corrupted - {e}") from e
+
+    return node_count, body
+
+
+@METRICS.timer("load snapshot")
+def load_snapshot(snapshot_file_name:str) -> DirectoryAsset:
+    """Rebuild a directory tree from a snapshot file.
+
+    :param snapshot_file_name: The name of the snapshot file, inside of the data folder.
+    :type snapshot_file_name: str
+    :returns: The root directory of the snapshot.
+    :rtype: DirectoryAsset
+    :raises ValueError: If the file is not a valid snapshot, or a directory in it already exists.
+    """
+    node_count, body = read_snapshot_body(snapshot_file_name)
+    if not node_count:
+        raise ValueError(f"[!] {snapshot_file_name} does not contain any directories.")
+
+    parents_size = node_count * 4
+    offsets_size = (node_count + 1) * 8
+    parents = from_little_endian("i", body[:parents_size])
+    name_offsets = from_little_endian("Q", body[parents_size:parents_size + offsets_size])
+    names_start = parents_size + offsets_size
+    names = body[names_start:names_start + name_offsets[-1]].decode().split(NAME_SEPARATOR.decode())
+
+    if len(parents) != node_count or len(names) != node_count + 1:
+        raise ValueError(f"[!] {snapshot_file_name} is corrupted - it does not contain {node_count} directories.")
+
+    directories:list[DirectoryAsset] = []
+    # children are attached per parent after loading, so each parent is only sorted once
+    pending_children:dict[DirectoryAsset, list[DirectoryAsset]] = {}
+
+    # Nothing created here can be garbage, so the cyclic garbage collector is paused
+    # instead of letting it rescan the growing tree over and over.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        directories.append(DirectoryAsset(names[0]))
+
+        for index in range(1, node_count):
+            parent_index = parents[index]
+            if not 0 <= parent_index < index:
+                raise ValueError(f"[!] {snapshot_file_name} is corrupted - directory {index} is not listed after its parent.")
+
+            parent_directory = directories[parent_index]
+            child_directory = DirectoryAsset(name=names[index], parent=parent_directory)
+            directories.append(child_directory)
+            pending_children.setdefault(parent_directory, []).append(child_directory)
+
+        # deepest first, so every subtree is complete before it is attached and its statistics only travel up once
+        for parent_directory, children in reversed(pending_children.items()):
+            parent_directory.add_children(children)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    METRICS.count("directories created", len(directories))
+    return directories[0]
@@ -0,0 +1,145 @@
+import functools
+import re
+
+from collections.abc import Iterable, Iterator
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+
+# How many hrefs a UrlNormalizer remembers the normalized form of.
+NORMALIZED_CACHE_SIZE:int = 1 << 16
+
+# The port every scheme uses when none is given, which is dropped from normalized urls.
+DEFAULT_PORTS:dict[str, int] = {"http": 80, "https": 443, "ws": 80, "wss": 443, "ftp": 21}
+
+# A percent-encoded character, like %2f or %7E.
+PERCENT_ENCODING_PATTERN:re.Pattern = re.compile(r"%[0-9A-Fa-f]{2}")
+
+# Characters that never need to be percent-encoded (RFC 3986 section 2.3).
+UNRESERVED_CHARACTERS:frozenset[str] = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+
+
+def normalize_percent_encoding(text:str) -> str:
+    """Decode percent-encoded unreserved characters and uppercase every other escape, so "%7euser%2f" is "~user%2F"."""
+    if "%" not in text:
+        return text
+
+    def normalize_escape(match:re.Match) -> str:
+        character = chr(int(match.group()[1:], 16))
+        return character if character in UNRESERVED_CHARACTERS else match.group().upper()
+
+    return PERCENT_ENCODING_PATTERN.sub(normalize_escape, text)
+
+
+def remove_dot_segments(path:str) -> str:
+    """Resolve the "." and ".." segments of a path, so "/a/./b/../c" is "/a/c" (RFC 3986 section 5.2.4)."""
+    if "." not in path:
+        return path
+
+    segments:list[str] = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(segments) > 1 or (segments and segments[0]):
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+
+    # a path ending in "." or ".." still points to a directory
+    if path.endswith(("/.", "/..")):
+        segments.append("")
+
+    return "/".join(segments)
+
+
+class UrlNormalizer():
+    def __init__(self, base_url:str=None, strip_query:bool=False, drop_query_params:Iterable[str]=(),
+                 cache_size:int=NORMALIZED_CACHE_SIZE) -> None:
+        """Create a normalizer that turns the different ways of writing the same url into one name.
+
+        Hrefs collected by walkman.js mix relative and absolute urls, trailing slashes, uppercase hosts, default
+        ports and query parameters in any order. Each of those would become its own directory, so they are all
+        rewritten into one canonical form by normalize() before they are added to the tree:
+            - relative hrefs are resolved against base_url, if one is given
+            - the scheme and host are lowercased, and default ports like :443 are dropped
+            - "." and ".." segments are resolved, and a trailing slash is removed
+            - percent-encoding is normalized ("%7e" is "~", "%2f" is "%2F")
+            - query parameters are sorted, drop_query_params are removed, or the whole query if strip_query is set
+            - fragments are removed, since they point into the same page
+
+        Normalized forms are kept in an LRU cache, so hrefs that repeat across pages are only normalized once.
+
+        :param base_url: The url relative hrefs are resolved against, like "https://example.com/app/". DEFAULTS to None.
+        :type base_url: str
+        :param strip_query: If the whole query string should be removed. DEFAULTS to False.
+        :type strip_query: bool
+        :param drop_query_params: The names of query parameters to remove, like "utm_source". DEFAULTS to none.
+        :type drop_query_params: Iterable[str]
+        :param cache_size: How many normalized hrefs are remembered. DEFAULTS to NORMALIZED_CACHE_SIZE.
+        :type cache_size: int
+        """
+        self.base_url:str = base_url
+        self.strip_query:bool = strip_query
+        self.drop_query_params:frozenset[str] = frozenset(drop_query_params)
+        self.cache_size:int = cache_size
+        # the cache belongs to this normalizer, since the same href normalizes differently with other settings
+        self.normalize = functools.lru_cache(maxsize=cache_size)(self._normalize)
+
+    def __getstate__(self) -> dict:
+        # the cache cannot be pickled, so a normalizer sent to a worker process starts with an empty one
+        state = self.__dict__.copy()
+        del state["normalize"]
+        return state
+
+    def __setstate__(self, state:dict) -> None:
+        self.__dict__.update(state)
+        self.normalize = functools.lru_cache(maxsize=self.cache_size)(self._normalize)
+
+    def normalize_all(self, hrefs:Iterable[str]) -> Iterator[str]:
+        """Yield the normalized form of every href, skipping the ones that normalize to nothing."""
+        normalize = self.normalize
+        for href in hrefs:
+            normalized_href = normalize(href)
+            if normalized_href:
+                yield normalized_href
+
+    def _normalize(self, href:str) -> str:
+        """Return the canonical form of href, or an empty string if nothing is left (like for "#top").
+
+        Use normalize(), which caches the results of this method.
+        """
+        href = href.strip()
+        if self.base_url:
+            href = urljoin(self.base_url, href)
+
+        try:
+            split_href = urlsplit(href)
+            port = split_href.port
+        except ValueError:
+            # not a valid url (like an invalid port), so it is kept as it is
+            return href
+
+        scheme, netloc, path, query, fragment = split_href
+        scheme = scheme.lower()
+        # urls like "mailto:" and "javascript:" have no hierarchy to normalize
+        if scheme and not netloc and scheme not in DEFAULT_PORTS:
+            return href
+
+        if netloc:
+            user_info, _, host = netloc.rpartition("@")
+            host = host.lower()
+            if port is not None and DEFAULT_PORTS.get(scheme) == port:
+                host = host.rsplit(":", 1)[0]
+            netloc = f"{user_info}@{host}" if user_info else host
+
+        path = remove_dot_segments(normalize_percent_encoding(path))
+        # "https://example.com/a/" and "https://example.com/a" are the same page, and so are "https://example.com/" and "https://example.com"
+        if path.endswith("/") and (netloc or len(path) > 1):
+            path = path.rstrip("/")
+
+        if self.strip_query or not query:
+            query = ""
+        else:
+            # the parameters are compared as they are written, so their encoding is kept
+            query_params = (param for param in query.split("&") if param)
+            query = "&".join(sorted(param for param in query_params if param.partition("=")[0] not in self.drop_query_params))
+
+        return urlunsplit((scheme, netloc, path, query, ""))
@@ -1,15 +1,30 @@
 import argparse
-import curses
+import contextlib
+import sys
 import textwrap
 
+from collections.abc import Iterable
 from pathlib import Path
+from typing import TextIO
 
-from directory_asset import DirectoryAsset
-from directory_navigator import DirectoryNavigator
+from background_task import BackgroundTask, ProgressReader
+from batch_runner import BatchRunner
+from bulk_import import bulk_import
+from directory_asset import DirectoryAsset, open_datafile
+from metrics import METRICS
+from read_only_tree import ReadOnlyTree
+from scope_filter import DEFAULT_SCOPE_SCHEMES, ScopeFilter
+from tree_journal import TreeJournal
+from tree_snapshot import COMPRESSION_TYPES, load_snapshot, save_snapshot
+from url_normalizer import UrlNormalizer
 
 
-def main(stdscr) -> None:
-    """Running this starts the program.
+# How many of the slowest functions --profile prints.
+PROFILE_PRINT_LIMIT:int = 25
+
+
+def main(stdscr, args:argparse.Namespace) -> None:
+    """Running this starts the interactive program.
 
     Running without any arguments causes the program to grab the input file,
     which shoud be '../data/input.txt'
@@ -22,108 +37,392 @@ def main(stdscr) -> None:
 
     :param stdscr: The curses instantiation from curses.wrapper()
     :stdscr type: curses.window
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
     """
-    # Grabbing parameters from argparse
-    args:argparse.Namespace = get_argparse()
+    # curses and the navigator are only imported when running interactively, so headless runs start faster
+    import curses
+    from directory_navigator import DirectoryNavigator
+
     root_directory_name:str = args.root_directory
-    output_file:str = args.output_file
-    DirectoryAsset.hostname = args.hostname
+    configure_directory_asset(args)
     # Stating some additional variables
     project_root:"PosixPath" = get_parent_path()
-    directories:str = None
-    valid_file_found = True  # controls functionality
+    main_directory_asset:DirectoryAsset = None
+    journal:TreeJournal = TreeJournal(args.journal) if args.journal else None
+    if journal:
+        journal.compact_in_background = True  # the navigator compacts it like a save, see DirectoryNavigator.compact_journal_if_due()
 
     # clearing screen
     stdscr.clear()
 
-    # if input_file or input_tree was provided, populate directories with the data
+    # read_only browses the snapshot in place, so none of the tree building below is needed
+    if args.read_only:
+        try:
+            read_only_tree = ReadOnlyTree(args.load_snapshot)
+        except (FileNotFoundError, ValueError) as e:
+            stdscr.addstr(0, 0, f"[!] Could not open {args.load_snapshot}: {e}", curses.COLOR_RED)
+            stdscr.addstr(1, 0, "Press ENTER ...", curses.A_REVERSE)
+            stdscr.getch()
+            return
+
+        try:
+            navigator = DirectoryNavigator(read_only_tree.root, stdscr, registry=read_only_tree, read_only=True)
+        finally:
+            read_only_tree.close()
+        return
+
     try:
-        if args.input_file or args.input_tree:
-            input_file:"PosixPath" = project_root / "data" / (args.input_file if args.input_file else args.input_tree)
-            with open(input_file, "r") as file:
-                directories:str = file.read().strip()
-    except FileNotFoundError:
-        stdscr.addstr(0, 0, f"[!] {input_file} was not found. Populating an empty directory.", curses.COLOR_RED)
+        with METRICS.timer("load tree"):
+            main_directory_asset = load_in_background(stdscr, args, journal)
+    except FileNotFoundError as e:
+        stdscr.addstr(0, 0, f"[!] {e.filename} was not found. Populating an empty directory.", curses.COLOR_RED)
         stdscr.addstr(1, 0, "Press ENTER ...", curses.A_REVERSE)
         stdscr.getch()
-        valid_file_found = False
+    except ValueError as e:
+        input_file:"PosixPath" = project_root / "data" / get_tree_source_name(args, journal)
+        stdscr.addstr(0, 0, f"[!] There appears to be something wrong with {input_file}. Populating an empty directory instead.", curses.COLOR_RED)
+        stdscr.addstr(1, 0, str(e), curses.COLOR_RED)
+        stdscr.addstr(2, 0, "Press ENTER ...", curses.A_REVERSE)
+        stdscr.getch()
+        # clearing any created values, so that an empty directory can be created
+        DirectoryAsset.nuke_directory()
+
+    # If loading failed, start with an empty root directory.
+    if not main_directory_asset:
+        main_directory_asset:DirectoryAsset = instantiate_directory_object(parent_directory_name=root_directory_name, directory_list=None)
+
+    # a new journal starts from a snapshot of the tree that was just built, written once the navigator starts
+    if journal and not journal.root:
+        journal.start(main_directory_asset)
+
+    # the scope filter results are shown before the navigator starts. The bulk import runs in the navigator's background.
+    if DirectoryAsset.scope_filter and DirectoryAsset.scope_filter.dropped_count:
+        stdscr.addstr(0, 0, DirectoryAsset.scope_filter.get_summary())
+        stdscr.addstr(1, 0, "Press ENTER ...", curses.A_REVERSE)
+        stdscr.getch()
+        stdscr.clear()
+
+    navigator = DirectoryNavigator(main_directory_asset, stdscr, journal=journal, import_pattern=args.bulk_import,
+                                   import_workers=args.import_workers)
+
+
+def load_in_background(stdscr, args:argparse.Namespace, journal:TreeJournal=None) -> DirectoryAsset:
+    """Run load_directory_tree() on a worker thread, showing its progress until it is done. Pressing q cancels it.
+
+    Nothing else uses the tree while it loads, so the whole tree is built on the worker thread.
+
+    :param stdscr: The curses instantiation from curses.wrapper()
+    :type stdscr: curses.window
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :param journal: The journal to restore from, if it has a snapshot. DEFAULTS to None.
+    :type journal: TreeJournal
+    :returns: The root directory, or None if the load was cancelled.
+    :rtype: DirectoryAsset
+    :raises FileNotFoundError: If the source file does not exist.
+    :raises ValueError: If the source file could not be parsed.
+    """
+    import curses  # see main()
+
+    task = BackgroundTask(f"Loading {get_tree_source_name(args, journal) or args.root_directory}",
+                          lambda task: load_directory_tree(args, journal, task), timer_name="background load")
+
+    stdscr.timeout(100)
+    try:
+        while not task.poll():
+            # the worker only adds directories, so reading how many there are from here is safe
+            task.nodes_done = len(DirectoryAsset.master_list)
+            stdscr.erase()
+            stdscr.addnstr(0, 0, task.get_progress_line(curses.COLS - 1), curses.COLS - 1)
+            stdscr.addnstr(1, 0, "Press q to cancel.", curses.COLS - 1, curses.A_REVERSE)
+            stdscr.refresh()
+            if stdscr.getch() == ord("q"):
+                task.cancel()
+    finally:
+        stdscr.timeout(-1)
+        stdscr.erase()
+
+    main_directory_asset = task.get_result()
+    # a load without any place to stop (like a snapshot) finishes even if it was cancelled, and is kept
+    if main_directory_asset is None:
+        DirectoryAsset.nuke_directory()
+        stdscr.addstr(0, 0, "[!] Loading was cancelled. Populating an empty directory.", curses.COLOR_RED)
+        stdscr.addstr(1, 0, "Press ENTER ...", curses.A_REVERSE)
+        stdscr.getch()
+    return main_directory_asset
+
+
+def load_directory_tree(args:argparse.Namespace, journal:TreeJournal=None, task:BackgroundTask=None) -> DirectoryAsset:
+    """Build the directory tree from the sources given in args.
+
+    If a journal with a snapshot, load_snapshot or input_tree was provided, the tree is rebuilt from it.
+    If input_file was provided, the root directory is populated with its data. Otherwise, the root directory is empty.
+
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :param journal: The journal to restore from, if it has a snapshot. DEFAULTS to None.
+    :type journal: TreeJournal
+    :param task: If provided, reading input_tree or input_file is counted in its progress and stops when it is cancelled. DEFAULTS to None.
+    :type task: BackgroundTask
+    :returns: The root directory.
+    :rtype: DirectoryAsset
+    :raises FileNotFoundError: If the source file does not exist.
+    :raises ValueError: If the source file could not be parsed.
+    """
+    if journal and journal.has_snapshot():
+        return journal.restore()
+    elif args.load_snapshot:
+        return load_snapshot(args.load_snapshot)
+    elif args.input_tree:
+        with open_datafile(args.input_tree) as file:
+            return parse_directory_list(ProgressReader(file, task) if task else file)
+    elif args.input_file:
+        with open_datafile(args.input_file) as file:
+            return instantiate_directory_object(parent_directory_name=args.root_directory, directory_list=ProgressReader(file, task) if task else file)
+
+    return instantiate_directory_object(parent_directory_name=args.root_directory, directory_list=None)
+
+
+def get_tree_source_name(args:argparse.Namespace, journal:TreeJournal=None) -> str:
+    """Return the name of the file load_directory_tree() builds the tree from, or an empty string if there is none."""
+    if journal and journal.has_snapshot():
+        return journal.snapshot_file_name
+    return args.load_snapshot or args.input_tree or args.input_file or ""
+
+
+def get_url_normalizer(args:argparse.Namespace) -> UrlNormalizer:
+    """Return the UrlNormalizer described by args, or None if urls should be added as they are.
+
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :returns: The normalizer or None.
+    :rtype: UrlNormalizer
+    """
+    if not (args.normalize_urls or args.base_url or args.strip_query or args.drop_query_params):
+        return None
+
+    return UrlNormalizer(base_url=args.base_url, strip_query=args.strip_query, drop_query_params=split_option_list(args.drop_query_params))
+
+
+def get_scope_filter(args:argparse.Namespace) -> ScopeFilter:
+    """Return the ScopeFilter described by args, or None if every url is in scope.
+
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :returns: The scope filter or None.
+    :rtype: ScopeFilter
+    """
+    if not (args.scope_hosts or args.scope_paths or args.scope_include or args.scope_exclude or args.scope_schemes):
+        return None
+
+    return ScopeFilter(hosts=split_option_list(args.scope_hosts),
+                       path_prefixes=split_option_list(args.scope_paths),
+                       include_patterns=args.scope_include or (),
+                       exclude_patterns=args.scope_exclude or (),
+                       schemes=split_option_list(args.scope_schemes) or DEFAULT_SCOPE_SCHEMES,
+                       )
+
+
+def split_option_list(option:str) -> list[str]:
+    """Split a comma separated option like "a, b,c" into ["a", "b", "c"]. None is an empty list."""
+    return [item.strip() for item in (option or "").split(",") if item.strip()]
+
+
+def configure_directory_asset(args:argparse.Namespace) -> None:
+    """Set the class attributes of DirectoryAsset that change how directories are added and shown, from args."""
+    DirectoryAsset.hostname = args.hostname
+    DirectoryAsset.url_hierarchy = args.url_hierarchy
+    DirectoryAsset.url_normalizer = get_url_normalizer(args)
+    DirectoryAsset.scope_filter = get_scope_filter(args)
+
+
+def run(args:argparse.Namespace) -> int:
+    """Run the program the way args ask for: a query, a headless run or the interactive navigator.
+
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :returns: The exit status.
+    :rtype: int
+    """
+    if args.query:
+        return run_query(args)
+    if args.script or args.output_file or args.save_snapshot:
+        return run_headless(args)
+
+    import curses  # see main()
+    curses.wrapper(main, args)
+    return 0
 
-    # If input_tree was provided and an error did not occur with input file, then perform the appropriate parsing on directories
-    # because directories won't work as is (because it is not None and not in the format from walkman.js).
-    if args.input_tree and valid_file_found:
-        directory_list:list[str] = directories.split("\n")
-        try:
-            main_directory_asset:DirectoryAsset = parse_directory_list(directory_list)
-        except AttributeError:
-            stdscr.addstr(0, 0, f"[!] There appears to be something wrong with {input_file}. Populating an empty directory instead.", curses.COLOR_RED)
-            stdscr.addstr(1, 0, "Press ENTER ...", curses.A_REVERSE)
-            stdscr.getch()
-            # clearing any created values, and then creating an empty directory
-            DirectoryAsset.nuke_directory()
-            main_directory_asset:DirectoryAsset = instantiate_directory_object(parent_directory_name=root_directory_name, directory_list=None)
-    # Else, populate the root directory.
-    else:
-        main_directory_asset:DirectoryAsset = instantiate_directory_object(parent_directory_name=root_directory_name, directory_list=directories)
 
-    # if output_file was provided, then generate outputfile (unless error occured). Otherwise run main loop.
+def run_headless(args:argparse.Namespace) -> int:
+    """Build the tree, run args.script and save args.output_file and args.save_snapshot, without starting curses.
+
+    Messages are printed to stderr and results (like the output of search) to stdout. Unlike interactive runs,
+    a source file that is missing or cannot be parsed is an error instead of starting with an empty directory.
+
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :returns: 0 if everything worked, or 1 if the tree could not be built or a command of the script failed.
+    :rtype: int
+    """
+    configure_directory_asset(args)
+    journal:TreeJournal = TreeJournal(args.journal) if args.journal else None
+
+    try:
+        main_directory_asset = load_directory_tree(args, journal)
+    except FileNotFoundError as e:
+        print(f"[!] {e.filename or e} was not found.", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"[!] There appears to be something wrong with {get_tree_source_name(args, journal)}: {str(e).removeprefix('[!] ')}", file=sys.stderr)
+        return 1
+
+    if args.bulk_import:
+        try:
+            import_result = bulk_import(main_directory_asset, args.bulk_import, workers=args.import_workers)
+        except (OSError, ValueError, NotImplementedError) as e:
+            print(f"[!] Could not import {args.bulk_import}: {str(e).removeprefix('[!] ')}", file=sys.stderr)
+            return 1
+        if journal:
+            journal.record_added(import_result.created_directories)
+        print(import_result.get_summary(), file=sys.stderr)
+
+    # a new journal starts from a snapshot of the tree that was just built
+    if journal and not journal.root:
+        journal.start(main_directory_asset)
+    if DirectoryAsset.scope_filter and DirectoryAsset.scope_filter.dropped_count:
+        print(DirectoryAsset.scope_filter.get_summary(), file=sys.stderr)
+
+    failed_count:int = 0
+    if args.script:
+        runner = BatchRunner(main_directory_asset, journal, snapshot_compression=args.snapshot_compression, import_workers=args.import_workers)
+        try:
+            with contextlib.nullcontext(sys.stdin) if args.script == "-" else open_datafile(args.script) as script:
+                failed_count = runner.run_script(script, keep_going=args.keep_going)
+        except FileNotFoundError as e:
+            print(f"[!] {e.filename} was not found.", file=sys.stderr)
+            return 1
+
+    # a script that stopped at a failed command did not finish building the tree, so it is not saved
+    if failed_count and not args.keep_going:
+        return 1
     if args.output_file:
-        main_directory_asset.create_output_file(output_file_name=output_file)
-    else:
-        navigator = DirectoryNavigator(main_directory_asset, stdscr)
+        main_directory_asset.create_output_file(output_file_name=args.output_file)
+    if args.save_snapshot:
+        save_snapshot(main_directory_asset, args.save_snapshot, compression=args.snapshot_compression)
 
+    return 1 if failed_count else 0
 
-def parse_directory_list(directory_list:list[str]) -> DirectoryAsset:
+
+def run_query(args:argparse.Namespace) -> int:
+    """Print the directories that best match args.query, one per line, without starting curses.
+
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :returns: 0, or 1 if the tree or the read-only snapshot could not be opened.
+    :rtype: int
+    """
+    configure_directory_asset(args)
+
+    if args.read_only:
+        try:
+            directory_registry = ReadOnlyTree(args.load_snapshot)
+        except FileNotFoundError as e:
+            print(f"[!] {e.filename or e} was not found.", file=sys.stderr)
+            return 1
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+    else:
+        journal:TreeJournal = TreeJournal(args.journal) if args.journal else None
+        try:
+            main_directory_asset = load_directory_tree(args, journal)
+        except FileNotFoundError as e:
+            print(f"[!] {e.filename or e} was not found.", file=sys.stderr)
+            return 1
+        except ValueError as e:
+            print(f"[!] There appears to be something wrong with {get_tree_source_name(args, journal)}: {str(e).removeprefix('[!] ')}", file=sys.stderr)
+            return 1
+        if args.bulk_import:
+            try:
+                bulk_import(main_directory_asset, args.bulk_import, workers=args.import_workers)
+            except (OSError, ValueError, NotImplementedError) as e:
+                print(f"[!] Could not import {args.bulk_import}: {str(e).removeprefix('[!] ')}", file=sys.stderr)
+                return 1
+        directory_registry = DirectoryAsset.master_list
+
+    for directory in directory_registry.search(args.query, limit=args.query_limit, wait_for_index=True):
+        print(directory.name)
+
+    if DirectoryAsset.scope_filter and DirectoryAsset.scope_filter.dropped_count:
+        print(DirectoryAsset.scope_filter.get_summary(), file=sys.stderr)
+    return 0
+
+
+@METRICS.timer("parse tree file")
+def parse_directory_list(directory_lines:Iterable[str]) -> DirectoryAsset:
     """Parse the current output format in a way that can rebuild it as DirectoryAsset objects.
 
-    This then figures out the hierarchies based on directory_list and saves them so the directory file can be worked on
-    after quitting the program.
+    This then figures out the hierarchies based on directory_lines and saves them so the directory file can be worked on
+    after quitting the program. The lines are consumed one at a time, so an open file object can be passed in directly.
 
-    :param directory_list: The output file from directory_asset, but split by newlines.
-    :type directory_list: list[str]
+    The hierarchy is tracked with a stack of the directories above the current line. When a line is indented less than
+    the previous one, directories are popped off until its parent is on top, so dedenting by any number of levels works.
+
+    :param directory_lines: The output file from directory_asset, as an open file object or a list of lines.
+    :type directory_lines: Iterable[str]
     :returns: The root parent directory asset.
     :rtype: DirectoryAsset
+    :raises ValueError: If a line is malformed. The message contains the line number.
     """
-    previous_level:int = 0
-    current_level:int = 0
-    current_parent:DirectoryAsset = None
+    root_directory:DirectoryAsset = None
+    directory_count:int = 0
+    # each entry is the column of a directory's "-" and the directory itself
+    parent_stack:list[tuple[int, DirectoryAsset]] = []
+    # children are attached per parent after parsing, so each parent is only sorted once
+    pending_children:dict[DirectoryAsset, list[DirectoryAsset]] = {}
+
+    for line_number, line in enumerate(directory_lines, start=1):
+        if not line.strip():
+            continue
 
-    # Sorry for the comment offense in the following lines, but this took a while to figure out
-    for index, directory in enumerate(directory_list):
         # find the current parent-child hierarchy by the location of "-"
-        # then, remove the "-" and strip all whitespace to get only the directory name
-        current_level = directory.find("-")
-        directory = directory.replace("-", "", 1).strip()
-
-        # if master_list does not exist, create it (should only happen first loop)
-        if not DirectoryAsset.master_list:
-            current_parent = DirectoryAsset(directory)
-
-        # If we have entered a new hierarchy
-        # get previously created directory, and add current directory as a child
-        elif current_level > previous_level:
-            previous_directory_name:str = directory_list[index-1].replace("-", "", 1).strip()
-            directory_index:int = [x.name for x in DirectoryAsset.master_list].index(previous_directory_name)
-            current_parent = DirectoryAsset.master_list[directory_index]
-            child_directory = DirectoryAsset(name=directory, level=current_parent.level+2, parent=current_parent)
-            current_parent.add_child(child_directory)
-
-        # If we are at the same hierarchy level,
-        # then just populate directory as a child
-        elif current_level == previous_level:
-            child_directory = DirectoryAsset(name=directory, level=current_parent.level+2, parent=current_parent)
-            current_parent.add_child(child_directory)
-
-        # If current_level is less than previous_level, we have gone back a hierarchy level
-        elif current_level < previous_level:
-            current_parent = current_parent.parent
-            child_directory = DirectoryAsset(name=directory, level=current_parent.level+2, parent=current_parent)
-            current_parent.add_child(child_directory)
-
-        previous_level = current_level
-
-    # return the first indexed DirectoryAsset from master_list
-    # because this should be the root directory
-    return DirectoryAsset.master_list[0]
+        # then, take everything after the "-" and strip all whitespace to get only the directory name
+        current_level:int = line.find("-")
+        directory:str = line[current_level+1:].strip()
+        if current_level == -1 or line[:current_level].strip() or not directory:
+            raise ValueError(f"[!] Line {line_number} is not a valid directory entry: '{line.strip()}'")
+
+        # go back up the hierarchy until the directory on top of the stack is the parent of this line
+        while parent_stack and parent_stack[-1][0] >= current_level:
+            parent_stack.pop()
+
+        try:
+            if not root_directory:
+                current_directory = DirectoryAsset(directory)
+                root_directory = current_directory
+            elif not parent_stack:
+                raise ValueError(f"[!] '{directory}' is at the same level as the root directory.")
+            else:
+                current_parent:DirectoryAsset = parent_stack[-1][1]
+                current_directory = DirectoryAsset(name=directory, parent=current_parent)
+                pending_children.setdefault(current_parent, []).append(current_directory)
+        except ValueError as e:
+            raise ValueError(f"[!] Line {line_number}: {str(e).removeprefix('[!] ')}") from e
+
+        parent_stack.append((current_level, current_directory))
+        directory_count += 1
+
+    if not root_directory:
+        raise ValueError("[!] No directories were found.")
+
+    # deepest first, so every subtree is complete before it is attached and its statistics only travel up once
+    for parent_directory, children in reversed(pending_children.items()):
+        parent_directory.add_children(children)
+
+    METRICS.count("directories created", directory_count)
+    return root_directory
 
 
 def get_argparse() -> argparse.Namespace:
@@ -172,6 +471,105 @@ def get_argparse() -> argparse.Namespace:
                         help="The host or target name. Used to remove hostname from url paths so they can be shortened from limited screen space.",
                         default=None)
 
+    parser.add_argument("-t", "--url_hierarchy",
+                        help="Build the host and path hierarchy of every url when populating, instead of adding every url directly below the directory being populated.",
+                        action="store_true")
+
+    parser.add_argument("-n", "--normalize_urls",
+                        help="Normalize urls before adding them, so different ways of writing the same url (trailing slashes, host case, default ports, query parameter order, fragments) only add one directory.",
+                        action="store_true")
+
+    parser.add_argument("--base_url",
+                        help="Resolve relative urls against BASE_URL, like 'https://example.com/app/'. Turns on --normalize_urls.",
+                        default=None)
+
+    parser.add_argument("--strip_query",
+                        help="Remove the query string from every url. Turns on --normalize_urls.",
+                        action="store_true")
+
+    parser.add_argument("--drop_query_params",
+                        help="A comma separated list of query parameters to remove from every url, like 'utm_source,utm_medium'. Turns on --normalize_urls.",
+                        default=None)
+
+    parser.add_argument("--scope_hosts",
+                        help="A comma separated list of the hosts that are in scope, like 'example.com,*.example.com'. Urls for other hosts are not added. Relative urls are always in scope.",
+                        default=None)
+
+    parser.add_argument("--scope_paths",
+                        help="A comma separated list of the path prefixes that are in scope, like '/app,/api'.",
+                        default=None)
+
+    parser.add_argument("--scope_include",
+                        help="A regular expression that urls must contain to be in scope. Can be used more than once, in which case urls must contain one of them.",
+                        action="append",
+                        default=None)
+
+    parser.add_argument("--scope_exclude",
+                        help="A regular expression that takes urls containing it out of scope, like '\\.(png|css|js)$'. Can be used more than once.",
+                        action="append",
+                        default=None)
+
+    parser.add_argument("--scope_schemes",
+                        help=f"A comma separated list of the schemes that are in scope. DEFAULTS to {','.join(DEFAULT_SCOPE_SCHEMES)} when any other --scope option is used, which drops mailto: and javascript: links.",
+                        default=None)
+
+    parser.add_argument("-s", "--save_snapshot",
+                        help="Save the tree as a binary snapshot, which loads much faster than a tree file. If used, the program does not run interactive directory building.",
+                        default=None)
+
+    parser.add_argument("-S", "--load_snapshot",
+                        help="Build the tree from a snapshot saved with --save_snapshot. Cannot be used with -i or -I.",
+                        default=None)
+
+    parser.add_argument("--read_only",
+                        help="Browse the snapshot given with --load_snapshot without loading it into memory. The snapshot must be saved using '--snapshot_compression none'.",
+                        action="store_true")
+
+    parser.add_argument("-j", "--journal",
+                        help="Autosave every change to data/JOURNAL.journal, compacting it into data/JOURNAL.snap now and then. If the journal already exists, the tree is restored from it and -i, -I and -S are ignored.",
+                        default=None)
+
+    parser.add_argument("-b", "--bulk_import",
+                        help="Import every walkman.js output file matching BULK_IMPORT into the root directory at once. BULK_IMPORT is a folder or glob pattern inside of the data folder, like 'crawl' or 'crawl/*.txt'.",
+                        default=None)
+
+    parser.add_argument("--import_workers",
+                        help="How many processes --bulk_import uses to read files. DEFAULTS to the number of CPUs",
+                        type=int,
+                        default=None)
+
+    parser.add_argument("-x", "--script",
+                        help="Run the commands in data/SCRIPT (or stdin if SCRIPT is '-') against the tree without starting curses, like 'populate input.txt' or 'search admin'. Run a script with the command 'help' to list every command. Does not run interactively.",
+                        default=None)
+
+    parser.add_argument("--keep_going",
+                        help="Keep running the commands of --script after one fails, instead of stopping. Either way, the exit status is 1 if a command failed.",
+                        action="store_true")
+
+    parser.add_argument("-q", "--query",
+                        help="Print the directories that best match QUERY (prefix, substring or fuzzy matches), best match first, and quit. Does not run interactively.",
+                        default=None)
+
+    parser.add_argument("--query_limit",
+                        help="The most directories --query prints. DEFAULTS to 20",
+                        type=int,
+                        default=20)
+
+    parser.add_argument("--profile",
+                        help="Run the program under cProfile, save the profile to data/PROFILE (DEFAULTS to webwalker.prof) and print the slowest functions when it quits. Open the profile with 'python -m pstats'.",
+                        nargs="?",
+                        const="webwalker.prof",
+                        default=None)
+
+    parser.add_argument("--metrics_file",
+                        help="Save the timers and counters of every step (see 'Show performance statistics') as JSON to data/METRICS_FILE when the program quits.",
+                        default=None)
+
+    parser.add_argument("--snapshot_compression",
+                        help="The compression used by --save_snapshot. DEFAULTS to zlib",
+                        choices=list(COMPRESSION_TYPES),
+                        default="zlib")
+
     args = parser.parse_args()
 
     # Checking and updating parameters based on what switches and arguments were provided.
@@ -188,6 +586,48 @@ def check_args_combinations(args:argparse.Namespace) -> None:
     """
     if args.input_tree and args.input_file:
         raise ValueError("[!] Cannot use --input_tree [-I] and --input_file [-i] at the same time.")
+    if args.load_snapshot and (args.input_tree or args.input_file):
+        raise ValueError("[!] Cannot use --load_snapshot [-S] with --input_tree [-I] or --input_file [-i].")
+    if args.read_only and not args.load_snapshot:
+        raise ValueError("[!] --read_only needs a snapshot given with --load_snapshot [-S].")
+    if args.read_only and (args.output_file or args.save_snapshot):
+        raise ValueError("[!] Cannot use --read_only with --output_file [-o] or --save_snapshot [-s].")
+    if args.read_only and args.journal:
+        raise ValueError("[!] Cannot use --read_only with --journal [-j].")
+    if args.read_only and args.bulk_import:
+        raise ValueError("[!] Cannot use --read_only with --bulk_import [-b].")
+    if args.read_only and args.script:
+        raise ValueError("[!] Cannot use --read_only with --script [-x].")
+    if args.query and args.script:
+        raise ValueError("[!] Cannot use --query [-q] with --script [-x].")
+    if args.keep_going and not args.script:
+        raise ValueError("[!] --keep_going needs a script given with --script [-x].")
+    if args.import_workers is not None and args.import_workers < 1:
+        raise ValueError("[!] --import_workers must be at least 1.")
+    # compiling the scope rules once here, so an invalid pattern is reported before curses starts
+    get_scope_filter(args)
+
+
+def run_profiled(args:argparse.Namespace) -> int:
+    """Run the program under cProfile, then save the profile to data/args.profile and print the slowest functions.
+
+    :param args: The arguments grabbed from argparse.
+    :type args: argparse.Namespace
+    :returns: The exit status of run().
+    :rtype: int
+    """
+    # only imported when profiling, since pstats takes longer to import than the rest of a headless run needs to start
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(run, args)
+    finally:
+        profile_path = get_parent_path() / "data" / args.profile
+        profiler.dump_stats(profile_path)
+        pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_PRINT_LIMIT)
+        print(f"[+] Saved the profile to {profile_path}")
 
 
 def get_parent_path() -> "PosixPath":
@@ -203,13 +643,13 @@ def get_parent_path() -> "PosixPath":
     return project_root
 
 
-def instantiate_directory_object(parent_directory_name:str, directory_list:str) -> DirectoryAsset:
+def instantiate_directory_object(parent_directory_name:str, directory_list:"str | TextIO") -> DirectoryAsset:
     """Creates the 'root' directory_asset and populates it's children if provided.
 
     :param parent_directory_name: The name of the root directory.
     :type parent_directory_name: str
-    :param directory_list: The string object containing a list of children from walkman.js.
-    :type directory_list: str
+    :param directory_list: The list of children from walkman.js, as an open text file or a string.
+    :type directory_list: str | TextIO
     :returns: The root directory that is populated with children directories.
     :rtype: DirectoryAsset
     """
@@ -222,8 +662,11 @@ def instantiate_directory_object(parent_directory_name:str, directory_list:str)
 
 
 if __name__ == "__main__":
-    # Not super efficient, but calling args before curses is called.
-    # This way, help can be ran before curses takes over stdout.
-    # Args will also be called inside of main.
+    # calling args before curses is called, so help can be ran before curses takes over stdout.
     args = get_argparse()
-    curses.wrapper(main)
+    try:
+        exit_status = run_profiled(args) if args.profile else run(args)
+    finally:
+        if args.metrics_file:
+            METRICS.save_json(args.metrics_file)
+    sys.exit(exit_status)
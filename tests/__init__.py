@@ -0,0 +1,10 @@
+import sys
+
+from pathlib import Path
+
+
+PROJECT_ROOT:Path = Path(__file__).resolve().parent.parent
+# the tests import the modules from src the same way webwalker.py does
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+# and the synthetic tree generator from benchmarks
+sys.path.insert(0, str(PROJECT_ROOT / "benchmarks"))
@@ -0,0 +1,83 @@
+import shutil
+import unittest
+import uuid
+
+from pathlib import Path
+
+from tests import PROJECT_ROOT
+
+from directory_asset import DirectoryAsset
+
+
+DATA_PATH:Path = PROJECT_ROOT / "data"
+
+
+class TreeTestCase(unittest.TestCase):
+    """A test case that starts every test with an empty registry and removes the data files it created."""
+
+    def setUp(self) -> None:
+        DirectoryAsset.nuke_directory()
+        self.addCleanup(DirectoryAsset.nuke_directory)
+
+    def get_data_file_name(self, extension:str) -> str:
+        """Return the name of a new file inside of the data folder, which is deleted after the test.
+
+        :param extension: The extension of the file, like ".snap".
+        :type extension: str
+        :returns: The file name, relative to the data folder.
+        :rtype: str
+        """
+        return self.get_data_stem([extension]) + extension
+
+    def get_data_stem(self, extensions:list[str]) -> str:
+        """Return a new name without an extension, whose files with each of extensions are deleted after the test.
+
+        The temporary files that snapshots and tree files are written to first are deleted too.
+
+        :param extensions: The extensions of the files, like [".journal", ".snap"].
+        :type extensions: list[str]
+        :returns: The name, relative to the data folder.
+        :rtype: str
+        """
+        stem = f"test_{uuid.uuid4().hex}"
+        for extension in extensions:
+            data_path = DATA_PATH / (stem + extension)
+            self.addCleanup(data_path.unlink, missing_ok=True)
+            self.addCleanup(data_path.with_name(data_path.name + ".tmp").unlink, missing_ok=True)
+        return stem
+
+    def make_data_folder(self) -> str:
+        """Create a new folder inside of the data folder, which is deleted with everything in it after the test.
+
+        :returns: The folder name, relative to the data folder.
+        :rtype: str
+        """
+        folder_name = f"test_{uuid.uuid4().hex}"
+        (DATA_PATH / folder_name).mkdir()
+        self.addCleanup(shutil.rmtree, DATA_PATH / folder_name, ignore_errors=True)
+        return folder_name
+
+    def assertStatsMatchTree(self, directory:DirectoryAsset) -> tuple[int, int]:
+        """Check the SubtreeStats of directory and everything below it against a walk of the tree.
+
+        :returns: The descendant count and height of directory.
+        :rtype: tuple[int, int]
+        """
+        descendant_count = 0
+        height = 0
+        tallest_count = 0
+        for child in directory.children.values():
+            self.assertIs(child.parent, directory)
+            self.assertEqual(child.level, directory.level + 2)
+            child_descendants, child_height = self.assertStatsMatchTree(child)
+            descendant_count += child_descendants + 1
+            if child_height + 1 > height:
+                height, tallest_count = child_height + 1, 1
+            elif child_height + 1 == height:
+                tallest_count += 1
+
+        self.assertEqual(directory.descendant_count, descendant_count, directory.name)
+        self.assertEqual(directory.height, height, directory.name)
+        if directory._stats:
+            self.assertEqual(directory._stats.tallest_count, tallest_count, directory.name)
+        return descendant_count, height
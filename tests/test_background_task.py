@@ -0,0 +1,117 @@
+import threading
+import unittest
+
+from unittest import mock
+
+from tests.helpers import DATA_PATH, TreeTestCase
+
+import background_task
+from background_task import BackgroundTask, ProgressReader, TaskCancelled
+from metrics import METRICS
+
+
+def wait_for_cancel(task:BackgroundTask) -> None:
+    """Work that runs until its task is cancelled."""
+    while True:
+        task.check_cancelled()
+        task.cancel_event.wait(0.01)
+
+
+class BackgroundTaskTest(unittest.TestCase):
+    def test_result(self) -> None:
+        task = BackgroundTask("Adding", lambda task: 1 + 1, timer_name="test task")
+        task.wait()
+
+        self.assertTrue(task.done)
+        self.assertEqual(task.get_result(), 2)
+        self.assertIn("test task", METRICS.timers)
+
+    def test_error_is_raised_by_get_result(self) -> None:
+        def fail(task:BackgroundTask) -> None:
+            raise OSError("disk on fire")
+
+        task = BackgroundTask("Failing", fail)
+        task.wait()
+
+        self.assertIsInstance(task.error, OSError)
+        with self.assertRaisesRegex(OSError, "disk on fire"):
+            task.get_result()
+
+    def test_batches_are_applied_by_poll(self) -> None:
+        applied_batches:list[list] = []
+        with mock.patch.object(background_task, "HANDOFF_BATCH_SIZE", 2):
+            task = BackgroundTask("Handing off", lambda task: task.hand_off_all(range(5)), apply=applied_batches.append)
+            task.wait()
+
+        self.assertEqual(applied_batches, [[0, 1], [2, 3], [4]])
+
+    def test_cancel(self) -> None:
+        counted = threading.Event()
+
+        def count_forever(task:BackgroundTask) -> None:
+            for number in task.track(iter(int, 1)):
+                if number == 0 and task.nodes_done:
+                    counted.set()
+
+        task = BackgroundTask("Counting", count_forever)
+        self.assertTrue(counted.wait(5))
+        task.cancel()
+        task.wait()
+
+        self.assertTrue(task.cancelled)
+        self.assertIsNone(task.error)
+        self.assertIsNone(task.get_result())
+        self.assertIn("(cancelling)", task.get_progress_line(200))
+
+    def test_batches_are_thrown_away_after_a_cancel(self) -> None:
+        applied_batches:list[list] = []
+
+        def hand_off_and_wait(task:BackgroundTask) -> None:
+            task.hand_off(["/a"])
+            wait_for_cancel(task)
+
+        task = BackgroundTask("Handing off", hand_off_and_wait, apply=applied_batches.append)
+        task.cancel()
+        task.wait()
+
+        self.assertEqual(applied_batches, [])
+
+    def test_progress_line(self) -> None:
+        task = BackgroundTask("Saving /", wait_for_cancel, total_nodes=200)
+        self.addCleanup(task.cancel)
+        task.nodes_done = 50
+
+        self.assertRegex(task.get_progress_line(200), r"^Saving / \[#####-+\]  25% 50 of 200 directories")
+        self.assertEqual(len(task.get_progress_line(10)), 10)
+
+
+class ProgressReaderTest(TreeTestCase):
+    def test_bytes_are_counted(self) -> None:
+        file_name = self.get_data_file_name(".txt")
+        (DATA_PATH / file_name).write_text("line\n" * 3000)
+
+        def read_lines(task:BackgroundTask) -> int:
+            with open(DATA_PATH / file_name) as file:
+                return sum(1 for _ in ProgressReader(file, task))
+
+        task = BackgroundTask("Reading", read_lines)
+        task.wait()
+
+        self.assertEqual(task.get_result(), 3000)
+        self.assertEqual(task.bytes_done, task.total_bytes)
+        self.assertEqual(task.total_bytes, 15000)
+
+    def test_cancelled_while_reading(self) -> None:
+        file_name = self.get_data_file_name(".txt")
+        (DATA_PATH / file_name).write_text("line\n")
+        task = BackgroundTask("Waiting", wait_for_cancel)
+        task.cancel()
+        task.wait()
+
+        with open(DATA_PATH / file_name) as file:
+            with self.assertRaises(TaskCancelled):
+                ProgressReader(file, task).read()
+
+
+if __name__ == "__main__":
+    unittest.main()
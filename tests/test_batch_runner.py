@@ -0,0 +1,108 @@
+import io
+import subprocess
+import sys
+import unittest
+
+from tests import PROJECT_ROOT
+from tests.helpers import DATA_PATH, TreeTestCase
+
+from batch_runner import BatchRunner
+from directory_asset import DirectoryAsset
+
+
+class BatchRunnerTest(TreeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.root = DirectoryAsset("/")
+        self.output = io.StringIO()
+        self.messages = io.StringIO()
+        self.runner = BatchRunner(self.root, output=self.output, messages=self.messages)
+
+    def test_commands(self) -> None:
+        input_file_name = self.get_data_file_name(".txt")
+        (DATA_PATH / input_file_name).write_text('["https://example.com/a", "https://example.com/logo.png", "https://example.com/b"]')
+
+        failed_count = self.runner.run_script([
+            "# a comment, then an empty line",
+            "",
+            f"populate {input_file_name}",
+            'remove "*.png"',
+            "add /c /d",
+            "cd /c",
+            "cd ..",
+            "ls",
+            "search example 1",
+            ])
+
+        self.assertEqual(failed_count, 0, self.messages.getvalue())
+        self.assertEqual(self.output.getvalue().splitlines(), ["/c", "/d", "https://example.com/a", "https://example.com/b", "https://example.com/a"])
+        self.assertNotIn("https://example.com/logo.png", DirectoryAsset.master_list)
+
+    def test_stops_at_the_first_failure(self) -> None:
+        failed_count = self.runner.run_script(["add /a", "frobnicate", "add /b"])
+
+        self.assertEqual(failed_count, 1)
+        self.assertIn("[!] Line 2: 'frobnicate' is not a command.", self.messages.getvalue())
+        self.assertNotIn("/b", DirectoryAsset.master_list)
+
+    def test_keep_going(self) -> None:
+        failed_count = self.runner.run_script(["cd", "populate missing_file.txt", "search admin nope", "add /b"], keep_going=True)
+
+        self.assertEqual(failed_count, 3)
+        messages = self.messages.getvalue()
+        self.assertIn("[!] Line 1: Usage: cd NAME", messages)
+        self.assertIn("[!] Line 2:", messages)
+        self.assertIn("[!] Line 3: The search limit must be a number, not 'nope'.", messages)
+        self.assertIn("/b", DirectoryAsset.master_list)
+
+    def test_file_errors_keep_going(self) -> None:
+        folder_name = self.make_data_folder()
+        # reading and writing a folder raise an OSError other than FileNotFoundError
+        failed_count = self.runner.run_script(["add /a", f"populate {folder_name}", f"save {folder_name}", "add /b"], keep_going=True)
+
+        self.assertEqual(failed_count, 2)
+        messages = self.messages.getvalue().splitlines()
+        self.assertRegex(messages[1], r"^\[!\] Line 2: .*Is a directory")
+        self.assertRegex(messages[2], r"^\[!\] Line 3: .*Is a directory")
+        self.assertIn("/b", DirectoryAsset.master_list)
+
+    def test_failed_commands_change_nothing(self) -> None:
+        self.runner.run_script(["add /a", "remove /missing", "move /a /missing", "merge /a /a", "add /a"], keep_going=True)
+
+        self.assertEqual(list(self.root.children), ["/a"])
+        self.assertStatsMatchTree(self.root)
+
+
+class ScriptExitStatusTest(TreeTestCase):
+    def run_webwalker(self, *arguments:str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, str(PROJECT_ROOT / "src" / "webwalker.py"), *arguments],
+                              cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60)
+
+    def test_exit_status(self) -> None:
+        input_file_name = self.get_data_file_name(".txt")
+        (DATA_PATH / input_file_name).write_text('["/a", "/b"]')
+        output_file_name = self.get_data_file_name(".txt")
+
+        # a script that stops at a failed command does not list anything or save the tree
+        for script, keep_going, exit_status, listed in (("ls\n", False, 0, True), ("nope\nls\n", False, 1, False), ("nope\nls\n", True, 1, True)):
+            with self.subTest(script=script, keep_going=keep_going):
+                script_file_name = self.get_data_file_name(".txt")
+                (DATA_PATH / script_file_name).write_text(script)
+                (DATA_PATH / output_file_name).unlink(missing_ok=True)
+
+                completed = self.run_webwalker("-i", input_file_name, "-x", script_file_name, "-o", output_file_name,
+                                               *(["--keep_going"] if keep_going else []))
+
+                self.assertEqual(completed.returncode, exit_status, completed.stderr)
+                self.assertEqual(completed.stdout.splitlines(), ["/a", "/b"] if listed else [])
+                self.assertEqual((DATA_PATH / output_file_name).exists(), listed)
+
+    def test_missing_script(self) -> None:
+        completed = self.run_webwalker("-x", "missing_script.txt")
+
+        self.assertEqual(completed.returncode, 1)
+        self.assertIn("missing_script.txt was not found", completed.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+from tests import PROJECT_ROOT
+from tests.helpers import DATA_PATH, TreeTestCase
+
+from bulk_import import bulk_import, collect_import_names, find_import_files
+from directory_asset import DirectoryAsset
+from scope_filter import ScopeFilter
+from url_normalizer import UrlNormalizer
+
+
+class BulkImportTest(TreeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.folder_name = self.make_data_folder()
+        # each file repeats the href of the file before it, so some hrefs are duplicated across files
+        for index in range(4):
+            hrefs = [f'"/{index}/a"', f'"/{index}/b"'] + ([f'"/{index - 1}/a"'] if index else [])
+            (DATA_PATH / self.folder_name / f"dump{index}.txt").write_text("[" + ", ".join(hrefs) + "]")
+        (DATA_PATH / self.folder_name / "notes.md").write_text('["/notes"]')
+
+    def test_find_import_files(self) -> None:
+        self.assertEqual([path.name for path in find_import_files(self.folder_name)],
+                         ["dump0.txt", "dump1.txt", "dump2.txt", "dump3.txt", "notes.md"])
+        self.assertEqual([path.name for path in find_import_files(f"{self.folder_name}/*.txt")],
+                         ["dump0.txt", "dump1.txt", "dump2.txt", "dump3.txt"])
+        with self.assertRaisesRegex(FileNotFoundError, "No input files match"):
+            find_import_files(f"{self.folder_name}/*.json")
+
+    def test_patterns_outside_of_the_data_folder(self) -> None:
+        with self.assertRaisesRegex(ValueError, "import pattern is empty"):
+            find_import_files(" ")
+        for import_pattern in ("/etc/*", "../*", f"{self.folder_name}/../../*.txt", str(DATA_PATH / self.folder_name)):
+            with self.subTest(import_pattern=import_pattern), self.assertRaisesRegex(ValueError, "not inside of the data folder"):
+                find_import_files(import_pattern)
+
+    def test_links_out_of_the_data_folder_are_not_followed(self) -> None:
+        with tempfile.TemporaryDirectory() as outside_folder:
+            (Path(outside_folder) / "secret.txt").write_text('["/secret"]')
+            (DATA_PATH / self.folder_name / "link.txt").symlink_to(Path(outside_folder) / "secret.txt")
+
+            self.assertNotIn("link.txt", [path.name for path in find_import_files(self.folder_name)])
+
+    def test_collect_import_names(self) -> None:
+        import_files = find_import_files(f"{self.folder_name}/*.txt")
+        expected_names = ["/0/a", "/0/b", "/1/a", "/1/b", "/2/a", "/2/b", "/3/a", "/3/b"]
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                read_files = []
+                directories_read, unique_directories = collect_import_names(import_files, workers, on_file_read=read_files.append)
+
+                self.assertEqual(directories_read, 11)
+                self.assertEqual(list(unique_directories), expected_names)
+                self.assertEqual(read_files, import_files)
+
+    def test_names_are_normalized_and_filtered(self) -> None:
+        import_files = find_import_files(f"{self.folder_name}/*.txt")
+        (DATA_PATH / self.folder_name / "dump4.txt").write_text('["/0/a/", "/0/a#top", "/4/a"]')
+        import_files.append(DATA_PATH / self.folder_name / "dump4.txt")
+
+        # the pool filters every file, so the urls of /1/ are counted for both files they are in
+        for workers, dropped_count, kept_count in ((1, 2, 7), (2, 3, 10)):
+            with self.subTest(workers=workers):
+                scope_filter = ScopeFilter(exclude_patterns=["/1/"])
+                with mock.patch.object(DirectoryAsset, "url_normalizer", UrlNormalizer(base_url="https://example.com/")), \
+                        mock.patch.object(DirectoryAsset, "scope_filter", scope_filter):
+                    directories_read, unique_directories = collect_import_names(import_files, workers)
+
+                # "/0/a/" and "/0/a#top" are one url once normalized
+                self.assertEqual(directories_read, 14)
+                self.assertEqual(list(unique_directories), [f"https://example.com/{index}/{name}" for index, name in
+                                                            ((0, "a"), (0, "b"), (2, "a"), (2, "b"), (3, "a"), (3, "b"), (4, "a"))])
+                self.assertEqual(scope_filter.dropped_counts, {"exclude /1/": dropped_count})
+                self.assertEqual(scope_filter.kept_count, kept_count)
+
+    def test_filtered_names_are_not_filtered_again(self) -> None:
+        root = DirectoryAsset("/")
+        scope_filter = ScopeFilter(exclude_patterns=["/1/"])
+        with mock.patch.object(DirectoryAsset, "url_normalizer", UrlNormalizer()), mock.patch.object(DirectoryAsset, "scope_filter", scope_filter):
+            result = bulk_import(root, f"{self.folder_name}/*.txt", workers=2)
+
+        self.assertEqual(result.unique_directories, 6)
+        self.assertEqual(list(root.children), ["/0/a", "/0/b", "/2/a", "/2/b", "/3/a", "/3/b"])
+        self.assertEqual(scope_filter.kept_count, 8)
+
+    def test_cancel(self) -> None:
+        import_files = find_import_files(f"{self.folder_name}/*.txt")
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                cancel_event = threading.Event()
+                # cancelled as soon as the first file was added, so no other file is added after it
+                directories_read, unique_directories = collect_import_names(import_files, workers, on_file_read=lambda import_file: cancel_event.set(),
+                                                                            cancel_event=cancel_event)
+
+                self.assertEqual(directories_read, 2)
+                self.assertEqual(list(unique_directories), ["/0/a", "/0/b"])
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+        self.assertEqual(collect_import_names(import_files, 2, cancel_event=cancel_event), (0, {}))
+
+    def test_bulk_import(self) -> None:
+        root = DirectoryAsset("/")
+        result = bulk_import(root, f"{self.folder_name}/*.txt", workers=2)
+
+        self.assertEqual((result.file_count, result.directories_read, result.unique_directories), (4, 11, 8))
+        self.assertEqual(len(result.created_directories), 8)
+        self.assertEqual(list(root.children), ["/0/a", "/0/b", "/1/a", "/1/b", "/2/a", "/2/b", "/3/a", "/3/b"])
+        self.assertIn("(8 unique) from 4 files and added 8 directories", result.get_summary())
+
+    def test_bad_patterns_exit_with_an_error(self) -> None:
+        output_file_name = self.get_data_file_name(".txt")
+
+        for import_pattern, message in (("../*", "not inside of the data folder"), (f"{self.folder_name}/*.json", "No input files match")):
+            with self.subTest(import_pattern=import_pattern):
+                completed = subprocess.run([sys.executable, str(PROJECT_ROOT / "src" / "webwalker.py"), "-b", import_pattern, "-o", output_file_name],
+                                           cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60)
+
+                self.assertEqual(completed.returncode, 1)
+                self.assertRegex(completed.stderr, rf"^\[!\] Could not import {re.escape(import_pattern)}: .*{message}")
+                self.assertFalse((DATA_PATH / output_file_name).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,264 @@
+import random
+import unittest
+
+from tests.helpers import TreeTestCase
+
+from directory_asset import DirectoryAsset, get_url_hierarchy, remove_directories
+
+
+# How many random operations the stats test runs on each tree, and on how many trees.
+RANDOM_OPERATION_COUNT:int = 200
+RANDOM_TREE_COUNT:int = 10
+
+
+class UrlHierarchyTest(unittest.TestCase):
+    def test_absolute_url(self) -> None:
+        self.assertEqual(get_url_hierarchy("https://example.com/a/b?c=d"),
+                         ["https://example.com", "https://example.com/a", "https://example.com/a/b", "https://example.com/a/b?c=d"])
+
+    def test_relative_url(self) -> None:
+        self.assertEqual(get_url_hierarchy("/a/b"), ["/a", "/a/b"])
+
+    def test_protocol_relative_url_keeps_its_slashes(self) -> None:
+        self.assertEqual(get_url_hierarchy("//cdn.com/a"), ["//cdn.com", "//cdn.com/a"])
+
+    def test_url_without_netloc(self) -> None:
+        self.assertEqual(get_url_hierarchy("mailto:someone@example.com"), ["mailto:someone@example.com"])
+
+
+class AddUrlHierarchyTest(TreeTestCase):
+    def test_shared_prefixes_share_directories(self) -> None:
+        root = DirectoryAsset("/")
+        created_directories = root.add_url_hierarchy(["https://example.com/a/b", "https://example.com/a/c", "/x/y", "https://example.com/a"])
+
+        self.assertEqual([directory.name for directory in created_directories],
+                         ["https://example.com", "https://example.com/a", "https://example.com/a/b", "https://example.com/a/c", "/x", "/x/y"])
+        self.assertEqual(list(root.children), ["/x", "https://example.com"])
+        self.assertEqual(list(root.children["https://example.com"].children["https://example.com/a"].children),
+                         ["https://example.com/a/b", "https://example.com/a/c"])
+        self.assertEqual(root.add_url_hierarchy(["https://example.com/a/b"]), [])
+
+
+class AddChildrenTest(TreeTestCase):
+    def test_children_stay_sorted(self) -> None:
+        root = DirectoryAsset("/")
+        root.add_directories(["/c", "/a"])
+        root.add_child(DirectoryAsset("/b", parent=root))
+        root.add_child(DirectoryAsset("/d", parent=root))
+        root.add_directories(["/0", "/e"])
+
+        self.assertEqual(list(root.children), ["/0", "/a", "/b", "/c", "/d", "/e"])
+
+    def test_single_child_after_an_unsorted_batch(self) -> None:
+        root = DirectoryAsset("/")
+        root.add_directories(["/b", "/d"])
+        root.add_directories(["/e", "/a"], sort_children=False)
+        root.add_directories(["/f"], sort_children=False)
+        root.add_child(DirectoryAsset("/c", parent=root))
+
+        self.assertEqual(list(root.children), ["/a", "/b", "/c", "/d", "/e", "/f"])
+
+    def test_single_child_after_an_unsorted_batch_was_removed(self) -> None:
+        # like a cancelled import, which takes back the children it added without sorting
+        root = DirectoryAsset("/")
+        root.add_directories(["/b", "/d"])
+        root.remove_children([child.name for child in root.add_directories(["/e", "/a"], sort_children=False)])
+        root.add_directories(["/f", "/0"], sort_children=False)
+        root.add_child(DirectoryAsset("/c", parent=root))
+
+        self.assertEqual(list(root.children), ["/0", "/b", "/c", "/d", "/f"])
+
+    def test_duplicate_keeps_its_parent(self) -> None:
+        root = DirectoryAsset("/")
+        other_root = DirectoryAsset("/other")
+        removed_child = other_root.add_directories(["/a"])[0]
+        other_root.remove_children(["/a"])
+        child = root.add_directories(["/a"])[0]
+
+        self.assertEqual(root.add_children([removed_child]), [])
+        self.assertIs(removed_child.parent, other_root)
+        self.assertIs(root.children["/a"], child)
+
+
+class RemoveChildrenTest(TreeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.root = DirectoryAsset("/")
+        self.root.add_directories(["/a", "/b", "/logo.png"])
+        self.root.children["/a"].add_directories(["/a/1", "/a/2"])
+        self.root.children["/a"].children["/a/1"].add_directories(["/a/1/x"])
+
+    def test_the_whole_subtree_is_removed(self) -> None:
+        self.root.remove_child("/a")
+
+        self.assertEqual(list(self.root.children), ["/b", "/logo.png"])
+        for name in ("/a", "/a/1", "/a/2", "/a/1/x"):
+            self.assertNotIn(name, DirectoryAsset.master_list)
+        # the removed names can be added again
+        self.root.add_directories(["/a/1"])
+        self.assertIn("/a/1", DirectoryAsset.master_list)
+
+    def test_missing_child_removes_nothing(self) -> None:
+        with self.assertRaises(ValueError):
+            self.root.remove_children(["/b", "/missing"])
+        self.assertIn("/b", self.root.children)
+
+    def test_remove_matching_children(self) -> None:
+        self.assertEqual([child.name for child in self.root.remove_matching_children("*.png")], ["/logo.png"])
+        self.assertEqual(self.root.remove_matching_children("*.css"), [])
+
+    def test_undo_removal(self) -> None:
+        removed_children = self.root.remove_children(["/a", "/b"])
+        self.root.restore_children(removed_children)
+
+        self.assertEqual(list(self.root.children), ["/a", "/b", "/logo.png"])
+        self.assertIn("/a/1/x", DirectoryAsset.master_list)
+
+    def test_undo_after_a_name_was_created_again(self) -> None:
+        removed_children = self.root.remove_children(["/a"])
+        self.root.children["/b"].add_directories(["/a/2"])
+
+        with self.assertRaisesRegex(ValueError, "created again"):
+            self.root.restore_children(removed_children)
+        self.assertNotIn("/a", DirectoryAsset.master_list)
+
+    def test_remove_directories(self) -> None:
+        directory_a = self.root.children["/a"]
+        remove_directories([directory_a.children["/a/1"].children["/a/1/x"], directory_a, self.root.children["/b"]])
+
+        self.assertEqual(list(self.root.children), ["/logo.png"])
+        self.assertEqual(len(DirectoryAsset.master_list), 2)
+
+
+class MoveAndMergeTest(TreeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.root = DirectoryAsset("/")
+        self.root.add_directories(["/a", "/b"])
+        self.root.children["/a"].add_directories(["/a/1"])
+        self.root.children["/a"].children["/a/1"].add_directories(["/a/1/x"])
+
+    def test_levels_follow_the_move(self) -> None:
+        directory_1 = self.root.children["/a"].children["/a/1"]
+        directory_1.move_to(self.root)
+
+        self.assertIs(self.root.children["/a/1"], directory_1)
+        self.assertIs(directory_1.parent, self.root)
+        self.assertEqual(directory_1.level, 4)
+        self.assertEqual(directory_1.children["/a/1/x"].level, 6)
+
+    def test_move_into_own_subtree_is_refused(self) -> None:
+        directory_a = self.root.children["/a"]
+
+        with self.assertRaisesRegex(ValueError, "inside of /a"):
+            directory_a.move_to(directory_a.children["/a/1"])
+        with self.assertRaisesRegex(ValueError, "already a child"):
+            directory_a.move_to(self.root)
+        with self.assertRaisesRegex(ValueError, "inside of /a"):
+            directory_a.merge_into(directory_a)
+
+    def test_merge_moves_the_children(self) -> None:
+        moved_children = self.root.children["/a"].merge_into(self.root.children["/b"])
+
+        self.assertEqual([child.name for child in moved_children], ["/a/1"])
+        self.assertIs(moved_children[0].parent, self.root.children["/b"])
+        self.assertEqual(list(self.root.children), ["/b"])
+        self.assertEqual(self.root.children["/b"].children["/a/1"].children["/a/1/x"].level, 8)
+
+
+class SubtreeStatsTest(TreeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.root = DirectoryAsset("/")
+        self.root.add_directories(["/a", "/b"])
+        self.root.children["/a"].add_directories(["/a/1", "/a/2"])
+        self.root.children["/a"].children["/a/1"].add_directories(["/a/1/x"])
+
+    def test_add(self) -> None:
+        self.assertEqual(self.root.descendant_count, 5)
+        self.assertEqual(self.root.height, 3)
+        self.assertStatsMatchTree(self.root)
+
+    def test_remove_tallest_child(self) -> None:
+        directory_a = self.root.children["/a"]
+        directory_a.children["/a/2"].add_directories(["/a/2/y"])
+        directory_a.remove_children(["/a/1"])
+
+        self.assertEqual(self.root.height, 3)
+        self.assertStatsMatchTree(self.root)
+
+        directory_a.remove_children(["/a/2"])
+        self.assertEqual(self.root.height, 1)
+        self.assertStatsMatchTree(self.root)
+
+    def test_move(self) -> None:
+        self.root.children["/a"].children["/a/1"].move_to(self.root.children["/b"])
+
+        self.assertEqual(self.root.children["/a"].height, 1)
+        self.assertEqual(self.root.children["/b"].height, 2)
+        self.assertStatsMatchTree(self.root)
+
+    def test_merge(self) -> None:
+        self.root.children["/a"].merge_into(self.root.children["/b"])
+
+        self.assertNotIn("/a", DirectoryAsset.master_list)
+        self.assertEqual(list(self.root.children["/b"].children), ["/a/1", "/a/2"])
+        self.assertStatsMatchTree(self.root)
+
+    def test_undo_removal(self) -> None:
+        removed_children = self.root.remove_children(["/a"])
+        self.assertEqual(self.root.descendant_count, 1)
+        self.assertNotIn("/a/1/x", DirectoryAsset.master_list)
+
+        self.root.restore_children(removed_children)
+        self.assertEqual(self.root.descendant_count, 5)
+        self.assertIn("/a/1/x", DirectoryAsset.master_list)
+        self.assertStatsMatchTree(self.root)
+
+    def test_undo_into_merged_directory_is_refused(self) -> None:
+        directory_a = self.root.children["/a"]
+        removed_children = directory_a.remove_children(["/a/1"])
+        directory_a.merge_into(self.root.children["/b"])
+
+        with self.assertRaises(ValueError):
+            directory_a.restore_children(removed_children)
+        self.assertNotIn("/a/1", DirectoryAsset.master_list)
+        self.assertStatsMatchTree(self.root)
+
+    def test_random_operations(self) -> None:
+        random_generator = random.Random(0)
+        for _ in range(RANDOM_TREE_COUNT):
+            DirectoryAsset.nuke_directory()
+            root = DirectoryAsset("/")
+            name_count = 0
+            removals:list[tuple[DirectoryAsset, list[DirectoryAsset]]] = []
+
+            for _ in range(RANDOM_OPERATION_COUNT):
+                directory = DirectoryAsset.master_list.get(random_generator.choice([directory.name for directory in DirectoryAsset.master_list]))
+                target = DirectoryAsset.master_list.get(random_generator.choice([directory.name for directory in DirectoryAsset.master_list]))
+                operation = random_generator.random()
+
+                try:
+                    if operation < 0.45:
+                        new_count = random_generator.randint(1, 4)
+                        directory.add_directories([f"/{name_count + index}" for index in range(new_count)])
+                        name_count += new_count
+                    elif operation < 0.6 and directory.children:
+                        child_names = random_generator.sample(list(directory.children), random_generator.randint(1, len(directory.children)))
+                        removals.append((directory, directory.remove_children(child_names)))
+                    elif operation < 0.7 and removals:
+                        parent_directory, removed_children = removals.pop(random_generator.randrange(len(removals)))
+                        parent_directory.restore_children(removed_children)
+                    elif operation < 0.85 and directory is not root:
+                        directory.move_to(target)
+                    elif directory is not root:
+                        directory.merge_into(target)
+                except ValueError:
+                    pass
+
+                self.assertStatsMatchTree(root)
+            self.assertEqual(root.descendant_count + 1, len(DirectoryAsset.master_list))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+
+from unittest import mock
+
+from tests.helpers import DATA_PATH, TreeTestCase
+
+from background_task import BackgroundTask
+from directory_asset import DirectoryAsset
+from directory_navigator import DirectoryNavigator, TreeBrowser, TreeWindow
+from tree_journal import TreeJournal
+
+
+def build_wide_tree(child_count:int) -> DirectoryAsset:
+    """Return a root with child_count children, each with one child of its own."""
+    root = DirectoryAsset("/")
+    for child in root.add_directories(f"/{index:03}" for index in range(child_count)):
+        child.add_directories([child.name + "/x"])
+    return root
+
+
+class TreeWindowTest(TreeTestCase):
+    def test_windows_match_the_whole_tree(self) -> None:
+        root = build_wide_tree(50)
+        lines = list(root.iter_asset_lines())
+        tree_window = TreeWindow(root, cache_size=10)
+
+        for start in (0, 7, 60, 3, 95, 0):
+            with self.subTest(start=start):
+                self.assertEqual(tree_window.get_lines(start, 10), lines[start:start + 10])
+        self.assertEqual(tree_window.get_lines(len(lines), 10), [])
+
+    def test_only_the_cache_is_kept(self) -> None:
+        tree_window = TreeWindow(build_wide_tree(50), cache_size=10)
+        tree_window.get_lines(90, 5)
+
+        self.assertLessEqual(len(tree_window.cached_lines), 20)
+
+
+class TreeBrowserTest(TreeTestCase):
+    def test_expand_and_collapse(self) -> None:
+        root = build_wide_tree(3)
+        tree_browser = TreeBrowser(root)
+
+        self.assertEqual([tree_browser.get_row_string(row_number) for row_number in range(len(tree_browser))],
+                         ["[-] /", "  [+] /000", "  [+] /001", "  [+] /002"])
+
+        tree_browser.toggle(2)
+        self.assertEqual(tree_browser.get_row_string(2), "  [-] /001")
+        self.assertEqual(tree_browser.get_row_string(3), "     -  /001/x")
+        self.assertEqual(tree_browser.get_parent_row(3), 2)
+        self.assertEqual(tree_browser.get_parent_row(4), 0)
+
+        tree_browser.toggle(0)
+        self.assertEqual(len(tree_browser), 1)
+
+    def test_only_expanded_directories_have_rows(self) -> None:
+        tree_browser = TreeBrowser(build_wide_tree(100))
+
+        self.assertEqual(len(tree_browser), 101)
+        tree_browser.expand(1)
+        tree_browser.expand(1)
+        self.assertEqual(len(tree_browser), 102)
+
+
+class NavigatorTestCase(TreeTestCase):
+    """A test case that creates navigators without curses or their main loop."""
+
+    def make_navigator(self, current_directory:DirectoryAsset, **kwargs) -> DirectoryNavigator:
+        with mock.patch("directory_navigator.curses"), mock.patch.object(DirectoryNavigator, "enter_main_loop"):
+            return DirectoryNavigator(current_directory, mock.Mock(), **kwargs)
+
+
+class TrackImportTest(NavigatorTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.root = DirectoryAsset("/")
+        self.root.add_directories(["/m"])
+        self.journal_name = self.get_data_stem([".journal", ".snap"])
+        self.journal = TreeJournal(self.journal_name)
+        self.journal.start(self.root)
+        self.navigator = self.make_navigator(self.root, journal=self.journal)
+
+    def test_import_is_sorted_and_journaled_once_done(self) -> None:
+        file_name = self.get_data_file_name(".txt")
+        (DATA_PATH / file_name).write_text('["/z", "/a", "/m", "/b"]')
+
+        self.navigator.import_in_background(self.root, open(DATA_PATH / file_name))
+        self.navigator.poll_background_task(wait=True)
+
+        self.assertIsNone(self.navigator.background_task)
+        self.assertRegex(self.navigator.task_message, r"^\[\+\] Added 3 directories to / in ")
+        self.assertEqual(list(self.root.children), ["/a", "/b", "/m", "/z"])
+        DirectoryAsset.nuke_directory()
+        self.assertEqual(list(TreeJournal(self.journal_name).restore().children), ["/a", "/b", "/m", "/z"])
+
+    def start_import(self, work) -> BackgroundTask:
+        """Track a task that hands over a batch and then runs work, and wait until the batch was added."""
+        def hand_off_and_work(task:BackgroundTask) -> None:
+            task.hand_off(["/z", "/a", "/m/1"])
+            work(task)
+
+        task = BackgroundTask("Importing", hand_off_and_work)
+        self.navigator.track_import(task, self.root, lambda task, created_directories: "[+] Done.")
+        while not task.nodes_done:
+            self.navigator.poll_background_task()
+        return task
+
+    def test_cancelled_import_is_taken_back(self) -> None:
+        def wait_for_cancel(task:BackgroundTask) -> None:
+            while True:
+                task.check_cancelled()
+                task.cancel_event.wait(0.01)
+
+        task = self.start_import(wait_for_cancel)
+        self.navigator.current_directory = self.root.children["/z"]
+        task.cancel()
+        self.navigator.poll_background_task(wait=True)
+
+        self.assertEqual(self.navigator.task_message, "[!] Cancelled: Importing. Nothing was added.")
+        self.assertEqual(list(self.root.children), ["/m"])
+        self.assertEqual(len(DirectoryAsset.master_list), 2)
+        # the directory the user was in was taken back, so the navigator went up to its parent
+        self.assertIs(self.navigator.current_directory, self.root)
+        self.assertStatsMatchTree(self.root)
+
+    def test_failed_import_is_taken_back(self) -> None:
+        def fail(task:BackgroundTask) -> None:
+            raise OSError("[!] The disk is gone.")
+
+        self.start_import(fail)
+        self.navigator.poll_background_task(wait=True)
+
+        self.assertEqual(self.navigator.task_message, "[!] Importing failed: The disk is gone.")
+        self.assertEqual(list(self.root.children), ["/m"])
+        self.assertStatsMatchTree(self.root)
+
+
+class BulkImportTest(NavigatorTestCase):
+    def test_bad_patterns_are_reported(self) -> None:
+        root = DirectoryAsset("/")
+        navigator = self.make_navigator(root, import_pattern="/etc/*")
+        self.assertEqual(navigator.task_message, "[!] Could not import /etc/*: /etc/* is not inside of the data folder. Use a folder or glob pattern relative to it.")
+
+        navigator.stdscr.getstr.return_value = b""
+        navigator.bulk_import_files()
+
+        navigator.stdscr.addstr.assert_any_call(2, 0, "[!] Could not import : The import pattern is empty. Nothing happened.", navigator.RED_ALERT)
+        self.assertIsNone(navigator.background_task)
+
+
+class JournalCompactionTest(NavigatorTestCase):
+    def test_compaction_runs_in_the_background(self) -> None:
+        root = DirectoryAsset("/")
+        root.add_directories(["/a"])
+        journal = TreeJournal(self.get_data_stem([".journal", ".snap"]), compact_every=2)
+        journal.compact_in_background = True
+        journal.start(root)
+        navigator = self.make_navigator(root, journal=journal)
+
+        navigator.compact_journal_if_due()
+        self.assertIsNotNone(navigator.background_task)
+        navigator.poll_background_task(wait=True)
+
+        self.assertTrue(journal.has_snapshot())
+        self.assertFalse(journal.compaction_due)
+        self.assertRegex(navigator.task_message, r"^\[\+\] Compacted the journal")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import io
+import unittest
+
+from href_reader import iter_hrefs
+
+
+def read_hrefs(text:str, chunk_size:int) -> list[str]:
+    return list(iter_hrefs(io.StringIO(text), chunk_size=chunk_size))
+
+
+class IterHrefsTest(unittest.TestCase):
+    # each input and the hrefs read from it
+    CASES:list[tuple[str, list[str]]] = [
+        ('["/login", "/search?q=a, b"]', ["/login", "/search?q=a, b"]),
+        ('[\n  "/a",\n  "/b"\n]\n', ["/a", "/b"]),
+        ("Array(2) [ '/a', '/b' ]", ["/a", "/b"]),
+        ("(2) ['/a', '/b']", ["/a", "/b"]),
+        ("https://example.com/a\n/b\n\n  /c  \n", ["https://example.com/a", "/b", "/c"]),
+        ('["/a\\"quoted\\"", "/amp\\u0026", \'/it\\\'s\']', ['/a"quoted"', "/amp&", "/it's"]),
+        ('["/unclosed\n/next', ["/unclosed", "/next"]),
+        ('["", "  ", "/kept"]', ["/kept"]),
+        ]
+
+    def test_formats(self) -> None:
+        for text, hrefs in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(read_hrefs(text, chunk_size=1 << 16), hrefs)
+
+    def test_tokens_split_across_chunks(self) -> None:
+        # every chunk size up to the length of the input splits some token in every possible place
+        for text, hrefs in self.CASES:
+            for chunk_size in range(1, len(text) + 1):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    self.assertEqual(read_hrefs(text, chunk_size), hrefs)
+
+    def test_duplicates_are_kept(self) -> None:
+        self.assertEqual(read_hrefs('["/a", "/a"]', chunk_size=3), ["/a", "/a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import sys
+import threading
+import unittest
+
+from tests.helpers import DATA_PATH, TreeTestCase
+
+from metrics import Metrics
+
+
+class MetricsTest(TreeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.metrics = Metrics()
+
+    def test_timers_and_counters(self) -> None:
+        self.metrics.add_time("load", 0.5)
+        self.metrics.add_time("load", 0.25)
+        with self.assertRaises(KeyError):
+            with self.metrics.timer("lookup"):
+                raise KeyError("timed even though it failed")
+        self.metrics.count("directories created", 3)
+        self.metrics.count("directories created")
+        self.metrics.count("duplicates rejected", 0)
+
+        metrics_dict = self.metrics.to_dict()
+        self.assertEqual(metrics_dict["timers"]["load"], {"calls": 2, "total_ms": 750.0, "max_ms": 500.0})
+        self.assertEqual(metrics_dict["timers"]["lookup"]["calls"], 1)
+        self.assertEqual(metrics_dict["counters"], {"directories created": 4})
+
+    def test_decorated_function(self) -> None:
+        @self.metrics.timer("work")
+        def work() -> int:
+            return 1
+
+        work()
+        work()
+        self.assertEqual(self.metrics.timers["work"][0], 2)
+
+    def test_threads_do_not_lose_updates(self) -> None:
+        thread_count = 8
+        update_count = 20000
+
+        def record() -> None:
+            for _ in range(update_count):
+                self.metrics.count("directories created")
+                self.metrics.add_time("load", 0.5)
+
+        # switching threads as often as possible, so an unlocked update would be interrupted halfway
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        threads = [threading.Thread(target=record) for _ in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.metrics.counters["directories created"], thread_count * update_count)
+        self.assertEqual(self.metrics.timers["load"][:2], [thread_count * update_count, thread_count * update_count * 0.5])
+
+    def test_report(self) -> None:
+        self.assertEqual(self.metrics.get_report(), "Nothing has been measured yet.")
+
+        self.metrics.add_time("fast", 0.001)
+        self.metrics.add_time("slow", 1.0)
+        self.metrics.count("bytes read", 12345)
+        report_lines = self.metrics.get_report().splitlines()
+
+        self.assertTrue(report_lines[1].startswith("slow"))
+        self.assertTrue(report_lines[2].startswith("fast"))
+        self.assertEqual(report_lines[-1], "  bytes read: 12,345")
+
+        self.metrics.reset()
+        self.assertEqual(self.metrics.get_report(), "Nothing has been measured yet.")
+
+    def test_save_json(self) -> None:
+        self.metrics.count("directories created", 2)
+        file_name = self.get_data_file_name(".json")
+
+        self.assertEqual(self.metrics.save_json(file_name), DATA_PATH / file_name)
+        self.assertEqual(json.loads((DATA_PATH / file_name).read_text()), self.metrics.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
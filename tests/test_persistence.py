@@ -0,0 +1,215 @@
+import sys
+import unittest
+
+from tests.helpers import DATA_PATH, TreeTestCase
+
+from directory_asset import DirectoryAsset
+from read_only_tree import ReadOnlyTree
+from tree_journal import TreeJournal
+from tree_snapshot import COMPRESSION_TYPES, load_snapshot, save_snapshot
+from webwalker import parse_directory_list
+
+
+def build_tree() -> DirectoryAsset:
+    """Return a small tree with urls, relative paths, spaces and more than one level of children."""
+    root = DirectoryAsset("/")
+    root.add_directories(["https://example.com", "/login", "/search?q=a, b"])
+    site = root.children["https://example.com"]
+    site.add_directories(["https://example.com/app", "https://example.com/about"])
+    site.children["https://example.com/app"].add_directories(["https://example.com/app/main.js"])
+    return root
+
+
+def get_tree_shape(directory) -> list[tuple[int, str]]:
+    """Return the depth and name of every directory below directory, in pre-order. Works for ReadOnlyDirectory too."""
+    shape = []
+    stack = [(0, directory)]
+    while stack:
+        depth, current_directory = stack.pop()
+        shape.append((depth, current_directory.name))
+        stack.extend((depth + 1, child) for child in reversed(list(current_directory.children.values())))
+    return shape
+
+
+class TreeFileTest(TreeTestCase):
+    def test_round_trip(self) -> None:
+        root = build_tree()
+        shape = get_tree_shape(root)
+        file_name = self.get_data_file_name(".txt")
+        root.create_output_file(file_name)
+
+        DirectoryAsset.nuke_directory()
+        with open(DATA_PATH / file_name) as file:
+            parsed_root = parse_directory_list(file)
+
+        self.assertEqual(get_tree_shape(parsed_root), shape)
+        self.assertStatsMatchTree(parsed_root)
+
+    def test_lines_are_indented_by_level(self) -> None:
+        root = build_tree()
+
+        self.assertEqual(root.get_asset_list_string(), "".join(root.iter_asset_lines()))
+        self.assertEqual(list(root.children["https://example.com"].iter_asset_lines(include_self=False)), [
+            "    - https://example.com/about\n",
+            "    - https://example.com/app\n",
+            "      - https://example.com/app/main.js\n",
+            ])
+
+    def test_directory_without_children(self) -> None:
+        with self.assertRaises(IndexError):
+            DirectoryAsset("/").iter_asset_lines()
+
+
+class TreeFileParserTest(TreeTestCase):
+    def test_dedent_by_more_than_one_level(self) -> None:
+        root = parse_directory_list(["- /\n", "  - /a\n", "    - /a/b\n", "      - /a/b/c\n", "  - /d\n", "\n"])
+
+        self.assertEqual(get_tree_shape(root), [(0, "/"), (1, "/a"), (2, "/a/b"), (3, "/a/b/c"), (1, "/d")])
+
+    def test_deeper_than_the_recursion_limit(self) -> None:
+        depth = sys.getrecursionlimit() + 100
+        root = parse_directory_list(" " * (2 * level) + f"- /{level}\n" for level in range(depth))
+
+        self.assertEqual(len(DirectoryAsset.master_list), depth)
+        self.assertEqual(root.height, depth - 1)
+        self.assertEqual(sum(1 for _ in root.iter_asset_lines()), depth)
+
+    def test_malformed_line(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Line 2"):
+            parse_directory_list(["- /\n", "/a\n"])
+
+    def test_second_root(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Line 3: '/b' is at the same level as the root directory."):
+            parse_directory_list(["- /\n", "  - /a\n", "- /b\n"])
+
+    def test_no_directories(self) -> None:
+        with self.assertRaises(ValueError):
+            parse_directory_list(["\n"])
+
+
+class SnapshotTest(TreeTestCase):
+    def test_round_trip(self) -> None:
+        for compression in COMPRESSION_TYPES:
+            with self.subTest(compression=compression):
+                DirectoryAsset.nuke_directory()
+                root = build_tree()
+                shape = get_tree_shape(root)
+                file_name = self.get_data_file_name(".snap")
+                save_snapshot(root, file_name, compression=compression)
+
+                DirectoryAsset.nuke_directory()
+                loaded_root = load_snapshot(file_name)
+
+                self.assertEqual(get_tree_shape(loaded_root), shape)
+                self.assertStatsMatchTree(loaded_root)
+
+    def test_not_a_snapshot(self) -> None:
+        file_name = self.get_data_file_name(".snap")
+        (DATA_PATH / file_name).write_bytes(b"not a snapshot at all")
+
+        with self.assertRaises(ValueError):
+            load_snapshot(file_name)
+
+
+class ReadOnlyTreeTest(TreeTestCase):
+    def test_browse(self) -> None:
+        root = build_tree()
+        shape = get_tree_shape(root)
+        lines = list(root.iter_asset_lines())
+        file_name = self.get_data_file_name(".snap")
+        save_snapshot(root, file_name, compression="none")
+
+        DirectoryAsset.nuke_directory()
+        read_only_tree = ReadOnlyTree(file_name)
+        self.addCleanup(read_only_tree.close)
+
+        self.assertEqual(len(read_only_tree), len(shape))
+        self.assertEqual(get_tree_shape(read_only_tree.root), shape)
+        self.assertEqual(list(read_only_tree.root.iter_asset_lines()), lines)
+        self.assertIn("/login", read_only_tree)
+        self.assertEqual(read_only_tree.get("https://example.com/app/main.js").name, "https://example.com/app/main.js")
+        self.assertIsNone(read_only_tree.get("https://example.com/missing"))
+        # the directories are read from the file as they are needed, not created
+        self.assertEqual(len(DirectoryAsset.master_list), 0)
+
+    def test_refuses_compressed_snapshots(self) -> None:
+        file_name = self.get_data_file_name(".snap")
+        save_snapshot(build_tree(), file_name, compression="zlib")
+
+        with self.assertRaisesRegex(ValueError, "--snapshot_compression none"):
+            ReadOnlyTree(file_name)
+
+
+class TreeJournalTest(TreeTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.journal_name = self.get_data_stem([".journal", ".snap"])
+
+    def make_changes(self, journal:TreeJournal, root:DirectoryAsset) -> None:
+        """Make and journal one change of every kind."""
+        site = root.children["https://example.com"]
+        journal.record_added(site.add_directories(["https://example.com/new"]))
+        journal.record_removed(root, [child.name for child in root.remove_children(["/login"])])
+        app = site.children["https://example.com/app"]
+        app.move_to(root)
+        journal.record_moved(site, app, root)
+        about = site.children["https://example.com/about"]
+        about.merge_into(root.children["/search?q=a, b"])
+        journal.record_merged(site, about.name, root.children["/search?q=a, b"])
+
+    def test_replay(self) -> None:
+        root = build_tree()
+        journal = TreeJournal(self.journal_name)
+        journal.start(root)
+        self.make_changes(journal, root)
+        shape = get_tree_shape(root)
+
+        DirectoryAsset.nuke_directory()
+        restoring_journal = TreeJournal(self.journal_name)
+        self.assertTrue(restoring_journal.has_snapshot())
+        restored_root = restoring_journal.restore()
+
+        self.assertEqual(get_tree_shape(restored_root), shape)
+        self.assertEqual(restoring_journal.changes_since_compaction, 4)
+        self.assertStatsMatchTree(restored_root)
+
+    def test_compaction(self) -> None:
+        root = build_tree()
+        journal = TreeJournal(self.journal_name, compact_every=2)
+        journal.start(root)
+        self.make_changes(journal, root)
+        shape = get_tree_shape(root)
+
+        self.assertEqual(journal.changes_since_compaction, 0)
+        self.assertEqual((DATA_PATH / (self.journal_name + ".journal")).read_text(), "")
+
+        DirectoryAsset.nuke_directory()
+        self.assertEqual(get_tree_shape(TreeJournal(self.journal_name).restore()), shape)
+
+    def test_compaction_left_to_the_caller(self) -> None:
+        journal = TreeJournal(self.journal_name, compact_every=2)
+        journal.compact_in_background = True
+        journal.start(build_tree())
+
+        self.assertTrue(journal.compaction_due)
+        self.assertFalse(journal.has_snapshot())
+        journal.compact()
+        self.assertFalse(journal.compaction_due)
+        self.assertTrue(journal.has_snapshot())
+
+    def test_cut_off_line_ends_the_replay(self) -> None:
+        root = build_tree()
+        journal = TreeJournal(self.journal_name)
+        journal.start(root)
+        site = root.children["https://example.com"]
+        journal.record_added(site.add_directories(["https://example.com/kept"]))
+        with open(DATA_PATH / (self.journal_name + ".journal"), "a") as journal_file:
+            journal_file.write('{"operation": "add", "parent": "/", "na')
+
+        DirectoryAsset.nuke_directory()
+        TreeJournal(self.journal_name).restore()
+        self.assertIn("https://example.com/kept", DirectoryAsset.master_list)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from scope_filter import ScopeFilter
+
+
+class ScopeFilterTest(unittest.TestCase):
+    def test_hosts(self) -> None:
+        scope_filter = ScopeFilter(hosts=["example.com", "*.example.org"])
+        self.assertIsNone(scope_filter.get_drop_rule("https://example.com/a"))
+        self.assertIsNone(scope_filter.get_drop_rule("https://EXAMPLE.com:8443/a"))
+        self.assertIsNone(scope_filter.get_drop_rule("https://api.example.org/a"))
+        self.assertEqual(scope_filter.get_drop_rule("https://example.org/a"), "host")
+        self.assertEqual(scope_filter.get_drop_rule("https://evil.com/a"), "host")
+        self.assertIsNone(scope_filter.get_drop_rule("/relative"))
+
+    def test_schemes(self) -> None:
+        scope_filter = ScopeFilter()
+        self.assertEqual(scope_filter.get_drop_rule("mailto:someone@example.com"), "scheme")
+        self.assertEqual(scope_filter.get_drop_rule("javascript:void(0)"), "scheme")
+        self.assertIsNone(scope_filter.get_drop_rule("http://example.com"))
+
+    def test_paths_and_patterns(self) -> None:
+        scope_filter = ScopeFilter(path_prefixes=["/app"], include_patterns=["api|admin"], exclude_patterns=[r"\.png$", "logout"])
+        self.assertIsNone(scope_filter.get_drop_rule("https://example.com/app/api/users"))
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/about"), "path")
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/app/home"), "include")
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/app/admin/logo.png"), r"exclude \.png$")
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/app/admin/logout"), "exclude logout")
+
+    def test_patterns_with_groups_or_flags(self) -> None:
+        # these are compiled on their own, so the backreferences still point at their own groups
+        scope_filter = ScopeFilter(exclude_patterns=["logout", r"/(\w+)/\1/", r"(?P<part>\d+)-(?P=part)", "(?i)ADMIN"])
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/a/a/b"), r"exclude /(\w+)/\1/")
+        self.assertIsNone(scope_filter.get_drop_rule("https://example.com/a/b/a"))
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/12-12"), r"exclude (?P<part>\d+)-(?P=part)")
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/admin"), "exclude (?i)ADMIN")
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/logout"), "exclude logout")
+        self.assertEqual(len(scope_filter.exclude_rule_patterns), 4)
+
+        scope_filter = ScopeFilter(include_patterns=[r"/(\w+)/\1/", "api"])
+        self.assertIsNone(scope_filter.get_drop_rule("https://example.com/b/b/"))
+        self.assertIsNone(scope_filter.get_drop_rule("https://example.com/api"))
+        self.assertEqual(scope_filter.get_drop_rule("https://example.com/b/c/"), "include")
+
+    def test_invalid_pattern(self) -> None:
+        with self.assertRaises(ValueError):
+            ScopeFilter(include_patterns=["("])
+
+    def test_filter_counts(self) -> None:
+        scope_filter = ScopeFilter(hosts=["example.com"])
+        urls = ["https://example.com/a", "https://evil.com/a", "mailto:a@example.com", "https://evil.com/b"]
+
+        self.assertEqual(list(scope_filter.filter(urls)), ["https://example.com/a"])
+        self.assertEqual(scope_filter.kept_count, 1)
+        self.assertEqual(scope_filter.dropped_counts, {"host": 2, "scheme": 1})
+        self.assertEqual(scope_filter.get_summary(), "[+] Scope: kept 1 urls, dropped 3 (host: 2, scheme: 1).")
+
+
+if __name__ == "__main__":
+    unittest.main()
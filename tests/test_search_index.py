@@ -0,0 +1,165 @@
+import subprocess
+import sys
+import unittest
+
+from unittest import mock
+
+from tests import PROJECT_ROOT
+from tests.helpers import DATA_PATH, TreeTestCase
+
+import directory_asset
+import search_index
+from directory_asset import DirectoryAsset
+from search_index import NameScanner, SearchIndex, SearchIndexBuilder, get_letter_pairs, tokenize
+
+
+NAMES:list[str] = [
+    "https://example.com/admin",
+    "https://example.com/admin/users",
+    "https://example.com/login",
+    "https://example.com/Administrator",
+    "https://example.com/item1234",
+    "https://other.org/admin",
+    ]
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.search_index = SearchIndex(NAMES)
+
+    def test_tokenize(self) -> None:
+        self.assertEqual(tokenize("https://Example.com/item1234"), ["https", "example", "com", "item", "1234"])
+
+    def test_ranking(self) -> None:
+        self.assertEqual(self.search_index.search("https://example.com/admin", limit=3),
+                         ["https://example.com/admin", "https://example.com/admin/users", "https://example.com/Administrator"])
+
+    def test_prefix_substring_and_fuzzy_matches(self) -> None:
+        self.assertIn("https://example.com/Administrator", self.search_index.search("administ"))
+        self.assertEqual(self.search_index.search("ogin"), ["https://example.com/login"])
+        self.assertEqual(self.search_index.search("logni"), ["https://example.com/login"])
+        self.assertEqual(self.search_index.search("item 12"), ["https://example.com/item1234"])
+        self.assertEqual(self.search_index.search("nothing here"), [])
+        self.assertEqual(self.search_index.search("  "), [])
+
+    def test_add_and_discard(self) -> None:
+        self.search_index.add("https://example.com/logout")
+        self.search_index.discard("https://example.com/login")
+
+        self.assertEqual(self.search_index.search("log"), ["https://example.com/logout"])
+
+    def test_discard_removes_the_letter_pairs_and_lengths(self) -> None:
+        self.search_index.discard("https://example.com/item1234")
+
+        self.assertNotIn("tm", self.search_index.pair_words)
+        self.assertNotIn(len("https://example.com/item1234"), self.search_index.length_names)
+        self.assertEqual(self.search_index.search("tem"), [])
+
+    def test_get_letter_pairs(self) -> None:
+        self.assertEqual(get_letter_pairs("login"), {"lo", "og", "gi", "in", "lg", "oi", "gn"})
+        self.assertEqual(get_letter_pairs("a"), set())
+
+    def test_common_tokens_are_found_by_length(self) -> None:
+        names = [f"https://host{index}.example.com/{word}{index}" for index in range(200) for word in ("admin", "login", "api")]
+        index = SearchIndex(names)
+        queries = ["admin", "host1", "https", "a", "lgoin", "host12 api"]
+        expected = {query: index.search(query) for query in queries}
+
+        # every token is common now, so the names are checked from the shortest up, with one or several intersections
+        for scan_token_limit in (20, 1):
+            with mock.patch.object(search_index, "RANK_ALL_LIMIT", 0), mock.patch.object(search_index, "SET_SCAN_TOKEN_LIMIT", scan_token_limit):
+                for query in queries:
+                    with self.subTest(query=query, scan_token_limit=scan_token_limit):
+                        self.assertEqual(index.search(query), expected[query])
+
+    def test_rare_matches_are_collected_from_the_index(self) -> None:
+        expected = self.search_index.search("com a")
+
+        # "administrator" is left out of the intersections, so the names without "admin" have to be tokenized
+        with mock.patch.object(search_index, "RANK_ALL_LIMIT", 0), mock.patch.object(search_index, "SET_SCAN_TOKEN_LIMIT", 1), \
+                mock.patch.object(search_index, "LENGTH_SCAN_LIMIT", 0):
+            self.assertIsNone(self.search_index.find_shortest_matches([["com"], ["admin", "administrator"]], 10))
+            self.assertEqual(self.search_index.search("com a"), expected)
+
+class NameScannerTest(unittest.TestCase):
+    def test_every_token_must_match(self) -> None:
+        scanner = NameScanner(NAMES)
+
+        self.assertEqual(list(scanner.iter_matches(["admin"])),
+                         ["https://example.com/admin", "https://example.com/admin/users", "https://example.com/Administrator", "https://other.org/admin"])
+        self.assertEqual(list(scanner.iter_matches(["other", "admin"])), ["https://other.org/admin"])
+        self.assertEqual(list(scanner.iter_matches(["logni"])), [])
+
+    def test_names_whose_lowercase_form_is_longer(self) -> None:
+        # "İ" becomes two characters when lowercased, which would shift every name after it
+        scanner = NameScanner(["/İstanbul", "/login"])
+
+        self.assertEqual(list(scanner.iter_matches(["login"])), ["/login"])
+
+
+class SearchIndexBuilderTest(unittest.TestCase):
+    def test_scan_includes_changes_until_the_index_is_done(self) -> None:
+        builder = SearchIndexBuilder(list(NAMES))
+        builder.add("https://example.com/admin2")
+        builder.discard("https://other.org/admin")
+
+        expected = ["https://example.com/admin", "https://example.com/admin2", "https://example.com/admin/users", "https://example.com/Administrator"]
+        self.assertEqual(builder.search("admin", limit=10), expected)
+        self.assertEqual(builder.get_index(wait=True).search("admin", limit=10), expected)
+
+    def test_cancel(self) -> None:
+        builder = SearchIndexBuilder(list(NAMES))
+        builder.cancel()
+
+        self.assertTrue(builder.task.done)
+
+
+class RegistrySearchTest(TreeTestCase):
+    def test_large_registries_are_indexed_in_the_background(self) -> None:
+        root = DirectoryAsset("/")
+        root.add_directories(NAMES)
+
+        with mock.patch.object(directory_asset, "BACKGROUND_INDEX_MIN_NAMES", 1):
+            registry = DirectoryAsset.master_list
+            scanned = [directory.name for directory in registry.search("admin")]
+            root.add_directories(["https://example.com/admin2"])
+            root.remove_children(["https://other.org/admin"])
+
+            indexed = [directory.name for directory in registry.search("admin", wait_for_index=True)]
+
+        self.assertEqual(scanned, ["https://other.org/admin", "https://example.com/admin", "https://example.com/admin/users", "https://example.com/Administrator"])
+        self.assertIsNone(registry.index_builder)
+        self.assertEqual(indexed, ["https://example.com/admin", "https://example.com/admin2", "https://example.com/admin/users", "https://example.com/Administrator"])
+
+
+class QueryExitStatusTest(TreeTestCase):
+    def run_query(self, *arguments:str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, str(PROJECT_ROOT / "src" / "webwalker.py"), *arguments, "-q", "admin"],
+                              cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60)
+
+    def test_query(self) -> None:
+        input_file_name = self.get_data_file_name(".txt")
+        (DATA_PATH / input_file_name).write_text('["/admin", "/login"]')
+
+        completed = self.run_query("-i", input_file_name)
+
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout.splitlines(), ["/admin"])
+
+    def test_missing_or_broken_tree(self) -> None:
+        tree_file_name = self.get_data_file_name(".txt")
+        (DATA_PATH / tree_file_name).write_text("not a directory\n")
+
+        for arguments, message in ((["-i", "missing_input.txt"], "missing_input.txt was not found"),
+                                   (["-I", tree_file_name], f"something wrong with {tree_file_name}")):
+            with self.subTest(arguments=arguments):
+                completed = self.run_query(*arguments)
+
+                self.assertEqual(completed.returncode, 1)
+                self.assertEqual(completed.stdout, "")
+                self.assertIn(message, completed.stderr)
+                self.assertNotIn("Traceback", completed.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
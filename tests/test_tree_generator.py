@@ -0,0 +1,47 @@
+import io
+import unittest
+
+from tests.helpers import DATA_PATH, TreeTestCase
+
+from directory_asset import DirectoryAsset
+from href_reader import iter_hrefs
+from tree_generator import TreeGenerator
+from webwalker import parse_directory_list
+
+
+class TreeGeneratorTest(TreeTestCase):
+    def test_same_arguments_same_tree(self) -> None:
+        directories = list(TreeGenerator(500, seed=3).iter_directories())
+
+        self.assertEqual(len(directories), 500)
+        self.assertEqual(len({name for _, name in directories}), 500)
+        self.assertEqual(list(TreeGenerator(500, seed=3).iter_directories()), directories)
+        self.assertNotEqual(list(TreeGenerator(500, seed=4).iter_directories()), directories)
+
+    def test_depth(self) -> None:
+        directories = list(TreeGenerator(2000, fan_out=3, depth=4).iter_directories())
+
+        self.assertEqual(max(depth for depth, _ in directories), 4)
+        self.assertTrue(all(name.startswith("https://host") for _, name in directories))
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            TreeGenerator(0)
+
+    def test_written_files_can_be_read_back(self) -> None:
+        generator = TreeGenerator(300)
+        dump_name = self.get_data_file_name(".txt")
+        tree_name = self.get_data_file_name(".txt")
+        generator.write_dump(DATA_PATH / dump_name)
+        generator.write_tree(DATA_PATH / tree_name)
+
+        with open(DATA_PATH / dump_name) as file:
+            self.assertEqual(list(iter_hrefs(file)), list(generator.iter_hrefs()))
+        with open(DATA_PATH / tree_name) as file:
+            root = parse_directory_list(file)
+        self.assertEqual(root.descendant_count, 300)
+        self.assertEqual(len(DirectoryAsset.master_list), 301)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import pickle
+import unittest
+
+from unittest import mock
+
+from tests.helpers import TreeTestCase
+
+from directory_asset import DirectoryAsset
+from url_normalizer import UrlNormalizer, normalize_percent_encoding, remove_dot_segments
+
+
+class PathHelpersTest(unittest.TestCase):
+    def test_remove_dot_segments(self) -> None:
+        for path, expected in (("/a/./b/../c", "/a/c"), ("/a/b/..", "/a/"), ("/../a", "/a"), ("a/../../b", "b"), ("/a.b/c", "/a.b/c")):
+            with self.subTest(path=path):
+                self.assertEqual(remove_dot_segments(path), expected)
+
+    def test_normalize_percent_encoding(self) -> None:
+        self.assertEqual(normalize_percent_encoding("/%7euser%2f%41"), "/~user%2FA")
+        self.assertEqual(normalize_percent_encoding("/100%"), "/100%")
+
+
+class UrlNormalizerTest(unittest.TestCase):
+    def test_same_page_written_differently(self) -> None:
+        normalizer = UrlNormalizer()
+        for href in ("https://Example.com:443/a/", "https://example.com/a#top", "HTTPS://EXAMPLE.COM/x/../a"):
+            with self.subTest(href=href):
+                self.assertEqual(normalizer.normalize(href), "https://example.com/a")
+
+    def test_percent_encoding(self) -> None:
+        self.assertEqual(UrlNormalizer().normalize("https://example.com/%7euser/a%2fb"), "https://example.com/~user/a%2Fb")
+
+    def test_query(self) -> None:
+        self.assertEqual(UrlNormalizer().normalize("/a?b=2&a=1"), "/a?a=1&b=2")
+        self.assertEqual(UrlNormalizer(drop_query_params=["utm_source"]).normalize("/a?utm_source=x&b=2"), "/a?b=2")
+        self.assertEqual(UrlNormalizer(strip_query=True).normalize("/a?b=2"), "/a")
+
+    def test_base_url(self) -> None:
+        normalizer = UrlNormalizer(base_url="https://example.com/app/")
+        self.assertEqual(normalizer.normalize("login"), "https://example.com/app/login")
+        self.assertEqual(normalizer.normalize("../about"), "https://example.com/about")
+
+    def test_urls_without_hierarchy_are_kept(self) -> None:
+        normalizer = UrlNormalizer()
+        self.assertEqual(normalizer.normalize("mailto:Someone@Example.com"), "mailto:Someone@Example.com")
+        self.assertEqual(normalizer.normalize("https://example.com:99999/a"), "https://example.com:99999/a")
+
+    def test_normalize_all_skips_empty_results(self) -> None:
+        self.assertEqual(list(UrlNormalizer().normalize_all(["#top", "/a/", "/a"])), ["/a", "/a"])
+
+    def test_pickle(self) -> None:
+        # normalizers are sent to the bulk import worker processes
+        normalizer = pickle.loads(pickle.dumps(UrlNormalizer(base_url="https://example.com/", strip_query=True, cache_size=8)))
+
+        self.assertEqual(normalizer.normalize("a/?x=1"), "https://example.com/a")
+        self.assertEqual(normalizer.normalize.cache_info().maxsize, 8)
+
+
+class PopulateNormalizedTest(TreeTestCase):
+    def test_duplicates_written_differently_add_one_directory(self) -> None:
+        root = DirectoryAsset("/")
+        with mock.patch.object(DirectoryAsset, "url_normalizer", UrlNormalizer()):
+            created_directories = root.populate_directories('["https://Example.com/a/", "https://example.com:443/a#top", "#top", "/b?y=2&x=1"]')
+
+        self.assertEqual([directory.name for directory in created_directories], ["https://example.com/a", "/b?x=1&y=2"])
+
+
+if __name__ == "__main__":
+    unittest.main()